@@ -0,0 +1,58 @@
+import time
+from typing import Dict
+
+from services.metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    """Per-route request counts, latency and in-flight gauges.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so it adds no extra task or
+    body buffering per request and streamed responses pass straight through.
+    Routes are labelled by their path template (``/api/chat/{pr_id:path}``),
+    keeping label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc((method,))
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec((method,))
+            route = self._route_path(scope)
+            HTTP_REQUESTS.inc((method, route, str(status)))
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, (method, route))
+
+    def _route_path(self, scope) -> str:
+        # The router records the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            else:
+                path = getattr(endpoint, "__name__", "unknown")
+            self._route_paths[endpoint] = path
+        return path
@@ -1,12 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from services.analysis_service import AnalysisService
+from fastapi import APIRouter, HTTPException, Response
+from api.routes.github import analysis_service
+from services.analysis_store import analysis_store
 from models.analysis import AnalysisResponse
 
 router = APIRouter()
-analysis_service = AnalysisService()
-
-# In-memory storage for demo
-analyses_storage = {}
 
 @router.post("/pr/{pr_id}", response_model=AnalysisResponse)
 async def analyze_pr(pr_id: str, title: str = "Add user authentication system"):
@@ -15,15 +12,15 @@ async def analyze_pr(pr_id: str, title: str = "Add user authentication system"):
         mock_data = {
             "title": title,
             "description": "Mock PR for demonstration",
-            "files": [{"filename": "auth.js", "patch": "SELECT * FROM users WHERE id = " + userId}],
+            "files": [{"filename": "auth.js", "patch": '+const query = "SELECT * FROM users WHERE id = " + userId;'}],
             "changed_files": 5,
             "additions": 100,
             "deletions": 20
         }
         
         analysis = await analysis_service.analyze_pr(pr_id, mock_data)
-        analyses_storage[pr_id] = analysis
-        return analysis
+        # The stored bytes are the response; skip response_model re-validation
+        return Response(await analysis_store.put(pr_id, analysis), media_type="application/json")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -31,35 +28,38 @@ async def analyze_pr(pr_id: str, title: str = "Add user authentication system"):
 @router.get("/pr/{pr_id}", response_model=AnalysisResponse)
 async def get_analysis(pr_id: str):
     """Get existing analysis"""
-    if pr_id not in analyses_storage:
+    body = await analysis_store.get_response(pr_id)
+    if body is None:
         return await analyze_pr(pr_id)
-    return analyses_storage[pr_id]
+    return Response(body, media_type="application/json")
 
 @router.post("/apply-fix/{pr_id}/{fix_id}")
 async def apply_fix(pr_id: str, fix_id: str):
     """Apply auto-fix and update risk score"""
+    def apply(analysis: AnalysisResponse) -> dict:
+        fix = next((fix for fix in analysis.auto_fixes if fix.id == fix_id), None)
+        if fix is None:
+            raise HTTPException(status_code=404, detail="Fix not found")
+        if fix.applied:
+            raise HTTPException(status_code=409, detail=f"Fix {fix_id} is already applied")
+        fix.applied = True
+        reduction = int(15 * fix.confidence)
+        analysis.risk_score = max(0, analysis.risk_score - reduction)
+        analysis.risk_level = "green" if analysis.risk_score < 50 else "yellow" if analysis.risk_score < 75 else "red"
+        return {
+            "success": True,
+            "message": f"Fix {fix_id} applied successfully",
+            "new_risk_score": analysis.risk_score,
+            "new_risk_level": analysis.risk_level
+        }
+
     try:
-        if pr_id not in analyses_storage:
+        # Serialized per PR, so concurrent fixes don't overwrite each other
+        result = await analysis_store.update(pr_id, apply)
+        if result is None:
             raise HTTPException(status_code=404, detail="PR analysis not found")
-        
-        analysis = analyses_storage[pr_id]
-        
-        for fix in analysis.auto_fixes:
-            if fix.id == fix_id:
-                fix.applied = True
-                reduction = int(15 * fix.confidence)
-                analysis.risk_score = max(0, analysis.risk_score - reduction)
-                analysis.risk_level = "green" if analysis.risk_score < 50 else "yellow" if analysis.risk_score < 75 else "red"
-                
-                return {
-                    "success": True,
-                    "message": f"Fix {fix_id} applied successfully",
-                    "new_risk_score": analysis.risk_score,
-                    "new_risk_level": analysis.risk_level
-                }
-        
-        raise HTTPException(status_code=404, detail="Fix not found")
-        
+        return result
+
     except HTTPException:
         raise
     except Exception as e:
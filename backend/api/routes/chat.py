@@ -1,9 +1,15 @@
 # backend/api/routes/chat.py
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from services.analysis_store import analysis_store
+from services.chat_cache import context_hash
 from services.chat_service import ChatService
 from models.chat import ChatRequest, ChatResponse
+from utils.sse import sse_event
 from datetime import datetime
 import logging
+import orjson
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -13,32 +19,122 @@ chat_service = ChatService()
 # In-memory storage
 chat_history = {}
 
+def _save_history(pr_id: str, request: ChatRequest, response_text: str):
+    chat_history.setdefault(pr_id, []).append({
+        "user": request.content,
+        "ai": response_text,
+        "mentor": request.mentor_mode,
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+async def _load_context(pr_id: str) -> dict:
+    # The stored blob already is the analysis dump plus the files' patches the
+    # prompt builder needs; no model round trip
+    blob = await analysis_store.get_blob(pr_id)
+    return orjson.loads(blob) if blob is not None else {}
+
+# Registered before the catch-all "/{pr_id:path}" POST so it isn't swallowed by it
+@router.post("/stream/{pr_id:path}")
+async def stream_chat_with_ai(pr_id: str, request: ChatRequest):
+    """Stream the AI reply as Server-Sent Events.
+
+    Events: ``meta`` (mentor), unnamed ``data`` events with text chunks, then
+    ``done`` with the full response and time-to-first-token. History is saved
+    once the stream completes.
+    """
+    pr_context = await _load_context(pr_id)
+    session = chat_service.sessions.get(pr_id, request.session_id, context_hash(pr_context))
+
+    async def event_stream():
+        started = time.perf_counter()
+        ttft_ms = None
+        chunks = []
+        mentor_name = chat_service.mentor_name(request.mentor_mode)
+        yield sse_event({"mentor_name": mentor_name}, event="meta")
+
+        follow_up = session is not None and session.is_follow_up
+        cache_key = chat_service.cache_key(request.content, request.mentor_mode, pr_context)
+        cached = None if follow_up else await chat_service.cached_response(cache_key, request.bypass_cache)
+        prompt_tokens_saved = None
+        try:
+            if cached is not None:
+                ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                chunks.append(cached)
+                yield sse_event({"text": cached})
+            else:
+                gemini_request = await chat_service.build_request(
+                    request.content, request.mentor_mode, pr_context, session
+                )
+                prompt_tokens_saved = gemini_request.diff_report.tokens_saved
+                async for text in chat_service.stream_response(gemini_request):
+                    if ttft_ms is None:
+                        ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                    chunks.append(text)
+                    yield sse_event({"text": text})
+                if not follow_up:
+                    await chat_service.response_cache.set(cache_key, "".join(chunks))
+            chat_service.record_turn(session, request.content, "".join(chunks))
+        except Exception as e:
+            logger.error(f"Chat stream failed for PR {pr_id}: {e}", exc_info=True)
+            if chunks:
+                yield sse_event({"error": "Stream interrupted"}, event="error")
+            else:
+                # Nothing sent yet: degrade to the same fallback as the non-streaming route
+                mentor_name = "AI Reviewer"
+                async for text in chat_service.fallback_stream(request.content, request.mentor_mode, pr_context):
+                    chunks.append(text)
+                    yield sse_event({"text": text})
+
+        response_text = "".join(chunks)
+        _save_history(pr_id, request, response_text)
+        yield sse_event({
+            "response": response_text,
+            "mentor_name": mentor_name,
+            "timestamp": datetime.utcnow().isoformat(),
+            "ttft_ms": ttft_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "prompt_tokens_saved": prompt_tokens_saved,
+            "cached": cached is not None,
+            "session_id": request.session_id
+        }, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stream-stats")
+async def get_stream_stats():
+    """Time-to-first-token statistics for streamed chats"""
+    return chat_service.stream_stats()
+
+@router.get("/prompt-stats")
+async def get_prompt_stats():
+    """Diff tokens sent vs. saved by prompt budgeting, plus conversation session stats"""
+    return chat_service.prompt_stats()
+
 @router.post("/{pr_id:path}", response_model=ChatResponse)
 async def chat_with_ai(pr_id: str, request: ChatRequest):
     """Chat with AI about specific PR"""
     try:
-        from api.routes.analysis import analyses_storage
-        from api.routes.github import analyses_storage as github_analyses_storage
-
         # Lookup PR context
-        pr_context = analyses_storage.get(pr_id) or github_analyses_storage.get(pr_id) or {}
-        if hasattr(pr_context, "dict"):
-            pr_context = pr_context.dict()
+        pr_context = await _load_context(pr_id)
+
+        session = chat_service.sessions.get(pr_id, request.session_id, context_hash(pr_context))
 
         # Generate AI response
         response = await chat_service.generate_response(
             request.content,
             request.mentor_mode,
-            pr_context
+            pr_context,
+            bypass_cache=request.bypass_cache,
+            session=session
         )
+        response.session_id = request.session_id
 
         # Save history
-        chat_history.setdefault(pr_id, []).append({
-            "user": request.content,
-            "ai": response.response,
-            "mentor": request.mentor_mode,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        _save_history(pr_id, request, response.response)
 
         return response
 
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from services.batch_service import BatchAnalysisService
+from services.job_queue import AnalysisJobQueue
+from services.webhook_service import WebhookService
 from services.github_service import GitHubService
 from services.analysis_service import AnalysisService
-from models.github import PRRequest
+from models.github import AnalysisJobRequest, BatchAnalysisRequest, PRRequest
 from models.analysis import AnalysisResponse
+from services.analysis_store import analysis_store
+from services.http_client import http_clients
+from config import settings
+from utils.sse import sse_event
+import orjson
 
 router = APIRouter()
 github_service = GitHubService()
 analysis_service = AnalysisService()
-
-# In-memory storage
-analyses_storage = {}
+batch_service = BatchAnalysisService(github_service, analysis_service, analysis_store)
+# Started and stopped by the app lifespan
+job_queue = AnalysisJobQueue(github_service, analysis_service, analysis_store)
+webhook_service = WebhookService(job_queue)
 
 @router.post("/analyze-pr", response_model=AnalysisResponse)
 async def analyze_github_pr(pr_request: PRRequest):
@@ -28,8 +38,9 @@ async def analyze_github_pr(pr_request: PRRequest):
         analysis = await analysis_service.analyze_pr(pr_id, pr_data, pr_request.repository)
         analysis.github_authenticated = bool(pr_request.github_token)
 
-        analyses_storage[pr_id] = analysis
-        return analysis
+        # The stored bytes are the response; skip response_model re-validation
+        body = await analysis_store.put(pr_id, analysis)
+        return Response(body, media_type="application/json")
 
     except HTTPException:
         raise
@@ -44,6 +55,124 @@ async def analyze_github_pr(pr_request: PRRequest):
         else:
             raise HTTPException(status_code=500, detail=f"GitHub PR analysis failed: {error_message}")
 
+@router.post("/jobs", status_code=202)
+async def submit_analysis_job(job_request: AnalysisJobRequest):
+    """Queue a PR analysis and return its job id immediately"""
+    if not job_request.repository or "/" not in job_request.repository:
+        raise HTTPException(status_code=400, detail="Invalid repository format. Use 'owner/repo'")
+    try:
+        job = await job_queue.submit(
+            job_request.repository,
+            job_request.pr_number,
+            job_request.github_token,
+            job_request.callback_url
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/github/jobs/{job.id}",
+        "events_url": f"/api/github/jobs/{job.id}/events"
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    """Poll a job's status, current stage and result"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_analysis_job(job_id: str):
+    """Server-Sent Events for each stage of a job, ending with ``completed`` or ``failed``"""
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for event in job_queue.events(job_id):
+            yield sse_event(event, event=event["stage"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/webhook", status_code=202)
+async def receive_github_webhook(request: Request):
+    """GitHub ``pull_request`` webhook: queue a debounced background analysis on open/push"""
+    if not webhook_service.configured:
+        raise HTTPException(status_code=503, detail="Webhook secret is not configured")
+    body = await request.body()
+    if not webhook_service.verify(body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Webhook body must be JSON")
+    return webhook_service.receive(
+        request.headers.get("X-GitHub-Event", ""),
+        request.headers.get("X-GitHub-Delivery"),
+        payload
+    )
+
+@router.post("/analyze-batch")
+async def analyze_github_batch(batch_request: BatchAnalysisRequest):
+    """Analyze many PRs concurrently, streaming NDJSON as each one finishes.
+
+    Each line is a ``result`` record with running ``done``/``total`` counts;
+    the last line is a ``summary`` with throughput for the whole batch.
+    """
+    targets = [(target.repository, target.pr_number) for target in batch_request.pull_requests]
+    if batch_request.repository:
+        if "/" not in batch_request.repository:
+            raise HTTPException(status_code=400, detail="Invalid repository format. Use 'owner/repo'")
+        try:
+            pr_numbers = await github_service.list_pull_requests(
+                batch_request.repository,
+                batch_request.state,
+                batch_request.github_token,
+                limit=settings.BATCH_MAX_PRS
+            )
+        except Exception as e:
+            error_message = str(e)
+            if "Invalid GitHub token" in error_message:
+                raise HTTPException(status_code=401, detail="Invalid GitHub token provided.")
+            elif "rate limit" in error_message.lower():
+                raise HTTPException(status_code=429, detail="GitHub API rate limit exceeded.")
+            elif "not found" in error_message:
+                raise HTTPException(status_code=404, detail=error_message)
+            raise HTTPException(status_code=500, detail=f"Listing pull requests failed: {error_message}")
+        targets.extend((batch_request.repository, pr_number) for pr_number in pr_numbers)
+
+    if not targets:
+        raise HTTPException(status_code=400, detail="Provide a repository or a list of pull_requests")
+    if any("/" not in repo for repo, _ in targets):
+        raise HTTPException(status_code=400, detail="Invalid repository format. Use 'owner/repo'")
+
+    # Duplicates would only coalesce onto the same analysis
+    targets = list(dict.fromkeys(targets))
+    limit = min(batch_request.max_prs or settings.BATCH_MAX_PRS, settings.BATCH_MAX_PRS)
+    targets = targets[:limit]
+
+    async def ndjson():
+        async for record in batch_service.run(targets, batch_request.github_token, batch_request.concurrency):
+            yield orjson.dumps(record) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.get("/analyze-batch/{batch_id}")
+async def get_batch_progress(batch_id: str):
+    """Progress and throughput of a running or recently finished batch"""
+    progress = batch_service.progress(batch_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return progress
+
 @router.post("/validate-token")
 async def validate_github_token(request: dict):
     """Validate a GitHub token"""
@@ -51,22 +180,22 @@ async def validate_github_token(request: dict):
     if not token:
         return {"valid": False, "error": "No token provided"}
 
-    import httpx
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
-            resp = await client.get(
-                "https://api.github.com/user",
-                headers={"Authorization": f"token {token}"}
-            )
-            if resp.status_code == 200:
-                user_data = resp.json()
-                return {
-                    "valid": True,
-                    "user": user_data.get("login"),
-                    "rate_limit": resp.headers.get("X-RateLimit-Remaining", "unknown"),
-                    "scopes": resp.headers.get("X-OAuth-Scopes", "unknown")
-                }
-            else:
-                return {"valid": False, "error": "Invalid token"}
+        client = http_clients.get(settings.GITHUB_API_URL)
+        resp = await client.get(
+            f"{settings.GITHUB_API_URL}/user",
+            headers={"Authorization": f"token {token}"},
+            timeout=5
+        )
+        if resp.status_code == 200:
+            user_data = resp.json()
+            return {
+                "valid": True,
+                "user": user_data.get("login"),
+                "rate_limit": resp.headers.get("X-RateLimit-Remaining", "unknown"),
+                "scopes": resp.headers.get("X-OAuth-Scopes", "unknown")
+            }
+        else:
+            return {"valid": False, "error": "Invalid token"}
     except Exception as e:
         return {"valid": False, "error": str(e)}
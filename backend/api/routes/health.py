@@ -2,7 +2,7 @@
 from fastapi import APIRouter
 from datetime import datetime
 from config import settings
-import httpx
+from services.http_client import http_clients
 
 router = APIRouter()
 
@@ -17,45 +17,49 @@ async def liveness_check():
 # --- Full external services health check ---
 @router.get("/full")
 async def full_health_check():
+    from api.routes.github import github_service
+
     github_status = {"ok": True, "error": "No token configured - public repos only"}
     gemini_status = {"ok": False, "error": None}
 
     # GitHub API check
     if settings.has_github_token:
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                resp = await client.get(
-                    "https://api.github.com/user",
-                    headers={"Authorization": f"token {settings.GITHUB_TOKEN}"}
-                )
-                github_status["ok"] = resp.status_code == 200
-                if not github_status["ok"]:
-                    github_status["error"] = f"{resp.status_code}: {resp.text}"
+            client = http_clients.get(settings.GITHUB_API_URL)
+            resp = await client.get(
+                f"{settings.GITHUB_API_URL}/user",
+                headers={"Authorization": f"token {settings.GITHUB_TOKEN}"},
+                timeout=5
+            )
+            github_status["ok"] = resp.status_code == 200
+            if not github_status["ok"]:
+                github_status["error"] = f"{resp.status_code}: {resp.text}"
         except Exception as e:
             github_status["error"] = str(e)
 
     # Gemini API check
     if settings.has_gemini_key:
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.post(
-                    f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent?key={settings.GEMINI_API_KEY}",
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "contents": [{"parts": [{"text": "Health check test"}]}],
-                        "generationConfig": {
-                            "maxOutputTokens": 1,
-                            "temperature": 0.1
-                        }
-                    }
-                )
-                if resp.status_code == 200:
-                    gemini_status = {"ok": True, "error": None}
-                else:
-                    gemini_status = {
-                        "ok": False,
-                        "error": f"HTTP {resp.status_code}: {resp.text[:100]}"
+            client = http_clients.get(settings.GEMINI_API_URL)
+            resp = await client.post(
+                f"{settings.GEMINI_API_URL}/v1beta/models/{settings.GEMINI_MODEL}:generateContent?key={settings.GEMINI_API_KEY}",
+                headers={"Content-Type": "application/json"},
+                json={
+                    "contents": [{"parts": [{"text": "Health check test"}]}],
+                    "generationConfig": {
+                        "maxOutputTokens": 1,
+                        "temperature": 0.1
                     }
+                },
+                timeout=10
+            )
+            if resp.status_code == 200:
+                gemini_status = {"ok": True, "error": None}
+            else:
+                gemini_status = {
+                    "ok": False,
+                    "error": f"HTTP {resp.status_code}: {resp.text[:100]}"
+                }
         except Exception as e:
             gemini_status = {"ok": False, "error": f"Connection error: {str(e)}"}
     else:
@@ -67,5 +71,57 @@ async def full_health_check():
         "services": {
             "github_api": github_status,
             "gemini_api": gemini_status
+        },
+        "github_budget": github_service.scheduler.stats()
+    }
+
+# --- Connection pool occupancy for sizing HTTP_MAX_CONNECTIONS ---
+@router.get("/pools")
+async def pool_stats():
+    return {
+        "timestamp": datetime.utcnow(),
+        "pools": http_clients.stats()
+    }
+
+# --- Cache effectiveness (GitHub quota saved by conditional requests) ---
+@router.get("/caches")
+async def cache_stats():
+    from api.routes.github import github_service, analysis_service
+    from api.routes.chat import chat_service
+    from services.analysis_store import analysis_store
+
+    return {
+        "timestamp": datetime.utcnow(),
+        "caches": {
+            "analysis_store": analysis_store.stats(),
+            "github_etag": github_service.cache_stats(),
+            "analysis_results": analysis_service.result_cache.stats(),
+            "file_analysis": analysis_service.file_cache.stats(),
+            "chat_responses": chat_service.response_cache.stats()
+        },
+        "coalescing": {
+            "github_pr_fetch": github_service.single_flight.stats(),
+            "analysis": analysis_service.single_flight.stats()
         }
     }
+
+# --- Background analysis job queue ---
+@router.get("/jobs")
+async def job_stats():
+    from api.routes.github import job_queue, webhook_service
+
+    return {
+        "timestamp": datetime.utcnow(),
+        "jobs": job_queue.stats(),
+        "webhooks": webhook_service.stats()
+    }
+
+# --- Where issue detection ran (inline / thread / process pool) ---
+@router.get("/executor")
+async def executor_stats():
+    from services.analysis_executor import analysis_executor
+
+    return {
+        "timestamp": datetime.utcnow(),
+        "executor": analysis_executor.stats()
+    }
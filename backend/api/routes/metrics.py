@@ -0,0 +1,75 @@
+# backend/api/routes/metrics.py
+from typing import Dict, Iterable, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services.http_client import http_clients
+from services.metrics import registry
+
+router = APIRouter()
+
+def _hits_and_misses(stats: Dict) -> Tuple[int, int]:
+    if "not_modified" in stats:
+        # GitHub conditional requests: a 304 is the hit
+        return stats["not_modified"], stats["misses"]
+    if "hits" in stats:
+        # Memory misses that the disk tier answered are hits overall
+        disk_hits = stats.get("disk_hits", 0)
+        return stats["hits"] + disk_hits, stats["misses"] - disk_hits
+    hits = stats.get("memory_hits", 0) + stats.get("disk_hits", 0) + stats.get("response_hits", 0)
+    return hits, stats.get("misses", 0)
+
+def _collect() -> Iterable:
+    """Gauges and counters read from the services at scrape time"""
+    from api.routes.github import github_service, analysis_service, job_queue, webhook_service
+    from api.routes.chat import chat_service
+    from services.analysis_store import analysis_store
+
+    caches = {
+        "analysis_store": analysis_store.stats(),
+        "github_etag": github_service.cache_stats(),
+        "analysis_results": analysis_service.result_cache.stats(),
+        "file_analysis": analysis_service.file_cache.stats(),
+        "chat_responses": chat_service.response_cache.stats(),
+    }
+    hits, misses, ratios, entries = [], [], [], []
+    for name, stats in caches.items():
+        if "misses" not in stats:
+            continue
+        cache_hits, cache_misses = _hits_and_misses(stats)
+        labels = {"cache": name}
+        hits.append((labels, cache_hits))
+        misses.append((labels, cache_misses))
+        ratios.append((labels, round(cache_hits / (cache_hits + cache_misses), 4) if cache_hits + cache_misses else 0.0))
+        entries.append((labels, stats.get("entries", 0)))
+    yield "cache_hits_total", "counter", "Cache lookups answered from cache", hits
+    yield "cache_misses_total", "counter", "Cache lookups that had to compute or fetch", misses
+    yield "cache_hit_ratio", "gauge", "Hits / lookups since start", ratios
+    yield "cache_entries", "gauge", "Entries currently held in memory", entries
+
+    jobs = job_queue.stats()
+    yield "analysis_jobs_queued", "gauge", "Background analysis jobs waiting for a worker", [({}, jobs["queued"])]
+    yield "analysis_jobs_running", "gauge", "Background analysis jobs in progress", [({}, jobs["running"])]
+
+    webhooks = webhook_service.stats()
+    yield "webhook_deliveries_total", "counter", "GitHub webhook deliveries by outcome", [
+        ({"outcome": outcome}, webhooks[outcome])
+        for outcome in ("rejected", "duplicates", "ignored", "debounced", "cancelled", "queued", "queue_failures")
+    ]
+    yield "webhook_pending_analyses", "gauge", "PRs waiting out the webhook debounce", [({}, webhooks["pending"])]
+
+    pools = http_clients.stats()["hosts"]
+    yield "upstream_requests_in_flight", "gauge", "Upstream requests awaiting a response", [
+        ({"host": origin.split("://", 1)[-1]}, stats["in_flight"]) for origin, stats in pools.items()
+    ]
+    budgets = github_service.scheduler.stats()["tokens"]
+    yield "github_rate_limit_remaining", "gauge", "Last known GitHub quota per token (hashed)", [
+        ({"token": token_id}, budget["remaining"]) for token_id, budget in budgets.items()
+        if budget["remaining"] is not None
+    ]
+
+registry.add_collector(_collect)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, stage, upstream and cache metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
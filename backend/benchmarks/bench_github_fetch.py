@@ -0,0 +1,86 @@
+"""Benchmark the REST and GraphQL PR fetch backends against a local stub GitHub.
+
+Each backend fetches the same PRs from the load test's fake GitHub server with
+per-request latency; the table shows upstream requests and wall time per PR.
+Results are checked to have the same dict shape and patches.
+
+Usage (from backend/):
+    python -m benchmarks.bench_github_fetch --files 10 100 300 1000 --github-latency-ms 50
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Dict
+
+from benchmarks.load_test import fake_github, free_socket, serve_stub
+from services.github_service import GitHubService
+from services.http_client import HTTPClientRegistry
+
+BACKENDS = ("rest", "graphql")
+
+
+async def fetch_all(service: GitHubService, prs: int, first_number: int) -> Dict[int, Dict]:
+    results = {}
+    for number in range(first_number, first_number + prs):
+        results[number] = await service.get_pr_data("bench/repo", number)
+    return results
+
+
+async def run(args):
+    print(f"{'files':>6} {'backend':>8} {'requests/PR':>12} {'ms/PR':>8}")
+    for files in args.files:
+        sock = free_socket()
+        github_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        stub_args = SimpleNamespace(
+            seed=args.seed, files=files, patch_lines=args.patch_lines,
+            github_latency_ms=args.github_latency_ms, github_url=github_url
+        )
+        app = fake_github(stub_args)
+        server, task = await serve_stub(app, sock)
+        clients = HTTPClientRegistry(http2=False)
+        try:
+            outputs = {}
+            for index, backend in enumerate(BACKENDS):
+                service = GitHubService(http_clients=clients)
+                service.api_url = github_url
+                service.graphql_url = f"{github_url}/graphql"
+                service.base_token = "benchmark"
+                service.fetch_backend = backend
+                # ETag revalidation would hide the request count difference
+                service.response_cache = None
+
+                before = app.state.requests
+                started = time.perf_counter()
+                # Distinct PR numbers per backend so nothing is coalesced or cached
+                outputs[backend] = await fetch_all(service, args.prs, 1 + index * args.prs)
+                elapsed = time.perf_counter() - started
+                requests = (app.state.requests - before) / args.prs
+                print(f"{files:>6} {backend:>8} {requests:>12.1f} {elapsed / args.prs * 1000:>8.1f}")
+
+            rest, graphql = (list(outputs[backend].values())[0] for backend in BACKENDS)
+            if set(rest) != set(graphql):
+                print(f"  warning: keys differ: {sorted(set(rest) ^ set(graphql))}")
+            rest_patches = {f["filename"]: f.get("patch") for f in rest["files"]}
+            graphql_patches = {f["filename"]: f.get("patch") for f in graphql["files"]}
+            if rest_patches != graphql_patches:
+                print("  warning: patches differ between backends")
+        finally:
+            await clients.aclose()
+            server.should_exit = True
+            await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 100, 300, 1000], help="Files per PR")
+    parser.add_argument("--prs", type=int, default=5, help="PRs fetched per backend")
+    parser.add_argument("--patch-lines", type=int, default=40)
+    parser.add_argument("--github-latency-ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
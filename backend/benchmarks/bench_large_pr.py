@@ -0,0 +1,112 @@
+"""Peak RSS of fetching, analysing and storing one very large PR, with and without lazy patches.
+
+Each mode runs in a fresh subprocess (the RSS high-water mark is per
+process) against the load test's fake GitHub server, and reports the peak
+RSS seen by the analysis, the process peak, and the patch store's spill.
+
+Usage (from backend/):
+    python -m benchmarks.bench_large_pr --files 3000 --patch-lines 400
+    python -m benchmarks.bench_large_pr --patch-memory-mb 4   # force spilling to disk
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("eager", "lazy")
+
+
+async def measure(args) -> dict:
+    from benchmarks.load_test import fake_github, free_socket, serve_stub
+    from services.analysis_executor import AnalysisExecutor
+    from services.analysis_service import AnalysisService
+    from services.analysis_store import AnalysisStore
+    from services.github_service import GitHubService
+    from services.http_client import HTTPClientRegistry
+    from services.result_cache import AnalysisResultCache
+    from utils.memory import current_rss, max_rss
+
+    sock = free_socket()
+    github_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    stub = fake_github(SimpleNamespace(
+        seed=args.seed, files=args.files, patch_lines=args.patch_lines, github_latency_ms=0, github_url=github_url
+    ))
+    # The stub shares this process; its patch templates are built before the baseline
+    server, task = await serve_stub(stub, sock)
+    clients = HTTPClientRegistry(http2=False)
+    try:
+        github = GitHubService(http_clients=clients)
+        github.api_url = github_url
+        github.response_cache = None
+        github.lazy_patches = args.mode == "lazy"
+        github.patch_memory_max_bytes = args.patch_memory_mb * 1024 * 1024
+        analysis = AnalysisService(
+            result_cache=AnalysisResultCache(max_entries=1, ttl=None),
+            executor=AnalysisExecutor(mode="thread")
+        )
+        store = AnalysisStore(max_bytes=1 << 40, database_url="")
+
+        baseline = current_rss()
+        started = time.perf_counter()
+        pr_data = await github.get_pr_data("bench/repo", 1)
+        result = await analysis.analyze_pr("bench/repo-1", pr_data, "bench/repo")
+        await store.put("bench/repo-1", result)
+        elapsed = time.perf_counter() - started
+
+        patch_store = getattr(pr_data["files"][0], "_store", None) if pr_data["files"] else None
+        return {
+            "mode": args.mode,
+            "files": len(pr_data["files"]),
+            "issues": len(result.issues),
+            "seconds": round(elapsed, 2),
+            "baseline_rss_mb": round(baseline / 2**20, 1),
+            "analysis_peak_rss_mb": result.peak_rss_mb,
+            "process_peak_rss_mb": round(max_rss() / 2**20, 1),
+            "stored_mb": round(store.stats()["bytes"] / 2**20, 1),
+            "patch_store": patch_store.stats() if patch_store is not None else None,
+        }
+    finally:
+        await clients.aclose()
+        server.should_exit = True
+        await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--patch-lines", type=int, default=400)
+    parser.add_argument("--patch-memory-mb", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    print(f"{'mode':>6} {'files':>6} {'issues':>7} {'s':>6} {'base MB':>8} {'peak MB':>8} "
+          f"{'stored MB':>10} {'spilled':>8}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_large_pr", "--mode", mode, "--files", str(args.files),
+             "--patch-lines", str(args.patch_lines), "--patch-memory-mb", str(args.patch_memory_mb),
+             "--seed", str(args.seed)],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY") or "benchmark"}
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        spilled = result["patch_store"]["spilled_patches"] if result["patch_store"] else 0
+        print(
+            f"{mode:>6} {result['files']:>6} {result['issues']:>7} {result['seconds']:>6} "
+            f"{result['baseline_rss_mb']:>8} {result['analysis_peak_rss_mb']:>8} "
+            f"{result['stored_mb']:>10} {spilled:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark batch risk scoring against scoring PRs one at a time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_risk_scorer --prs 100 1000 10000 --files 20
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from utils.risk_calculator import RiskCalculator
+
+PATHS = ["src/auth/", "src/api/", "lib/", "tests/", "docs/", "config/", "src/admin/", "app/"]
+EXTENSIONS = [".py", ".js", ".ts", ".go", ".c", ".md", ".yml", ".java"]
+
+
+def make_prs(count: int, files_per_pr: int, rng: random.Random):
+    prs, contributions = [], []
+    calculator = RiskCalculator()
+    for _ in range(count):
+        files = [
+            {
+                "filename": f"{rng.choice(PATHS)}file_{index}{rng.choice(EXTENSIONS)}",
+                "additions": rng.randint(0, 400),
+                "deletions": rng.randint(0, 200),
+            }
+            for index in range(rng.randint(1, files_per_pr * 2))
+        ]
+        prs.append({
+            "changed_files": len(files),
+            "additions": sum(file_info["additions"] for file_info in files),
+            "deletions": sum(file_info["deletions"] for file_info in files),
+            "files": files,
+        })
+        contributions.append([calculator.file_contribution(file_info) for file_info in files])
+    return prs, contributions
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--files", type=int, default=20, help="Mean files per PR")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    calculator = RiskCalculator()
+    print(f"{'prs':>7} {'files':>8} {'per-PR s':>9} {'batch s':>9} {'speedup':>8} {'us/PR':>7}")
+    for count in args.prs:
+        prs, contributions = make_prs(count, args.files, random.Random(args.seed))
+
+        batch = calculator.score_batch(prs, contributions)
+        single = [calculator.calculate_risk(pr, rows) for pr, rows in zip(prs, contributions)]
+        if not np.allclose(batch, single):
+            print("  warning: batch and per-PR scores differ")
+
+        loop_time = timed(
+            lambda: [calculator.calculate_risk(pr, rows) for pr, rows in zip(prs, contributions)], args.repeat
+        )
+        batch_time = timed(lambda: calculator.score_batch(prs, contributions), args.repeat)
+        total_files = sum(len(rows) for rows in contributions)
+        print(
+            f"{count:>7} {total_files:>8} {loop_time:>9.3f} {batch_time:>9.3f} "
+            f"{loop_time / batch_time:>7.1f}x {batch_time / count * 1e6:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Cost of serving a stored analysis: re-validated models vs cached orjson bytes.
+
+"before" is what the routes used to do per request: decode the stored blob
+with ``model_validate``, run FastAPI's response_model serialization and
+render a JSONResponse; chat decoded the same model just to ``model_dump`` it.
+"after" is the current path: cached API bytes for GET and ``orjson.loads``
+for the chat context.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --files 200 --repeat 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from models.analysis import AnalysisResponse
+from services.analysis_executor import AnalysisExecutor
+from services.analysis_service import AnalysisService
+from services.analysis_store import AnalysisStore
+from services.result_cache import AnalysisResultCache
+
+SNIPPETS = (
+    'password = "hunter2"', "eval(user_input)", "console.log(token)", "// TODO: validate",
+    "const total = items.reduce((a, b) => a + b, 0);", "return response.json();",
+)
+
+
+def make_pr(files: int, lines: int, rng: random.Random) -> dict:
+    pr_files = []
+    for index in range(files):
+        body = [f"+{rng.choice(SNIPPETS)}" for _ in range(lines)]
+        pr_files.append({
+            "filename": f"src/module_{index}/auth_{index}.js",
+            "status": "modified",
+            "additions": lines,
+            "deletions": 0,
+            "changes": lines,
+            "patch": f"@@ -1,0 +1,{lines} @@\n" + "\n".join(body),
+        })
+    return {"title": "Synthetic PR", "files": pr_files}
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / repeat
+
+
+async def build(args):
+    service = AnalysisService(
+        result_cache=AnalysisResultCache(max_entries=1, ttl=None),
+        executor=AnalysisExecutor(mode="thread")
+    )
+    analysis = await service.analyze_pr("bench-1", make_pr(args.files, args.lines, random.Random(args.seed)))
+    store = AnalysisStore(max_bytes=1 << 40, database_url="")
+    await store.put("bench-1", analysis)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    store = asyncio.run(build(args))
+    blob = asyncio.run(store.get_blob("bench-1"))
+    field = create_model_field(name="Response_get_analysis", type_=AnalysisResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def get_before():
+        model = AnalysisResponse.model_validate(orjson.loads(blob))
+        content = loop.run_until_complete(serialize_response(field=field, response_content=model))
+        return JSONResponse(content).body
+
+    def get_after():
+        return Response(loop.run_until_complete(store.get_response("bench-1")), media_type="application/json").body
+
+    def chat_before():
+        return AnalysisResponse.model_validate(orjson.loads(blob)).model_dump()
+
+    def chat_after():
+        return orjson.loads(blob)
+
+    def health_before():
+        return JSONResponse(jsonable_encoder(store.stats())).body
+
+    def health_after():
+        return ORJSONResponse(store.stats()).body
+
+    assert orjson.loads(get_before()) == orjson.loads(get_after())
+
+    print(f"blob {len(blob) / 1024:.0f} KiB, response {len(get_after()) / 1024:.1f} KiB, {args.files} files")
+    print(f"{'path':>22} {'before us':>10} {'after us':>10} {'speedup':>8}")
+    rows = (
+        ("GET /pr/{id}", get_before, get_after),
+        ("chat context", chat_before, chat_after),
+        ("health JSON", health_before, health_after),
+    )
+    for name, before, after in rows:
+        slow = timed(before, args.repeat) * 1e6
+        fast = timed(after, args.repeat) * 1e6
+        print(f"{name:>22} {slow:>10.1f} {fast:>10.1f} {slow / fast:>7.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""Load-test the API against local fake GitHub and Gemini servers.
+
+Starts stub GitHub and Gemini servers in-process, runs the app in a uvicorn
+subprocess pointed at them, drives each endpoint with concurrent clients and
+reports latency percentiles and requests/sec. Results are written as JSON so
+runs can be compared for regressions.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --requests 200 --concurrency 20 --output load.json
+    python -m benchmarks.load_test --scenarios chat apply-fix --gemini-latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("analyze-pr", "chat", "chat-stream", "apply-fix")
+
+# Added lines that trip the default rules, mixed into generated patches
+ISSUE_LINES = (
+    "eval(userInput);",
+    "console.log('debug', payload);",
+    'const query = "SELECT * FROM users WHERE id = " + userId;',
+    "element.innerHTML = html;",
+)
+
+
+def make_patch(lines: int, rng: random.Random) -> str:
+    out = [f"@@ -1,{lines} +1,{lines + lines // 4} @@"]
+    for index in range(lines):
+        if index % 4 == 0:
+            out.append("+" + (rng.choice(ISSUE_LINES) if rng.random() < 0.05 else f"const value{index} = compute({index});"))
+        out.append(f" const unchanged{index} = {index};")
+    return "\n".join(out)
+
+
+def fake_github(args) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(args.seed)
+    patches = [make_patch(args.patch_lines, rng) for _ in range(min(args.files, 50))]
+
+    def headers(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": "1000000",
+            "X-RateLimit-Remaining": "999999",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+            **(extra or {}),
+        }
+
+    def file_patch(index: int) -> str:
+        return patches[index % len(patches)]
+
+    @app.middleware("http")
+    async def count_requests(request: Request, call_next):
+        app.state.requests += 1
+        return await call_next(request)
+    app.state.requests = 0
+
+    @app.get("/repos/{owner}/{repo}/pulls/{number}")
+    async def pull(owner: str, repo: str, number: int, request: Request):
+        await asyncio.sleep(args.github_latency_ms / 1000)
+        if "diff" in request.headers.get("accept", ""):
+            diff = "".join(
+                f"diff --git a/src/module_{index}.js b/src/module_{index}.js\n"
+                f"--- a/src/module_{index}.js\n+++ b/src/module_{index}.js\n{file_patch(index)}\n"
+                for index in range(args.files)
+            )
+            return PlainTextResponse(diff, headers=headers())
+        return JSONResponse({
+            "number": number,
+            "title": f"Benchmark PR {number}",
+            "body": "Generated by benchmarks.load_test",
+            "state": "open",
+            "additions": args.files * args.patch_lines // 4,
+            "deletions": 0,
+            "changed_files": args.files,
+            "user": {"login": "bench"},
+            "created_at": "2024-01-01T00:00:00Z",
+            "head": {"sha": f"bench-{number}-{args.seed}"},
+        }, headers=headers())
+
+    @app.get("/repos/{owner}/{repo}/pulls/{number}/files")
+    async def files(owner: str, repo: str, number: int, page: int = 1, per_page: int = 30):
+        await asyncio.sleep(args.github_latency_ms / 1000)
+        start = (page - 1) * per_page
+        end = min(args.files, start + per_page)
+        body = [
+            {
+                "filename": f"src/module_{index}.js",
+                "status": "modified",
+                "additions": args.patch_lines // 4,
+                "deletions": 0,
+                "sha": f"{index:040d}",
+                "patch": file_patch(index),
+            }
+            for index in range(start, end)
+        ]
+        last_page = max(1, math.ceil(args.files / per_page))
+        extra = {}
+        if last_page > 1:
+            base = f"{args.github_url}/repos/{owner}/{repo}/pulls/{number}/files?per_page={per_page}"
+            extra["Link"] = f'<{base}&page={min(page + 1, last_page)}>; rel="next", <{base}&page={last_page}>; rel="last"'
+        return JSONResponse(body, headers=headers(extra))
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        await asyncio.sleep(args.github_latency_ms / 1000)
+        variables = (await request.json())["variables"]
+        number = variables["number"]
+        start = int(variables.get("after") or 0)
+        end = min(args.files, start + 100)
+        pull_request = {
+            "files": {
+                "pageInfo": {"hasNextPage": end < args.files, "endCursor": str(end)},
+                "nodes": [
+                    {"path": f"src/module_{index}.js", "additions": args.patch_lines // 4, "deletions": 0,
+                     "changeType": "MODIFIED"}
+                    for index in range(start, end)
+                ],
+            },
+        }
+        if start == 0:
+            pull_request.update({
+                "title": f"Benchmark PR {number}",
+                "body": "Generated by benchmarks.load_test",
+                "additions": args.files * args.patch_lines // 4,
+                "deletions": 0,
+                "changedFiles": args.files,
+                "state": "OPEN",
+                "createdAt": "2024-01-01T00:00:00Z",
+                "headRefOid": f"bench-{number}-{args.seed}",
+                "author": {"login": "bench"},
+            })
+        return JSONResponse({"data": {"repository": {"pullRequest": pull_request}}}, headers=headers())
+
+    return app
+
+
+def fake_gemini(args) -> FastAPI:
+    app = FastAPI()
+    text = ("This change looks reasonable overall. " * (args.gemini_response_chars // 38 + 1))[:args.gemini_response_chars]
+
+    def candidate(chunk: str) -> Dict:
+        return {"candidates": [{"content": {"parts": [{"text": chunk}], "role": "model"}}]}
+
+    @app.post("/v1beta/models/{model_action}")
+    async def generate(model_action: str, request: Request):
+        await request.body()
+        if model_action.endswith(":streamGenerateContent"):
+            async def events():
+                chunks = [text[i:i + 200] for i in range(0, len(text), 200)] or [""]
+                await asyncio.sleep(args.gemini_latency_ms / 1000 / 2)
+                for chunk in chunks:
+                    yield f"data: {json.dumps(candidate(chunk))}\r\n\r\n"
+                    await asyncio.sleep(args.gemini_latency_ms / 1000 / 2 / len(chunks))
+            return StreamingResponse(events(), media_type="text/event-stream")
+        await asyncio.sleep(args.gemini_latency_ms / 1000)
+        return JSONResponse(candidate(text))
+
+    @app.post("/v1beta/cachedContents")
+    async def cached_contents():
+        return JSONResponse({"name": "cachedContents/bench"})
+
+    return app
+
+
+def free_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    return sock
+
+
+async def serve_stub(app: FastAPI, sock: socket.socket) -> Tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+def start_app(port: int, github_url: str, gemini_url: str, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "GITHUB_API_URL": github_url,
+        "GEMINI_API_URL": gemini_url,
+        "GEMINI_API_KEY": "benchmark",
+        "GITHUB_TOKEN": "",
+        "DATABASE_URL": "",
+        "HTTP2_ENABLED": "false",
+        **dict(item.split("=", 1) for item in args.app_env),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited during startup with code {process.returncode}")
+        try:
+            if (await client.get("/health/live")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("App did not become ready")
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted ``samples``"""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+
+async def run_scenario(client: httpx.AsyncClient, send: Callable[[int], Awaitable[httpx.Response]],
+                       requests: int, concurrency: int, offset: int = 0) -> Dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await send(offset + index)
+                outcome = None if response.status_code < 400 else str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            if outcome is None:
+                latencies.append(elapsed)
+            else:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": round(percentile(latencies, 0.50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+    }
+
+
+def scenario_requests(client: httpx.AsyncClient, args) -> Dict[str, Callable[[int], Awaitable[httpx.Response]]]:
+    async def analyze(index: int) -> httpx.Response:
+        pr_number = 1 + index % args.distinct_prs if args.distinct_prs else 1 + index
+        return await client.post("/api/github/analyze-pr", json={
+            "pr_url": f"https://github.com/bench/repo/pull/{pr_number}",
+            "repository": "bench/repo",
+            "pr_number": pr_number,
+        })
+
+    async def chat(index: int) -> httpx.Response:
+        return await client.post(f"/api/chat/bench-{index % args.fix_prs}", json={
+            "content": f"Is the change to module_{index % args.files}.js safe to merge?",
+            "bypass_cache": not args.chat_cache,
+        })
+
+    async def chat_stream(index: int) -> httpx.Response:
+        response = await client.post(f"/api/chat/stream/bench-{index % args.fix_prs}", json={
+            "content": f"What is the riskiest hunk in module_{index % args.files}.js?",
+            "bypass_cache": not args.chat_cache,
+        })
+        # Latency covers the whole stream, which ``post`` has already read
+        return response
+
+    async def apply_fix(index: int) -> httpx.Response:
+        return await client.post(f"/api/analysis/apply-fix/bench-{index % args.fix_prs}/fix_001")
+
+    return {"analyze-pr": analyze, "chat": chat, "chat-stream": chat_stream, "apply-fix": apply_fix}
+
+
+async def run(args) -> Dict:
+    github_sock, gemini_sock, app_sock = free_socket(), free_socket(), free_socket()
+    args.github_url = f"http://127.0.0.1:{github_sock.getsockname()[1]}"
+    gemini_url = f"http://127.0.0.1:{gemini_sock.getsockname()[1]}"
+    app_port = app_sock.getsockname()[1]
+    app_sock.close()
+
+    stubs = [await serve_stub(fake_github(args), github_sock), await serve_stub(fake_gemini(args), gemini_sock)]
+    process = start_app(app_port, args.github_url, gemini_url, args)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results: Dict[str, Dict] = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", limits=limits, timeout=120) as client:
+            await wait_until_up(client, process)
+            # Analyses that chat and apply-fix operate on (not measured)
+            for index in range(args.fix_prs):
+                await client.post(f"/api/analysis/pr/bench-{index}")
+
+            requests = scenario_requests(client, args)
+            for name in args.scenarios:
+                if args.warmup:
+                    # Indices past the measured range, so warm-up PRs are not cache hits later
+                    await run_scenario(client, requests[name], args.warmup, args.concurrency, offset=args.requests)
+                results[name] = await run_scenario(client, requests[name], args.requests, args.concurrency)
+                print(format_row(name, results[name]), flush=True)
+
+            metrics = (await client.get("/metrics")).text
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        for server, _ in stubs:
+            server.should_exit = True
+        await asyncio.gather(*(task for _, task in stubs))
+
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "github_url")
+        },
+        "results": results,
+        "stage_seconds": stage_summary(metrics),
+    }
+
+
+def stage_summary(metrics: str) -> Dict[str, Dict[str, float]]:
+    """Mean seconds per pipeline stage, from the app's /metrics"""
+    sums: Dict[str, float] = {}
+    counts: Dict[str, float] = {}
+    for line in metrics.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f"pipeline_stage_duration_seconds{suffix}" + '{stage="'
+            if line.startswith(prefix):
+                stage, value = line[len(prefix):].split('"} ')
+                target[stage] = float(value)
+    return {
+        stage: {"count": counts.get(stage, 0), "mean_s": round(total / counts[stage], 6)}
+        for stage, total in sums.items() if counts.get(stage)
+    }
+
+
+def format_row(name: str, result: Dict) -> str:
+    def ms(value):
+        return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+    errors = sum(result["errors"].values())
+    return (
+        f"{name:<12} {result['requests']:>6} {errors:>6} {result['rps']:>9.1f} "
+        f"{ms(result['p50_ms'])} {ms(result['p95_ms'])} {ms(result['p99_ms'])} {ms(result['max_ms'])}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each scenario")
+    parser.add_argument("--distinct-prs", type=int, default=0,
+                        help="analyze-pr cycles over this many PRs (0 = every request is a new PR)")
+    parser.add_argument("--fix-prs", type=int, default=10, help="Analyses seeded for chat and apply-fix")
+    parser.add_argument("--chat-cache", action="store_true", help="Allow chat response cache hits")
+    parser.add_argument("--files", type=int, default=20, help="Files per fake PR")
+    parser.add_argument("--patch-lines", type=int, default=200, help="Lines per fake patch")
+    parser.add_argument("--github-latency-ms", type=float, default=50)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400)
+    parser.add_argument("--gemini-response-chars", type=int, default=1500)
+    parser.add_argument("--app-env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="Extra settings for the app process, e.g. ANALYSIS_EXECUTION_MODE=thread")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_results.json")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as out:
+        json.dump(report, out, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Replay recorded GitHub webhook deliveries against the webhook receiver.
+
+Recordings are NDJSON, one delivery per line, either as
+``{"event": "pull_request", "delivery": "<id>", "payload": {...}}`` or as a
+bare ``pull_request`` payload. Without recordings, ``--synthesize`` generates
+bursts of ``synchronize`` pushes spread over a few PRs, which is the traffic
+the debounce exists for. Each delivery is signed with the webhook secret and
+sent at a fixed rate; the receiver's webhook counters are printed afterwards.
+
+Usage (from backend/, with the API running and GITHUB_WEBHOOK_SECRET set):
+    python -m benchmarks.replay_webhooks recorded.ndjson --rate 50
+    python -m benchmarks.replay_webhooks --synthesize 500 --prs 10 --rate 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+
+def load_recordings(path: str) -> List[Dict]:
+    deliveries = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "payload" not in record:
+                record = {"event": "pull_request", "payload": record}
+            deliveries.append(record)
+    return deliveries
+
+
+def synthesize(count: int, prs: int, repository: str, rng: random.Random) -> List[Dict]:
+    """An ``opened`` per PR, then ``synchronize`` pushes to random PRs"""
+    deliveries = []
+    for index in range(count):
+        number = index + 1 if index < prs else rng.randint(1, prs)
+        deliveries.append({
+            "event": "pull_request",
+            "payload": {
+                "action": "opened" if index < prs else "synchronize",
+                "number": number,
+                "pull_request": {"number": number, "head": {"sha": uuid.uuid4().hex + uuid.uuid4().hex[:8]}},
+                "repository": {"full_name": repository},
+            },
+        })
+    return deliveries
+
+
+def sign(secret: bytes, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def replay(args, deliveries: List[Dict]):
+    secret = args.secret.encode()
+    url = args.url.rstrip("/") + "/api/github/webhook"
+    semaphore = asyncio.Semaphore(args.concurrency)
+    statuses: Dict[str, int] = {}
+    latencies: List[float] = []
+
+    async def send(client: httpx.AsyncClient, delivery: Dict):
+        body = json.dumps(delivery["payload"]).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": delivery.get("event", "pull_request"),
+            "X-GitHub-Delivery": delivery.get("delivery") or str(uuid.uuid4()),
+            "X-Hub-Signature-256": sign(secret, body),
+        }
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, content=body, headers=headers)
+                outcome = response.json().get("status", str(response.status_code)) if response.is_success \
+                    else f"http_{response.status_code}"
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+        statuses[outcome] = statuses.get(outcome, 0) + 1
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        interval = 1.0 / args.rate if args.rate > 0 else 0.0
+        started = time.perf_counter()
+        tasks = []
+        for index, delivery in enumerate(deliveries):
+            # Fixed schedule, so a slow response does not lower the offered rate
+            delay = started + index * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client, delivery)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        print(f"sent {len(deliveries)} deliveries in {elapsed:.2f}s ({len(deliveries) / elapsed:.1f}/s)")
+        print("outcomes: " + ", ".join(f"{name}={count}" for name, count in sorted(statuses.items())))
+        print(
+            f"latency ms: p50={percentile(latencies, 0.5) * 1000:.1f} "
+            f"p95={percentile(latencies, 0.95) * 1000:.1f} p99={percentile(latencies, 0.99) * 1000:.1f}"
+        )
+
+        if args.wait:
+            await asyncio.sleep(args.wait)
+        try:
+            health = (await client.get(args.url.rstrip("/") + "/health/jobs")).json()
+            print("webhooks: " + json.dumps(health.get("webhooks", {})))
+            print("jobs: " + json.dumps(health.get("jobs", {})))
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"could not read /health/jobs: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recordings", nargs="?", help="NDJSON file of recorded deliveries")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--secret", default=os.getenv("GITHUB_WEBHOOK_SECRET", ""))
+    parser.add_argument("--rate", type=float, default=20.0, help="Deliveries per second (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--synthesize", type=int, default=0, help="Generate this many deliveries instead")
+    parser.add_argument("--prs", type=int, default=5, help="Distinct PRs in synthesized traffic")
+    parser.add_argument("--repository", default="bench/repo")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the recordings this many times")
+    parser.add_argument("--wait", type=float, default=0.0, help="Seconds to wait before reading receiver stats")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not args.secret:
+        sys.exit("Set --secret or GITHUB_WEBHOOK_SECRET to the receiver's secret")
+    if args.synthesize:
+        deliveries = synthesize(args.synthesize, args.prs, args.repository, random.Random(args.seed))
+    elif args.recordings:
+        # Repeats get fresh delivery ids unless the recording pinned them
+        deliveries = load_recordings(args.recordings) * args.repeat
+    else:
+        sys.exit("Pass a recordings file or --synthesize N")
+    asyncio.run(replay(args, deliveries))
+
+
+if __name__ == "__main__":
+    main()
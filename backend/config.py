@@ -1,7 +1,11 @@
+import json
+import logging
 import os
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # Load variables from .env into environment
 load_dotenv()
 
@@ -20,6 +24,111 @@ class Settings:
 
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
 
+    # Upstream endpoints
+    GITHUB_API_URL: str = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+    # GitHub Enterprise serves GraphQL at /api/graphql next to /api/v3
+    GITHUB_GRAPHQL_URL: str = os.getenv("GITHUB_GRAPHQL_URL", GITHUB_API_URL.removesuffix("/v3") + "/graphql")
+    GEMINI_API_URL: str = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com").rstrip("/")
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest")
+
+    # Approximate token budget for the code diff section of chat prompts
+    CHAT_DIFF_TOKEN_BUDGET: int = int(os.getenv("CHAT_DIFF_TOKEN_BUDGET", "6000"))
+
+    # Cache of Gemini answers per (question, mentor, analysis, model params)
+    CHAT_CACHE_SIZE: int = int(os.getenv("CHAT_CACHE_SIZE", "1000"))
+    CHAT_CACHE_TTL: float = float(os.getenv("CHAT_CACHE_TTL", "1800"))
+
+    # Multi-turn chat: recent turns sent verbatim, older ones folded into a summary
+    CHAT_HISTORY_WINDOW: int = int(os.getenv("CHAT_HISTORY_WINDOW", "4"))
+    CHAT_SUMMARY_CHARS: int = int(os.getenv("CHAT_SUMMARY_CHARS", "2000"))
+    CHAT_SESSION_TTL: float = float(os.getenv("CHAT_SESSION_TTL", "3600"))
+    # Gemini cachedContents for large PR contexts. Caches are created for
+    # GEMINI_MODEL, which every chat turn uses; they need a versioned model
+    # (e.g. gemini-1.5-flash-001), so with a "-latest" alias follow-ups send
+    # a condensed context instead.
+    CHAT_CONTEXT_CACHE_MIN_TOKENS: int = int(os.getenv("CHAT_CONTEXT_CACHE_MIN_TOKENS", "32768"))
+    CHAT_CONTEXT_CACHE_MAX_TOKENS: int = int(os.getenv("CHAT_CONTEXT_CACHE_MAX_TOKENS", "200000"))
+    CHAT_CONTEXT_CACHE_TTL: int = int(os.getenv("CHAT_CONTEXT_CACHE_TTL", "600"))
+
+    # Shared HTTP connection pools (limits are per upstream host)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+    # PR fetch backend: "rest" (PR + paginated files) or "graphql" (metadata and file list in
+    # one query, then one diff request for patches; needs a token, falls back to REST without)
+    GITHUB_FETCH_BACKEND: str = os.getenv("GITHUB_FETCH_BACKEND", "rest")
+
+    # Keep fetched patches zlib-compressed and decode them on use; per PR, compressed
+    # patches past the memory cap go to a temp file
+    LAZY_PATCHES: bool = os.getenv("LAZY_PATCHES", "true").lower() == "true"
+    PATCH_MEMORY_MAX_BYTES: int = int(os.getenv("PATCH_MEMORY_MAX_BYTES", str(8 * 1024 * 1024)))
+
+    # Concurrent page fetches for large PR file lists
+    GITHUB_FILES_CONCURRENCY: int = int(os.getenv("GITHUB_FILES_CONCURRENCY", "4"))
+
+    # GitHub request pacing per token (token bucket) and rate-limit retries
+    GITHUB_RATE_BURST: int = int(os.getenv("GITHUB_RATE_BURST", "30"))
+    GITHUB_MAX_REQUESTS_PER_SECOND: float = float(os.getenv("GITHUB_MAX_REQUESTS_PER_SECOND", "10"))
+    # Below this fraction of the hourly limit, spread the rest evenly until reset
+    GITHUB_RATE_PACE_BELOW: float = float(os.getenv("GITHUB_RATE_PACE_BELOW", "0.2"))
+    GITHUB_RETRY_MAX_ATTEMPTS: int = int(os.getenv("GITHUB_RETRY_MAX_ATTEMPTS", "3"))
+    GITHUB_RETRY_BASE_DELAY: float = float(os.getenv("GITHUB_RETRY_BASE_DELAY", "1.0"))
+    GITHUB_RETRY_MAX_DELAY: float = float(os.getenv("GITHUB_RETRY_MAX_DELAY", "60"))
+    # Longer waits fail fast with a rate-limit error instead of holding the request
+    GITHUB_RATE_LIMIT_MAX_WAIT: float = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "60"))
+
+    # Batch analysis: PRs analysed at once, PR cap per batch, and GitHub requests
+    # left untouched per token so interactive analyses still have quota
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_MAX_PRS: int = int(os.getenv("BATCH_MAX_PRS", "500"))
+    BATCH_RATE_LIMIT_RESERVE: int = int(os.getenv("BATCH_RATE_LIMIT_RESERVE", "100"))
+
+    # Background analysis jobs; the SQLite queue (DATABASE_URL) survives restarts
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_PERSISTENT: bool = os.getenv("JOB_QUEUE_PERSISTENT", "false").lower() == "true"
+    JOB_MAX_JOBS: int = int(os.getenv("JOB_MAX_JOBS", "1000"))
+    JOB_TTL: float = float(os.getenv("JOB_TTL", "86400"))
+    # Hosts job callback_urls may point at (a leading "." allows subdomains); empty
+    # disables callbacks. Hosts resolving to private or loopback addresses are refused
+    JOB_CALLBACK_ALLOWED_HOSTS: List[str] = [
+        host.strip().lower() for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+    ]
+
+    # GitHub pull_request webhooks: HMAC secret (unset disables the receiver), and how
+    # long a PR must be quiet before its analysis is queued, capped at the max delay
+    GITHUB_WEBHOOK_SECRET: str = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    WEBHOOK_DEBOUNCE_SECONDS: float = float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "10"))
+    WEBHOOK_MAX_DELAY_SECONDS: float = float(os.getenv("WEBHOOK_MAX_DELAY_SECONDS", "60"))
+
+    # ETag/Last-Modified cache for GitHub GET responses (0 disables)
+    GITHUB_ETAG_CACHE_SIZE: int = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "512"))
+
+    # Finished analyses keyed by PR head SHA (disk tier uses DATABASE_URL when it is sqlite)
+    ANALYSIS_CACHE_SIZE: int = int(os.getenv("ANALYSIS_CACHE_SIZE", "256"))
+    ANALYSIS_CACHE_TTL: float = float(os.getenv("ANALYSIS_CACHE_TTL", "3600"))
+
+    # Per-file issue/risk results reused when a new push leaves a file's patch unchanged
+    FILE_ANALYSIS_CACHE_SIZE: int = int(os.getenv("FILE_ANALYSIS_CACHE_SIZE", "20000"))
+
+    # Overrides for the risk model weights, as JSON (e.g. '{"security_path": 20}')
+    RISK_WEIGHTS: Dict[str, float] = json.loads(os.getenv("RISK_WEIGHTS", "{}"))
+
+    # Per-stage analysis timeouts in seconds, as JSON (e.g. '{"issues": 300}'); a
+    # stage that times out or fails contributes its fallback result instead
+    ANALYSIS_STAGE_TIMEOUTS: Dict[str, float] = json.loads(os.getenv("ANALYSIS_STAGE_TIMEOUTS", "{}"))
+
+    # Memory cap for the analysis store's LRU tier (SQLite tier uses DATABASE_URL)
+    ANALYSIS_STORE_MAX_BYTES: int = int(os.getenv("ANALYSIS_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Where issue detection runs: "auto" picks inline / thread / process by total patch size
+    ANALYSIS_EXECUTION_MODE: str = os.getenv("ANALYSIS_EXECUTION_MODE", "auto")
+    ANALYSIS_INLINE_MAX_BYTES: int = int(os.getenv("ANALYSIS_INLINE_MAX_BYTES", str(64 * 1024)))
+    ANALYSIS_PROCESS_MIN_BYTES: int = int(os.getenv("ANALYSIS_PROCESS_MIN_BYTES", str(2 * 1024 * 1024)))
+    ANALYSIS_CHUNK_BYTES: int = int(os.getenv("ANALYSIS_CHUNK_BYTES", str(512 * 1024)))
+    ANALYSIS_MAX_WORKERS: int = int(os.getenv("ANALYSIS_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
     @property
     def has_github_token(self) -> bool:
         return bool(self.GITHUB_TOKEN)
@@ -30,6 +139,4 @@ class Settings:
 
 settings = Settings()
 
-# Debug prints
-print(f"GEMINI_API_KEY loaded: {bool(settings.GEMINI_API_KEY)}")
-print(f"GITHUB_TOKEN loaded: {bool(settings.GITHUB_TOKEN)}")
\ No newline at end of file
+logger.info(f"GEMINI_API_KEY loaded: {settings.has_gemini_key}, GITHUB_TOKEN loaded: {settings.has_github_token}")
\ No newline at end of file
@@ -1,5 +1,7 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 from dotenv import load_dotenv
 import os
@@ -8,13 +10,35 @@ from datetime import datetime
 # Load .env before anything else
 load_dotenv()
 
-from api.routes import analysis, chat, github, health
+from api.middleware import MetricsMiddleware
+from api.routes import analysis, chat, github, health, metrics
 from config import settings
+from models.analysis import AnalysisResponse
+from services.analysis_executor import analysis_executor
+from services.analysis_store import analysis_store
+from services.http_client import http_clients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled upstream clients are shared by every service for the app's lifetime
+    app.state.http_clients = http_clients
+    await seed_demo_data()
+    await github.job_queue.start()
+    yield
+    await github.webhook_service.stop()
+    await github.job_queue.stop()
+    await http_clients.aclose()
+    analysis_executor.shutdown()
+    analysis_store.close()
+
 
 app = FastAPI(
     title="PR Review Agent API",
     version="2.0.0",
-    description="AI-powered Pull Request Review with GitHub integration"
+    description="AI-powered Pull Request Review with GitHub integration",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Allowed frontend origins
@@ -30,6 +54,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 # Include routers
@@ -37,13 +62,11 @@ app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(github.router, prefix="/api/github", tags=["github"])
+app.include_router(metrics.router, tags=["metrics"])
 
-# In-memory storage for demo PRs
-analyses_storage = {}
-
-def seed_demo_data():
+async def seed_demo_data():
     """Seed demo PR #123 and sample repo-based PRs."""
-    analyses_storage["123"] = {
+    demo_pr = {
         "pr_id": "123",
         "title": "Add user authentication system",
         "repository": "demo/repo",
@@ -60,7 +83,7 @@ def seed_demo_data():
         ],
         "auto_fixes": [
             {
-                "id": 1,
+                "id": "fix_001",
                 "description": "Hash passwords",
                 "confidence": 0.9,
                 "diff": "+ hashed_password = hash(password)\n- password = '1234'",
@@ -81,20 +104,19 @@ def seed_demo_data():
             ]
         }
     }
+    await analysis_store.put("123", AnalysisResponse(**demo_pr))
 
     # Sample repo-based PR
-    analyses_storage["facebook/react-24652"] = {
-        **analyses_storage["123"],
+    await analysis_store.put("facebook/react-24652", AnalysisResponse(**{
+        **demo_pr,
         "pr_id": "facebook/react-24652",
         "repository": "facebook/react",
         "title": "Fix React bug #24652"
-    }
-
-seed_demo_data()
+    }))
 
 @app.get("/api/analysis/demo/{pr_id}")
 async def get_demo_data(pr_id: str):
-    pr_data = analyses_storage.get(pr_id)
+    pr_data = await analysis_store.get(pr_id)
     if not pr_data:
         return {"error": "Demo PR not found"}, 404
     return pr_data
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
+from models.github import GitHubFile
 
 class Issue(BaseModel):
     type: str
@@ -24,6 +25,13 @@ class TimeachineData(BaseModel):
     performance_regression: float
     predicted_issues: List[str]
 
+class PipelineStage(BaseModel):
+    stage: str
+    status: str  # ok, timeout or error (the last two mean the stage's fallback was used)
+    depends_on: List[str] = []
+    started_ms: float
+    duration_ms: float
+
 class AnalysisResponse(BaseModel):
     pr_id: str
     title: str
@@ -35,4 +43,14 @@ class AnalysisResponse(BaseModel):
     auto_fixes: List[AutoFix]
     analysis_time: float
     github_authenticated: Optional[bool] = False
-    created_at: datetime = datetime.utcnow()
\ No newline at end of file
+    cached: Optional[bool] = False
+    # Share of changed files whose per-file results were reused from an earlier push
+    reuse_ratio: Optional[float] = None
+    files_rescanned: Optional[int] = None
+    # Process RSS high-water mark while this analysis ran
+    peak_rss_mb: Optional[float] = None
+    # Per-stage timings and outcomes of the analysis pipeline
+    pipeline: List[PipelineStage] = []
+    created_at: datetime = datetime.utcnow()
+    # Changed files with patches, kept for chat prompts; never sent to API clients
+    files: List[GitHubFile] = Field(default_factory=list, exclude=True)
\ No newline at end of file
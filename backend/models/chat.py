@@ -6,11 +6,16 @@ from typing import Optional
 class ChatRequest(BaseModel):
     content: str
     mentor_mode: str = "balanced"
+    bypass_cache: bool = False
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
     timestamp: datetime
     mentor_name: str
+    prompt_tokens_saved: Optional[int] = None
+    cached: Optional[bool] = False
+    session_id: Optional[str] = None
 
 class ChatMessage(BaseModel):
     role: str  # user, assistant, system
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, PrivateAttr, model_serializer
+from typing import Dict, List, Optional
+from utils.diff_parser import PatchIndex, parse_patch
+from utils.patch_store import LazyFile
 
 class PRRequest(BaseModel):
     pr_url: str
@@ -8,9 +10,54 @@ class PRRequest(BaseModel):
     title: Optional[str] = ""
     github_token: Optional[str] = None
 
+class AnalysisJobRequest(PRRequest):
+    # POSTed the finished job (status, result or error) when set
+    callback_url: Optional[str] = None
+
+class BatchPRTarget(BaseModel):
+    repository: str
+    pr_number: int
+
+class BatchAnalysisRequest(BaseModel):
+    # Either a repository whose PRs are listed, or explicit repository/PR pairs
+    repository: Optional[str] = None
+    pull_requests: List[BatchPRTarget] = []
+    state: str = "open"
+    max_prs: Optional[int] = None
+    concurrency: Optional[int] = None
+    github_token: Optional[str] = None
+
 class GitHubFile(BaseModel):
     filename: str
     patch: Optional[str] = ""
     additions: int = 0
     deletions: int = 0
-    status: str = "modified"
\ No newline at end of file
+    status: str = "modified"
+    # Large PRs: the patch stays compressed in the PR's patch store until dumped or read
+    _lazy: Optional[LazyFile] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_lazy(cls, file_info: LazyFile) -> "GitHubFile":
+        github_file = cls(
+            filename=file_info.get("filename", ""),
+            patch=None,
+            additions=file_info.get("additions", 0),
+            deletions=file_info.get("deletions", 0),
+            status=file_info.get("status", "modified")
+        )
+        github_file._lazy = file_info
+        return github_file
+
+    def get_patch(self) -> str:
+        return self._lazy["patch"] if self._lazy is not None else self.patch or ""
+
+    @model_serializer(mode="wrap")
+    def _dump_patch(self, handler) -> Dict:
+        data = handler(self)
+        if self._lazy is not None and "patch" in data:
+            data["patch"] = self._lazy["patch"]
+        return data
+
+    def patch_index(self) -> PatchIndex:
+        """Hunk/line offset index over this file's patch"""
+        return parse_patch(self.get_patch(), self.filename)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from config import settings
+from models.analysis import Issue
+from utils.code_analyzer import CodeAnalyzer
+from utils.patch_store import patch_size
+from utils.risk_calculator import RiskCalculator
+from utils.rule_engine import Rule
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("auto", "inline", "thread", "process")
+
+# Per-process analyzer, built once by the pool initializer
+_worker_analyzer: Optional[CodeAnalyzer] = None
+
+
+def _init_worker(rules: List[Rule]):
+    global _worker_analyzer
+    _worker_analyzer = CodeAnalyzer(rules)
+
+
+def _scan_chunk(files: List[Dict]) -> List[Issue]:
+    """Process-pool entry point"""
+    return _worker_analyzer.scan_files(files)
+
+
+class AnalysisExecutor:
+    """Runs CPU-bound analysis off the event loop.
+
+    Small PRs are scanned inline (a thread hop would cost more than the scan),
+    medium ones in a thread, and large ones are split into byte-balanced
+    chunks scanned in a process pool. Chunks keep the PR's file order, so the
+    merged issue list is identical to a sequential scan.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        inline_max_bytes: Optional[int] = None,
+        process_min_bytes: Optional[int] = None,
+        chunk_bytes: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.mode = (mode or settings.ANALYSIS_EXECUTION_MODE).lower()
+        if self.mode not in EXECUTION_MODES:
+            logger.warning(f"Unknown ANALYSIS_EXECUTION_MODE '{self.mode}', using 'auto'")
+            self.mode = "auto"
+        self.inline_max_bytes = inline_max_bytes if inline_max_bytes is not None else settings.ANALYSIS_INLINE_MAX_BYTES
+        self.process_min_bytes = process_min_bytes if process_min_bytes is not None else settings.ANALYSIS_PROCESS_MIN_BYTES
+        self.chunk_bytes = chunk_bytes or settings.ANALYSIS_CHUNK_BYTES
+        self.max_workers = max_workers or settings.ANALYSIS_MAX_WORKERS
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_rules: Optional[List[Rule]] = None
+        self.runs = {"inline": 0, "thread": 0, "process": 0}
+        self.chunks = 0
+
+    def _select_mode(self, total_bytes: int) -> str:
+        if self.mode != "auto":
+            return self.mode
+        if total_bytes <= self.inline_max_bytes:
+            return "inline"
+        if total_bytes < self.process_min_bytes:
+            return "thread"
+        return "process"
+
+    async def detect_issues(self, analyzer: CodeAnalyzer, files: List[Dict]) -> List[Issue]:
+        """Equivalent to ``analyzer.detect_issues(files)`` without blocking the loop"""
+        return analyzer.with_fallback(await self.scan_files(analyzer, files))
+
+    async def scan_files(self, analyzer: CodeAnalyzer, files: List[Dict]) -> List[Issue]:
+        """Equivalent to ``analyzer.scan_files(files)`` without blocking the loop.
+
+        Patches are decoded a chunk at a time right before that chunk is
+        scanned, so lazily loaded PRs never hold every patch as a string.
+        """
+        if not files:
+            return []
+        sizes = [patch_size(file_info) for file_info in files]
+        mode = self._select_mode(sum(sizes))
+        self.runs[mode] += 1
+
+        if mode == "process":
+            return await self._scan_in_processes(analyzer, files, sizes)
+        issues: List[Issue] = []
+        for chunk in self._chunk(files, sizes):
+            if mode == "inline":
+                issues += analyzer.scan_files(self._scan_input(chunk))
+            else:
+                issues += await asyncio.to_thread(analyzer.scan_files, self._scan_input(chunk))
+        return issues
+
+    async def calculate_risk(self, calculator: RiskCalculator, pr_data: Dict,
+                             contributions: Optional[List[Dict]] = None) -> float:
+        # Scoring only reads PR metadata, so it stays inline unless a pool mode is forced
+        if self.mode in ("auto", "inline"):
+            return calculator.calculate_risk(pr_data, contributions)
+        return await asyncio.to_thread(calculator.calculate_risk, pr_data, contributions)
+
+    async def _scan_in_processes(self, analyzer: CodeAnalyzer, files: List[Dict], sizes: List[int]) -> List[Issue]:
+        chunks = self._chunk(files, sizes)
+        self.chunks += len(chunks)
+        pool = self._get_pool(analyzer.ruleset.rules)
+        loop = asyncio.get_running_loop()
+        # One decoded chunk per worker at a time
+        slots = asyncio.Semaphore(self.max_workers)
+
+        async def scan(chunk: List[Dict]) -> List[Issue]:
+            async with slots:
+                return await loop.run_in_executor(pool, _scan_chunk, self._scan_input(chunk))
+
+        results = await asyncio.gather(*(scan(chunk) for chunk in chunks))
+        return [issue for chunk_issues in results for issue in chunk_issues]
+
+    def _scan_input(self, files: List[Dict]) -> List[Dict]:
+        # Only what the scanner needs crosses thread/process boundaries
+        return [
+            {"filename": file_info.get("filename", ""), "patch": file_info.get("patch") or ""}
+            for file_info in files
+        ]
+
+    def _chunk(self, files: List[Dict], sizes: List[int]) -> List[List[Dict]]:
+        """Contiguous, roughly chunk_bytes-sized groups of files"""
+        chunks: List[List[Dict]] = []
+        current: List[Dict] = []
+        current_bytes = 0
+        for file_info, size in zip(files, sizes):
+            if current and current_bytes + size > self.chunk_bytes:
+                chunks.append(current)
+                current, current_bytes = [], 0
+            current.append(file_info)
+            current_bytes += size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _get_pool(self, rules: List[Rule]) -> ProcessPoolExecutor:
+        if self._pool is not None and self._pool_rules != rules:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(rules,)
+            )
+            self._pool_rules = list(rules)
+            logger.info(f"Started analysis process pool with {self.max_workers} workers")
+        return self._pool
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "inline_max_bytes": self.inline_max_bytes,
+            "process_min_bytes": self.process_min_bytes,
+            "max_workers": self.max_workers,
+            "runs": dict(self.runs),
+            "process_chunks": self.chunks,
+            "process_pool_started": self._pool is not None,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+# Shared executor; shut down by the FastAPI lifespan in main.py
+analysis_executor = AnalysisExecutor()
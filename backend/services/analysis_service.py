@@ -1,48 +1,215 @@
 import asyncio
-import random
+import math
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, List, Dict, NamedTuple, Optional, Tuple
+from config import settings
 from models.analysis import Issue, AutoFix, TimeachineData, AnalysisResponse
-from utils.risk_calculator import RiskCalculator
+from models.github import GitHubFile
+from services.analysis_executor import AnalysisExecutor, analysis_executor as default_executor
+from services.file_analysis_cache import FileAnalysis, FileAnalysisCache
+from services.metrics import ANALYSIS_PEAK_RSS, STAGE_SECONDS
+from services.result_cache import AnalysisResultCache
+from utils.risk_calculator import PR_FEATURES, RiskCalculator
 from utils.code_analyzer import CodeAnalyzer
+from utils.memory import PeakRSS
+from utils.patch_store import LazyFile
+from utils.pipeline import Pipeline, Stage
+from utils.single_flight import SingleFlight
+
+# Bump whenever detection or scoring logic changes so cached results are not reused
+ANALYZER_VERSION = "2.3.0"
+
+# Seconds each pipeline stage may run before its fallback is used; ANALYSIS_STAGE_TIMEOUTS overrides
+STAGE_TIMEOUTS: Dict[str, float] = {"issues": 120.0, "time_machine": 10.0, "risk": 30.0, "auto_fixes": 10.0}
+# Mid-scale, so a PR that could not be scored is flagged for review rather than passed
+FALLBACK_RISK_SCORE = 50.0
+NO_PREDICTION = TimeachineData(
+    bug_likelihood=0.0, maintainability_impact=0, performance_regression=0.0, predicted_issues=[]
+)
+
+
+class IssueScan(NamedTuple):
+    issues: List[Issue]
+    # Per-file results in file order; None when issue detection fell back
+    file_results: Optional[List[FileAnalysis]]
+    files_rescanned: int
+
 
 class AnalysisService:
-    def __init__(self):
-        self.risk_calculator = RiskCalculator()
+    def __init__(self, result_cache: Optional[AnalysisResultCache] = None,
+                 executor: Optional[AnalysisExecutor] = None,
+                 file_cache: Optional[FileAnalysisCache] = None):
+        self.risk_calculator = RiskCalculator(settings.RISK_WEIGHTS)
         self.code_analyzer = CodeAnalyzer()
+        self.executor = executor or default_executor
+        self.result_cache = result_cache or AnalysisResultCache(
+            max_entries=settings.ANALYSIS_CACHE_SIZE,
+            ttl=settings.ANALYSIS_CACHE_TTL,
+            database_url=settings.DATABASE_URL
+        )
+        self.file_cache = file_cache or FileAnalysisCache(settings.FILE_ANALYSIS_CACHE_SIZE)
+        self.single_flight = SingleFlight()
     
-    async def analyze_pr(self, pr_id: str, pr_data: Dict, repository: str = "") -> AnalysisResponse:
-        """Main PR analysis orchestrator"""
+    async def analyze_pr(self, pr_id: str, pr_data: Dict, repository: str = "",
+                         on_stage: Optional[Callable[[str], None]] = None) -> AnalysisResponse:
+        """Main PR analysis orchestrator
+
+        ``on_stage`` is called with each stage name as it starts. Callers that
+        coalesce onto an analysis already in flight get no stage callbacks.
+        """
+        on_stage = on_stage or (lambda stage: None)
+        cache_key = self._cache_key(repository, pr_data)
+        if not cache_key:
+            return await self._run_analysis(pr_id, pr_data, repository, on_stage)
+
+        # Concurrent requests for the same head SHA share one analysis; each
+        # caller gets its own copy since routes mutate the response
+        analysis = await self.single_flight.do(
+            cache_key,
+            lambda: self._cached_analysis(cache_key, pr_id, pr_data, repository, on_stage)
+        )
+        return analysis.model_copy(deep=True)
+
+    async def _cached_analysis(self, cache_key: str, pr_id: str, pr_data: Dict, repository: str,
+                               on_stage: Callable[[str], None]) -> AnalysisResponse:
+        cached = await self.result_cache.get(cache_key)
+        if cached is not None:
+            on_stage("cache_hit")
+            cached.cached = True
+            # Cached entries carry no patches; the head SHA pins the same files
+            cached.files = self._changed_files(pr_data)
+            return cached
+
+        analysis = await self._run_analysis(pr_id, pr_data, repository, on_stage)
+        # Partial results (a stage fell back) are not pinned to the head SHA
+        if all(stage.status == "ok" for stage in analysis.pipeline):
+            await self.result_cache.set(cache_key, analysis)
+        return analysis
+
+    def _cache_key(self, repository: str, pr_data: Dict) -> Optional[str]:
+        """(repository, PR number, head SHA, analyzer + ruleset + risk weights version), or None when the PR can't be pinned"""
+        pr_number = pr_data.get("pr_number")
+        head_sha = pr_data.get("head_sha")
+        if not (repository and pr_number and head_sha):
+            return None
+        return f"{repository}#{pr_number}@{head_sha}:{ANALYZER_VERSION}-{self.code_analyzer.ruleset.version}-{self.risk_calculator.version}"
+
+    async def _run_analysis(self, pr_id: str, pr_data: Dict, repository: str,
+                            on_stage: Callable[[str], None] = lambda stage: None) -> AnalysisResponse:
         analysis_start = datetime.now()
-        
-        # Simulate analysis time
-        await asyncio.sleep(1.5)
-        
-        # Calculate risk score
-        risk_score = self.risk_calculator.calculate_risk(pr_data)
-        risk_level = self._get_risk_level(risk_score)
-        
-        # Analyze code issues
-        issues = self.code_analyzer.detect_issues(pr_data.get("files", []))
-        
-        # Generate auto-fixes
-        auto_fixes = self._generate_auto_fixes(issues)
-        
-        # Generate time machine predictions
-        time_machine = self._generate_time_machine_predictions(pr_data, risk_score)
+        rss = PeakRSS()
+
+        def start(stage: str):
+            on_stage(stage)
+            rss.sample()
+
+        results, trace = await self._pipeline(pr_data).run(start)
+        for entry in trace:
+            STAGE_SECONDS.observe(entry["duration_ms"] / 1000, (entry["stage"],))
+        scan: IssueScan = results["issues"]
+        risk_score = results["risk"]
         
         analysis_duration = (datetime.now() - analysis_start).total_seconds()
+        files = self._changed_files(pr_data)
+        peak_rss = rss.finish()
+        ANALYSIS_PEAK_RSS.observe(peak_rss)
         
         return AnalysisResponse(
             pr_id=pr_id,
             title=pr_data.get("title", "Unknown PR"),
             repository=repository,
             risk_score=risk_score,
-            risk_level=risk_level,
-            time_machine=time_machine,
-            issues=issues,
-            auto_fixes=auto_fixes,
-            analysis_time=analysis_duration
+            risk_level=self._get_risk_level(risk_score),
+            time_machine=results["time_machine"],
+            issues=scan.issues,
+            auto_fixes=results["auto_fixes"],
+            analysis_time=analysis_duration,
+            files_rescanned=scan.files_rescanned,
+            reuse_ratio=round(1 - scan.files_rescanned / len(scan.file_results), 4) if scan.file_results else None,
+            peak_rss_mb=round(peak_rss / (1024 * 1024), 1),
+            pipeline=trace,
+            files=files
+        )
+
+    def _pipeline(self, pr_data: Dict) -> Pipeline:
+        """Analysis stages: issues and time_machine start together; risk and auto_fixes follow issues
+
+        Every stage's work runs off the event loop (executor or thread), so
+        other requests keep being served and stage timeouts can fire.
+        """
+        timeouts = {**STAGE_TIMEOUTS, **settings.ANALYSIS_STAGE_TIMEOUTS}
+        return Pipeline([
+            Stage("issues", lambda results: self._detect_issues(pr_data.get("files", [])),
+                  lambda results: IssueScan([], None, 0), timeout=timeouts.get("issues")),
+            Stage("time_machine", lambda results: asyncio.to_thread(self._generate_time_machine_predictions, pr_data),
+                  lambda results: NO_PREDICTION.model_copy(), timeout=timeouts.get("time_machine")),
+            Stage("risk", lambda results: self._score_risk(pr_data, results["issues"]),
+                  lambda results: FALLBACK_RISK_SCORE, ("issues",), timeouts.get("risk")),
+            Stage("auto_fixes", lambda results: asyncio.to_thread(self._generate_auto_fixes, results["issues"].issues),
+                  lambda results: [], ("issues",), timeouts.get("auto_fixes")),
+        ])
+
+    async def _detect_issues(self, files: List[Dict]) -> IssueScan:
+        """Analyze code issues, re-scanning only files whose patch changed"""
+        file_results, files_rescanned = await self._analyze_files(files)
+        issues = self.code_analyzer.with_fallback([issue for result in file_results for issue in result.issues])
+        return IssueScan(issues, file_results, files_rescanned)
+
+    async def _score_risk(self, pr_data: Dict, scan: IssueScan) -> float:
+        """Risk score from the per-file contributions, or from file metadata alone if issue detection fell back"""
+        contributions = [result.risk for result in scan.file_results] if scan.file_results is not None else None
+        return await self.executor.calculate_risk(self.risk_calculator, pr_data, contributions)
+
+    async def _analyze_files(self, files: List[Dict]) -> Tuple[List[FileAnalysis], int]:
+        """Per-file issues and risk inputs in file order, plus how many files had to be scanned"""
+        ruleset_version = self.code_analyzer.ruleset.version
+        # Hashing patches and computing risk features scale with the PR, so both run off the event loop
+        keys = await asyncio.to_thread(
+            lambda: [self.file_cache.key(file_info, ruleset_version) for file_info in files]
+        )
+        results: List[Optional[FileAnalysis]] = [self.file_cache.get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+
+        scanned = await self.executor.scan_files(self.code_analyzer, [files[index] for index in missing])
+        issues_by_file: Dict[str, List[Issue]] = {}
+        for issue in scanned:
+            issues_by_file.setdefault(issue.file, []).append(issue)
+
+        def file_results() -> List[FileAnalysis]:
+            analyses = []
+            for index in missing:
+                file_info = files[index]
+                file_issues = issues_by_file.get(file_info.get("filename", ""), [])
+                analyses.append(FileAnalysis(
+                    issues=file_issues,
+                    risk=self.risk_calculator.file_contribution(file_info, file_issues)
+                ))
+            return analyses
+
+        for index, result in zip(missing, await asyncio.to_thread(file_results)):
+            self.file_cache.set(keys[index], result)
+            results[index] = result
+
+        self.file_cache.reused += len(files) - len(missing)
+        self.file_cache.rescanned += len(missing)
+        # Cached entries are shared between analyses
+        return [
+            FileAnalysis([issue.model_copy() for issue in result.issues], result.risk) for result in results
+        ], len(missing)
+
+    def _changed_files(self, pr_data: Dict) -> List[GitHubFile]:
+        return [self._github_file(file_info) for file_info in pr_data.get("files", [])]
+
+    def _github_file(self, file_info: Dict) -> GitHubFile:
+        # Lazy files keep their patch compressed until the analysis is stored
+        if isinstance(file_info, LazyFile):
+            return GitHubFile.from_lazy(file_info)
+        return GitHubFile(
+            filename=file_info.get("filename", ""),
+            patch=file_info.get("patch") or "",
+            additions=file_info.get("additions", 0),
+            deletions=file_info.get("deletions", 0),
+            status=file_info.get("status", "modified")
         )
     
     def _get_risk_level(self, risk_score: float) -> str:
@@ -91,11 +258,20 @@ class AnalysisService:
         
         return fixes
     
-    def _generate_time_machine_predictions(self, pr_data: Dict, risk_score: float) -> TimeachineData:
-        """Generate Time Machine predictions"""
-        bug_likelihood = min(0.45, risk_score / 200 + random.uniform(0.1, 0.15))
-        maintainability_impact = -random.randint(5, 25) if risk_score > 60 else random.randint(5, 15)
-        performance_regression = min(0.2, risk_score / 500 + random.uniform(0.02, 0.08))
+    def _generate_time_machine_predictions(self, pr_data: Dict) -> TimeachineData:
+        """Time Machine predictions from the PR's shape (size, paths, languages, test share)
+
+        Issues are not an input, so this runs alongside issue detection.
+        """
+        contributions = [self.risk_calculator.file_contribution(file_info) for file_info in pr_data.get("files", [])]
+        features = dict(zip(PR_FEATURES, self.risk_calculator.feature_matrix([pr_data], [contributions])[0]))
+        structural_risk = self.risk_calculator.calculate_risk(pr_data, contributions)
+        # 0 for an empty diff, 1 from about 5000 added plus 5000 deleted lines
+        size = min(1.0, (features["log_additions"] + features["log_deletions"]) / (2 * math.log1p(5000)))
+
+        bug_likelihood = min(0.45, structural_risk / 200 + 0.1 + 0.05 * (1 - features["test_share"]))
+        maintainability_impact = -(5 + round(20 * size)) if structural_risk > 60 else 15 - round(10 * size)
+        performance_regression = min(0.2, structural_risk / 500 + 0.02 + 0.06 * features["language_risk"])
         
         predicted_issues = [
             "Authentication bypass vulnerability may emerge in edge cases",
@@ -108,8 +284,8 @@ class AnalysisService:
             predicted_issues.append("Increased coupling between modules may reduce maintainability")
         
         return TimeachineData(
-            bug_likelihood=bug_likelihood,
+            bug_likelihood=round(float(bug_likelihood), 3),
             maintainability_impact=maintainability_impact,
-            performance_regression=performance_regression,
+            performance_regression=round(float(performance_regression), 3),
             predicted_issues=predicted_issues[:4]
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+import orjson
+
+from config import settings
+from models.analysis import AnalysisResponse
+from utils.sqlite_store import SQLiteKV, sqlite_path
+
+logger = logging.getLogger(__name__)
+
+_FILES_MARKER = b',"files":['
+
+T = TypeVar("T")
+
+
+class AnalysisStore:
+    """Single store for finished analyses, keyed by pr_id.
+
+    Analyses are kept as compact orjson blobs in a byte-capped LRU. When
+    DATABASE_URL is a sqlite:/// URL every write also goes to SQLite, so
+    entries evicted from memory (or lost to a restart) are read back from disk.
+
+    Alongside each blob the store keeps the analysis' API JSON (the blob
+    without ``files``), so reads are served as bytes with no decoding or
+    validation. Every ``put`` - including the one after ``apply_fix`` -
+    replaces both.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, database_url: Optional[str] = None):
+        self.max_bytes = max_bytes or settings.ANALYSIS_STORE_MAX_BYTES
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._responses: Dict[str, bytes] = {}
+        self._bytes = 0
+        # pr_id -> [lock, holders + waiters]; dropped once nobody uses it
+        self._locks: Dict[str, List] = {}
+        path = sqlite_path(settings.DATABASE_URL if database_url is None else database_url)
+        self._disk = SQLiteKV(path, "analyses") if path else None
+        # Kept up to date by ``put`` so stats() never queries SQLite on the event loop
+        self._disk_entries = self._disk.count() if self._disk is not None else 0
+
+        self.evictions = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.response_hits = 0
+
+    @staticmethod
+    def encode(analysis: AnalysisResponse) -> bytes:
+        return AnalysisStore.encode_parts(analysis)[1]
+
+    @staticmethod
+    def encode_parts(analysis: AnalysisResponse) -> Tuple[bytes, bytes]:
+        """(API JSON, storage blob) of an analysis"""
+        # ``files`` is excluded from API dumps but must survive storage. Each
+        # file is dumped on its own so lazily loaded patches are decoded one
+        # at a time rather than all at once.
+        response = orjson.dumps(analysis.model_dump())
+        files = b",".join(orjson.dumps(file.model_dump()) for file in analysis.files)
+        return response, response[:-1] + b',"files":[' + files + b"]}"
+
+    @staticmethod
+    def decode(blob: bytes) -> AnalysisResponse:
+        return AnalysisResponse.model_validate(orjson.loads(blob))
+
+    @staticmethod
+    def response_from_blob(blob: bytes) -> bytes:
+        """API JSON of a stored blob, cut out without parsing it"""
+        # ``files`` is the blob's last key and no other object has one; inside
+        # strings the quotes would be escaped, so the marker can't match there
+        end = blob.find(_FILES_MARKER)
+        if end == -1:
+            return orjson.dumps(AnalysisStore.decode(blob).model_dump())
+        return blob[:end] + b"}"
+
+    async def get(self, pr_id: str) -> Optional[AnalysisResponse]:
+        blob = await self.get_blob(pr_id)
+        return self.decode(blob) if blob is not None else None
+
+    async def get_response(self, pr_id: str) -> Optional[bytes]:
+        """The analysis as API JSON bytes, ready to send"""
+        response = self._responses.get(pr_id)
+        if response is not None:
+            self._blobs.move_to_end(pr_id)
+            self.response_hits += 1
+            return response
+
+        blob = await self.get_blob(pr_id)
+        if blob is None:
+            return None
+        response = self.response_from_blob(blob)
+        if pr_id in self._blobs:
+            self._responses[pr_id] = response
+            self._bytes += len(response)
+            self._evict()
+        return response
+
+    async def get_blob(self, pr_id: str) -> Optional[bytes]:
+        """Serialized analysis, without decoding it"""
+        blob = self._blobs.get(pr_id)
+        if blob is not None:
+            self._blobs.move_to_end(pr_id)
+            self.memory_hits += 1
+            return blob
+
+        if self._disk is not None:
+            try:
+                blob = await self._disk.aget(pr_id)
+            except Exception as e:
+                logger.warning(f"Analysis store disk read failed for {pr_id}: {e}")
+            if blob is not None:
+                self.disk_hits += 1
+                self._remember(pr_id, blob)
+                return blob
+
+        self.misses += 1
+        return None
+
+    async def put(self, pr_id: str, analysis: AnalysisResponse) -> bytes:
+        """Store an analysis, returning its API JSON"""
+        response, blob = self.encode_parts(analysis)
+        self._remember(pr_id, blob, response)
+        if self._disk is not None:
+            try:
+                self._disk_entries = await asyncio.to_thread(self._write_disk, pr_id, blob)
+            except Exception as e:
+                logger.warning(f"Analysis store disk write failed for {pr_id}: {e}")
+        return response
+
+    def _write_disk(self, pr_id: str, blob: bytes) -> int:
+        """Write one blob and return the new row count (runs in a worker thread)"""
+        self._disk.set(pr_id, blob)
+        return self._disk.count()
+
+    async def update(self, pr_id: str, fn: Callable[[AnalysisResponse], T]) -> Optional[T]:
+        """Read-modify-write one analysis, returning ``fn``'s result (None if not stored).
+
+        ``fn`` changes the analysis in place; concurrent updates of the same
+        pr_id run one after another, so none of them is lost. If ``fn``
+        raises, nothing is written.
+        """
+        entry = self._locks.setdefault(pr_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                analysis = await self.get(pr_id)
+                if analysis is None:
+                    return None
+                result = fn(analysis)
+                await self.put(pr_id, analysis)
+                return result
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[pr_id]
+
+    async def contains(self, pr_id: str) -> bool:
+        return await self.get_blob(pr_id) is not None
+
+    def _remember(self, pr_id: str, blob: bytes, response: Optional[bytes] = None):
+        self._forget(pr_id)
+        self._blobs[pr_id] = blob
+        self._bytes += len(blob)
+        if response is not None:
+            self._responses[pr_id] = response
+            self._bytes += len(response)
+        self._evict()
+
+    def _forget(self, pr_id: str):
+        blob = self._blobs.pop(pr_id, None)
+        if blob is not None:
+            self._bytes -= len(blob)
+        response = self._responses.pop(pr_id, None)
+        if response is not None:
+            self._bytes -= len(response)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._blobs) > 1:
+            self._forget(next(iter(self._blobs)))
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._blobs),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "response_hits": self.response_hits,
+            "disk_enabled": self._disk is not None,
+            "disk_entries": self._disk_entries,
+        }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+
+
+# Shared store used by every route; closed by the FastAPI lifespan in main.py
+analysis_store = AnalysisStore()
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from config import settings
+from services.analysis_service import AnalysisService
+from services.analysis_store import AnalysisStore
+from services.github_service import GitHubService
+from utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# GitHub requests one PR analysis needs at minimum (PR details + first files page)
+REQUESTS_PER_PR = 2
+
+
+class BatchProgress:
+    """Counters and throughput for one batch run"""
+
+    def __init__(self, batch_id: str, total: int, concurrency: int):
+        self.batch_id = batch_id
+        self.total = total
+        self.concurrency = concurrency
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.cached = 0
+        self.durations_ms: List[float] = []
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed + self.skipped
+
+    def summary(self) -> Dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        analysed = self.succeeded + self.failed
+        return {
+            "batch_id": self.batch_id,
+            "status": "finished" if self.finished else "running",
+            "total": self.total,
+            "done": self.done,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "cached": self.cached,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "prs_per_second": round(analysed / elapsed, 3) if elapsed > 0 else 0.0,
+            "avg_duration_ms": round(sum(self.durations_ms) / len(self.durations_ms), 1) if self.durations_ms else None,
+            "max_duration_ms": round(max(self.durations_ms), 1) if self.durations_ms else None,
+        }
+
+
+class BatchAnalysisService:
+    """Analyse many PRs with a bounded worker pool, yielding results as they finish.
+
+    Before each PR is started the token's last known GitHub quota is checked;
+    once it falls to BATCH_RATE_LIMIT_RESERVE (capped at a tenth of the
+    token's limit) the remaining PRs are reported
+    as skipped instead of exhausting the quota for interactive users.
+    """
+
+    def __init__(self, github_service: GitHubService, analysis_service: AnalysisService, store: AnalysisStore):
+        self.github_service = github_service
+        self.analysis_service = analysis_service
+        self.store = store
+        self.rate_limit_reserve = settings.BATCH_RATE_LIMIT_RESERVE
+        self.batches = LRUCache(max_entries=100)
+
+    def progress(self, batch_id: str) -> Optional[Dict]:
+        progress = self.batches.peek(batch_id)
+        return progress.summary() if progress else None
+
+    async def run(self, targets: List[Tuple[str, int]], github_token: Optional[str] = None,
+                  concurrency: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Yield one record per PR in completion order, then a ``summary`` record"""
+        # Clients may lower the concurrency, never raise it past the server's limit
+        concurrency = max(1, min(concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY, len(targets) or 1))
+        progress = BatchProgress(uuid.uuid4().hex[:12], len(targets), concurrency)
+        self.batches.set(progress.batch_id, progress)
+        logger.info(f"Batch {progress.batch_id}: {len(targets)} PRs, concurrency {concurrency}")
+
+        pending = deque(targets)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            while pending:
+                repo, pr_number = pending.popleft()
+                # Every target must yield exactly one record or the reader below waits forever
+                try:
+                    if self._quota_exhausted(github_token):
+                        progress.skipped += 1
+                        record = {"status": "skipped", "error": "GitHub rate limit reserve reached"}
+                    else:
+                        record = await self._analyze(repo, pr_number, github_token, progress)
+                except Exception as e:
+                    logger.error(f"Batch {progress.batch_id} worker failed on {repo}-{pr_number}: {e}", exc_info=True)
+                    progress.failed += 1
+                    record = {"status": "error", "pr_id": f"{repo}-{pr_number}", "error": str(e)}
+                record.update(
+                    batch_id=progress.batch_id, repository=repo, pr_number=pr_number,
+                    done=progress.done, total=progress.total
+                )
+                await results.put(record)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for _ in range(len(targets)):
+                yield {"type": "result", **await results.get()}
+            progress.finished = time.perf_counter()
+            summary = progress.summary()
+            logger.info(f"Batch {progress.batch_id} finished: {summary}")
+            yield {"type": "summary", **summary}
+        finally:
+            # Client went away mid-stream: stop starting new analyses
+            for task in workers:
+                task.cancel()
+
+    async def _analyze(self, repo: str, pr_number: int, github_token: Optional[str],
+                       progress: BatchProgress) -> Dict:
+        started = time.perf_counter()
+        pr_id = f"{repo}-{pr_number}"
+        try:
+            pr_data = await self.github_service.get_pr_data(repo, pr_number, github_token)
+            analysis = await self.analysis_service.analyze_pr(pr_id, pr_data, repo)
+            analysis.github_authenticated = bool(github_token)
+            await self.store.put(pr_id, analysis)
+        except Exception as e:
+            logger.warning(f"Batch analysis of {pr_id} failed: {e}")
+            progress.failed += 1
+            progress.durations_ms.append((time.perf_counter() - started) * 1000)
+            return {"status": "error", "pr_id": pr_id, "error": str(e)}
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        progress.succeeded += 1
+        progress.cached += bool(analysis.cached)
+        progress.durations_ms.append(duration_ms)
+        return {
+            "status": "ok",
+            "pr_id": pr_id,
+            "title": analysis.title,
+            "risk_score": analysis.risk_score,
+            "risk_level": analysis.risk_level,
+            "issues": len(analysis.issues),
+            "cached": analysis.cached,
+            "duration_ms": round(duration_ms, 1),
+        }
+
+    def _quota_exhausted(self, github_token: Optional[str]) -> bool:
+        limits = self.github_service.rate_limit(github_token)
+        if limits is None or limits["remaining"] is None:
+            return False
+        # Anonymous quotas are only 60/hour, so never reserve more than a tenth of the limit
+        reserve = min(self.rate_limit_reserve, (limits["limit"] or self.rate_limit_reserve * 10) // 10)
+        return limits["remaining"] < reserve + REQUESTS_PER_PR
@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Dict, Optional
+
+import orjson
+
+from utils.lru_cache import LRUCache
+from utils.sqlite_store import SQLiteKV, sqlite_path
+
+logger = logging.getLogger(__name__)
+
+# Fields that change on every re-analysis without changing what the model sees
+_VOLATILE_FIELDS = (
+    "created_at", "analysis_time", "cached", "github_authenticated", "reuse_ratio", "files_rescanned",
+    "peak_rss_mb", "pipeline"
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?!.,;:"
+
+
+def normalize_question(question: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a question"""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def context_hash(pr_context: dict) -> str:
+    """Stable hash of the analysis content a prompt is built from"""
+    stable = {key: value for key, value in pr_context.items() if key not in _VOLATILE_FIELDS}
+    return hashlib.sha256(orjson.dumps(stable, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+
+
+class ChatResponseCache:
+    """LRU + TTL cache of Gemini answers, optionally backed by SQLite.
+
+    Keys hash the normalized question, mentor persona, analysis content and
+    model parameters, so any change to what would be sent to the model is a
+    miss rather than a stale answer.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = 1800, database_url: str = ""):
+        self.ttl = ttl
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        path = sqlite_path(database_url)
+        self._disk = SQLiteKV(path, "chat_responses") if path else None
+        self.disk_hits = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def key(question: str, mentor_mode: str, pr_context: dict, model_params: dict) -> str:
+        material = orjson.dumps({
+            "question": normalize_question(question),
+            "mentor": mentor_mode,
+            "context": context_hash(pr_context),
+            "model": model_params,
+        }, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(material).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        response = self._memory.get(key)
+        if response is None and self._disk is not None:
+            try:
+                blob = await self._disk.aget(key)
+            except Exception as e:
+                logger.warning(f"Chat cache disk read failed: {e}")
+                blob = None
+            if blob is not None:
+                response = blob.decode()
+                self._memory.set(key, response)
+                self.disk_hits += 1
+        return response
+
+    async def set(self, key: str, response: str):
+        self._memory.set(key, response)
+        if self._disk is not None:
+            try:
+                await self._disk.aset(key, response.encode(), self.ttl)
+            except Exception as e:
+                logger.warning(f"Chat cache disk write failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            **self._memory.stats(),
+            "ttl": self.ttl,
+            "bypassed": self.bypassed,
+            "disk_enabled": self._disk is not None,
+            "disk_hits": self.disk_hits,
+        }
@@ -1,36 +1,97 @@
 # backend/services/chat_service.py
-import httpx
+import json
 import logging
+import time
+from collections import deque
 from datetime import datetime
 import os
+from typing import AsyncIterator, NamedTuple, Optional
+from config import settings
 from models.chat import ChatResponse
+from services.chat_cache import ChatResponseCache
+from services.chat_session import ChatSession, ChatSessionStore
+from services.metrics import STAGE_SECONDS, stage_timer
+from services.http_client import HTTPClientRegistry, http_clients as default_http_clients
+from services.prompt_budget import DiffBudgetReport, DiffBudgeter, estimate_tokens, truncate_to_budget
 
 logger = logging.getLogger(__name__)
 
+MENTOR_NAMES = {
+    "sarah_lead": "Sarah (Team Lead)",
+    "alex_security": "Alex (Security Expert)",
+    "jordan_perf": "Jordan (Performance Guru)",
+    "balanced": "AI Reviewer"
+}
+
+GENERATION_CONFIG = {
+    "maxOutputTokens": 800,
+    "temperature": 0.5,
+    "topP": 0.8,
+    "topK": 40
+}
+
+class GeminiRequest(NamedTuple):
+    payload: dict
+    diff_report: DiffBudgetReport
+    model: str
+
 class ChatService:
-    def __init__(self):
+    def __init__(self, http_clients: Optional[HTTPClientRegistry] = None,
+                 response_cache: Optional[ChatResponseCache] = None):
         self.gemini_key = os.getenv("GEMINI_API_KEY")
         if not self.gemini_key:
             raise ValueError("GEMINI_API_KEY not set in environment variables")
+        self.api_url = settings.GEMINI_API_URL
+        self.model = settings.GEMINI_MODEL
+        self.http_clients = http_clients or default_http_clients
+        # Recent time-to-first-token samples (ms) for streamed responses
+        self._ttft_samples = deque(maxlen=500)
+        self.streams = 0
+        self.stream_errors = 0
+        self.diff_budgeter = DiffBudgeter(settings.CHAT_DIFF_TOKEN_BUDGET)
+        self.prompt_tokens_sent = 0
+        self.prompt_tokens_saved = 0
+        self.response_cache = response_cache or ChatResponseCache(
+            max_entries=settings.CHAT_CACHE_SIZE,
+            ttl=settings.CHAT_CACHE_TTL,
+            database_url=settings.DATABASE_URL
+        )
+        self.sessions = ChatSessionStore(ttl=settings.CHAT_SESSION_TTL)
+        self.context_budgeter = DiffBudgeter(settings.CHAT_CONTEXT_CACHE_MAX_TOKENS)
+        self.follow_up_requests = 0
+        self.context_caches_created = 0
+        self.context_cache_failures = 0
         logger.info("ChatService initialized with Google Gemini API")
 
-    async def generate_response(self, message: str, mentor_mode: str, pr_context: dict) -> ChatResponse:
+    async def generate_response(self, message: str, mentor_mode: str, pr_context: dict,
+                                bypass_cache: bool = False, session: Optional[ChatSession] = None) -> ChatResponse:
         """Generate chat response with mentor persona using Google Gemini"""
+        # Answers to follow-ups depend on the conversation, so only first turns are cached
+        follow_up = session is not None and session.is_follow_up
+        cache_key = self.cache_key(message, mentor_mode, pr_context)
+        cached = None if follow_up else await self.cached_response(cache_key, bypass_cache)
+        if cached is not None:
+            self.record_turn(session, message, cached)
+            return ChatResponse(
+                response=cached,
+                timestamp=datetime.utcnow(),
+                mentor_name=self.mentor_name(mentor_mode),
+                cached=True
+            )
+
         try:
-            response_text = await self._gemini_chat(message, mentor_mode, pr_context)
+            request = await self.build_request(message, mentor_mode, pr_context, session)
+            response_text = await self._gemini_chat(request)
             logger.info("Gemini API responded successfully")
-
-            mentor_names = {
-                "sarah_lead": "Sarah (Team Lead)",
-                "alex_security": "Alex (Security Expert)",
-                "jordan_perf": "Jordan (Performance Guru)",
-                "balanced": "AI Reviewer"
-            }
+            if not follow_up:
+                await self.response_cache.set(cache_key, response_text)
+            self.record_turn(session, message, response_text)
 
             return ChatResponse(
                 response=response_text,
                 timestamp=datetime.utcnow(),
-                mentor_name=mentor_names.get(mentor_mode, "AI Reviewer")
+                mentor_name=self.mentor_name(mentor_mode),
+                prompt_tokens_saved=request.diff_report.tokens_saved
             )
 
         except Exception as e:
@@ -41,26 +102,248 @@ class ChatService:
                 mentor_name="AI Reviewer"
             )
 
-    async def _gemini_chat(self, message: str, mentor_mode: str, pr_context: dict) -> str:
-        """Chat with Google Gemini API"""
+    async def stream_response(self, request: GeminiRequest) -> AsyncIterator[str]:
+        """Yield response text as Gemini generates it (streamGenerateContent over SSE)"""
+        self.streams += 1
+        started = time.perf_counter()
+        first_token = True
+
+        client = self.http_clients.get(self.api_url)
+        try:
+            async with client.stream(
+                "POST",
+                f"{self.api_url}/v1beta/models/{request.model}:streamGenerateContent?alt=sse&key={self.gemini_key}",
+                headers={"Content-Type": "application/json"},
+                json=request.payload,
+                timeout=20.0
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"Gemini API error {response.status_code}: {body.decode(errors='replace')}")
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    text = self._chunk_text(json.loads(line[5:]))
+                    if not text:
+                        continue
+                    if first_token:
+                        first_token = False
+                        ttft_ms = (time.perf_counter() - started) * 1000
+                        self._ttft_samples.append(ttft_ms)
+                        STAGE_SECONDS.observe(ttft_ms / 1000, ("gemini_first_token",))
+                        logger.info(f"Gemini stream time-to-first-token: {ttft_ms:.0f} ms")
+                    yield text
+        except Exception:
+            self.stream_errors += 1
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, ("gemini_stream",))
+
+    @staticmethod
+    def _chunk_text(chunk: dict) -> str:
+        try:
+            parts = chunk["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError):
+            return ""
+        return "".join(part.get("text", "") for part in parts)
+
+    def stream_stats(self) -> dict:
+        samples = sorted(self._ttft_samples)
+
+        def percentile(q: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))], 1)
+
+        return {
+            "streams": self.streams,
+            "errors": self.stream_errors,
+            "ttft_ms_p50": percentile(0.5),
+            "ttft_ms_p95": percentile(0.95),
+            "ttft_samples": len(samples),
+        }
+
+    def prompt_stats(self) -> dict:
+        total = self.prompt_tokens_sent + self.prompt_tokens_saved
+        return {
+            "diff_token_budget": self.diff_budgeter.budget_tokens,
+            "diff_tokens_sent": self.prompt_tokens_sent,
+            "diff_tokens_saved": self.prompt_tokens_saved,
+            "saved_ratio": round(self.prompt_tokens_saved / total, 4) if total else 0.0,
+            "follow_up_requests": self.follow_up_requests,
+            "context_caches_created": self.context_caches_created,
+            "context_cache_failures": self.context_cache_failures,
+            **self.sessions.stats(),
+        }
+
+    def cache_key(self, message: str, mentor_mode: str, pr_context: dict) -> str:
+        model_params = {
+            "model": self.model,
+            "generation": GENERATION_CONFIG,
+            "diff_budget": self.diff_budgeter.budget_tokens,
+        }
+        return self.response_cache.key(message, mentor_mode, pr_context, model_params)
+
+    async def cached_response(self, cache_key: str, bypass_cache: bool = False) -> Optional[str]:
+        if bypass_cache:
+            self.response_cache.bypassed += 1
+            return None
+        return await self.response_cache.get(cache_key)
+
+    def mentor_name(self, mentor_mode: str) -> str:
+        return MENTOR_NAMES.get(mentor_mode, "AI Reviewer")
+
+    def record_turn(self, session: Optional[ChatSession], message: str, response_text: str):
+        if session is not None:
+            session.record(message, response_text, settings.CHAT_HISTORY_WINDOW, settings.CHAT_SUMMARY_CHARS)
+
+    async def build_request(self, message: str, mentor_mode: str, pr_context: dict,
+                            session: Optional[ChatSession] = None) -> GeminiRequest:
+        """First turns carry the budgeted diff; follow-ups reuse the session's context"""
+        if session is None or not session.is_follow_up:
+            return self.prepare_prompt(message, mentor_mode, pr_context)
+        return await self._follow_up_request(message, mentor_mode, pr_context, session)
+
+    def prepare_prompt(self, message: str, mentor_mode: str, pr_context: dict) -> GeminiRequest:
+        """Single-turn Gemini request with the diff budget report for it"""
+        diff_report = self._budget_diff(message, pr_context)
+        self._count_diff_tokens(diff_report)
+        if diff_report.tokens_saved:
+            logger.info(
+                f"Chat diff trimmed to {diff_report.tokens_used} tokens "
+                f"({diff_report.hunks_included}/{diff_report.hunks_total} hunks, saved {diff_report.tokens_saved})"
+            )
+
         system_prompt = self._get_system_prompt(mentor_mode)
-        user_prompt = self._build_user_prompt(message, pr_context)
+        user_prompt = self._build_user_prompt(message, pr_context, diff_report.text)
 
         combined_prompt = f"{system_prompt}\n\n{user_prompt}"
+        payload = {
+            "contents": [{"parts": [{"text": combined_prompt}]}],
+            "generationConfig": GENERATION_CONFIG
+        }
+        return GeminiRequest(payload, diff_report, self.model)
+
+    async def _follow_up_request(self, message: str, mentor_mode: str, pr_context: dict,
+                                 session: ChatSession) -> GeminiRequest:
+        """Only the new message plus a bounded history window; the PR context is
+        referenced from a Gemini context cache, or condensed when there is none"""
+        self.follow_up_requests += 1
+        cached_content = await self._context_cache(session, mentor_mode, pr_context)
+
+        contents = []
+        preamble = self._conversation_summary(session)
+        if cached_content is None:
+            preamble = f"{self._condensed_context(pr_context)}\n\n{preamble}".strip()
+        if preamble:
+            contents.append({"role": "user", "parts": [{"text": preamble}]})
+            contents.append({"role": "model", "parts": [{"text": "Understood."}]})
+        for turn in session.turns:
+            contents.append({"role": turn["role"], "parts": [{"text": turn["text"]}]})
+        contents.append({"role": "user", "parts": [{"text": message}]})
+
+        payload = {"contents": contents, "generationConfig": GENERATION_CONFIG}
+        if cached_content is not None:
+            payload["cachedContent"] = cached_content
+        else:
+            payload["systemInstruction"] = {"parts": [{"text": self._get_system_prompt(mentor_mode)}]}
+
+        # None of the diff is resent on follow-ups
+        tokens_full = self._full_diff_tokens(pr_context)
+        diff_report = DiffBudgetReport("", 0, tokens_full, 0, 0)
+        self._count_diff_tokens(diff_report)
+        return GeminiRequest(payload, diff_report, self.model)
+
+    async def _context_cache(self, session: ChatSession, mentor_mode: str, pr_context: dict) -> Optional[str]:
+        """Gemini cachedContents resource for this session's PR context, created once if large enough"""
+        live = session.live_cached_content(mentor_mode)
+        if live is not None or (session.cache_attempted and session.cached_content_mentor == mentor_mode):
+            return live
+        session.cache_attempted = True
+        session.cached_content_mentor = mentor_mode
+
+        files = pr_context.get("files") or []
+        # A conversation stays on one model, and Gemini only caches for versioned ones
+        if not files or self.model.endswith("-latest"):
+            return None
+        diff_report = self.context_budgeter.build(files, "", pr_context.get("issues", []))
+        context_text = self._build_user_prompt("", pr_context, diff_report.text)
+        if estimate_tokens(context_text) < settings.CHAT_CONTEXT_CACHE_MIN_TOKENS:
+            return None
 
-        async with httpx.AsyncClient() as client:
+        client = self.http_clients.get(self.api_url)
+        try:
             response = await client.post(
-                f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent?key={self.gemini_key}",
+                f"{self.api_url}/v1beta/cachedContents?key={self.gemini_key}",
                 headers={"Content-Type": "application/json"},
                 json={
-                    "contents": [{"parts": [{"text": combined_prompt}]}],
-                    "generationConfig": {
-                        "maxOutputTokens": 800,
-                        "temperature": 0.5,
-                        "topP": 0.8,
-                        "topK": 40
-                    }
+                    "model": f"models/{self.model}",
+                    "systemInstruction": {"parts": [{"text": self._get_system_prompt(mentor_mode)}]},
+                    "contents": [{"role": "user", "parts": [{"text": context_text}]}],
+                    "ttl": f"{settings.CHAT_CONTEXT_CACHE_TTL}s"
                 },
+                timeout=30.0
+            )
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+            session.cached_content = response.json()["name"]
+        except Exception as e:
+            self.context_cache_failures += 1
+            logger.warning(f"Gemini context cache unavailable, using condensed context: {e}")
+            return None
+
+        # Refresh a little before Gemini expires it
+        session.cached_content_expires = time.time() + settings.CHAT_CONTEXT_CACHE_TTL - 30
+        self.context_caches_created += 1
+        return session.cached_content
+
+    def _condensed_context(self, pr_context: dict) -> str:
+        issues = pr_context.get("issues", [])
+        lines = [
+            "Pull Request under review (condensed; the full diff was shared earlier).",
+            f"Title: {pr_context.get('title', 'Untitled PR')}",
+            f"Risk Score: {pr_context.get('risk_score', 0)}/100",
+            f"Issues Found: {len(issues)}",
+        ]
+        lines.extend(
+            f"- {issue.get('severity', '')} {issue.get('file', '')}:{issue.get('line', '')} {issue.get('description', '')}"
+            for issue in issues[:10]
+        )
+        files = pr_context.get("files") or []
+        if files:
+            lines.append("Files changed:")
+            lines.extend(
+                f"- {file_info.get('filename', '')} (+{file_info.get('additions', 0)} -{file_info.get('deletions', 0)})"
+                for file_info in files[:30]
+            )
+            if len(files) > 30:
+                lines.append(f"- ... and {len(files) - 30} more")
+        return "\n".join(lines)
+
+    def _conversation_summary(self, session: ChatSession) -> str:
+        if not session.summary:
+            return ""
+        return "Earlier in this conversation:\n" + "\n".join(session.summary)
+
+    def _full_diff_tokens(self, pr_context: dict) -> int:
+        files = pr_context.get("files") or []
+        if files:
+            return sum(estimate_tokens(file_info.get("patch") or "") for file_info in files)
+        return estimate_tokens(pr_context.get("diff") or "")
+
+    def _count_diff_tokens(self, diff_report: DiffBudgetReport):
+        self.prompt_tokens_sent += diff_report.tokens_used
+        self.prompt_tokens_saved += diff_report.tokens_saved
+
+    async def _gemini_chat(self, request: GeminiRequest) -> str:
+        """Chat with Google Gemini API"""
+        client = self.http_clients.get(self.api_url)
+        with stage_timer("gemini_call"):
+            response = await client.post(
+                f"{self.api_url}/v1beta/models/{request.model}:generateContent?key={self.gemini_key}",
+                headers={"Content-Type": "application/json"},
+                json=request.payload,
                 timeout=20.0
             )
 
@@ -73,10 +356,9 @@ class ChatService:
         else:
             raise Exception(f"Gemini API error {response.status_code}: {response.text}")
 
-    def _build_user_prompt(self, message: str, pr_context: dict) -> str:
+    def _build_user_prompt(self, message: str, pr_context: dict, pr_diff: str) -> str:
         pr_title = pr_context.get("title", "Untitled PR")
         pr_summary = pr_context.get("summary", "")
-        pr_diff = pr_context.get("diff", "No code diff available")
         issues = pr_context.get("issues", [])
         risk_score = pr_context.get("risk_score", 0)
 
@@ -102,6 +384,15 @@ class ChatService:
         - Be helpful and constructive in your feedback.
         """
 
+    def _budget_diff(self, message: str, pr_context: dict) -> DiffBudgetReport:
+        """Diff section for the prompt, trimmed to CHAT_DIFF_TOKEN_BUDGET"""
+        files = pr_context.get("files") or []
+        if files:
+            report = self.diff_budgeter.build(files, message, pr_context.get("issues", []))
+            if report.hunks_total:
+                return report
+        return truncate_to_budget(pr_context.get("diff") or "No code diff available", self.diff_budgeter.budget_tokens)
+
     def _get_system_prompt(self, mentor_mode: str) -> str:
         prompts = {
             "sarah_lead": (
@@ -126,6 +417,10 @@ class ChatService:
         }
         return prompts.get(mentor_mode, prompts["balanced"])
 
+    async def fallback_stream(self, message: str, mentor_mode: str, pr_context: dict) -> AsyncIterator[str]:
+        """Stream the offline fallback reply, for when Gemini fails before sending anything"""
+        yield self._fallback_chat(message, mentor_mode, pr_context)
+
     def _fallback_chat(self, message: str, mentor_mode: str, pr_context: dict) -> str:
         risk_score = pr_context.get("risk_score", 0)
         issues_count = len(pr_context.get("issues", []))
@@ -0,0 +1,80 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from utils.lru_cache import LRUCache
+
+# Characters of each folded answer kept in the rolling summary
+_SUMMARY_ANSWER_CHARS = 240
+
+
+@dataclass
+class ChatSession:
+    """Model-facing state of one review conversation.
+
+    ``turns`` is the bounded window of recent user/model messages sent
+    verbatim; older turns are folded into ``summary``. ``cached_content`` is
+    the Gemini cachedContents resource holding the PR context, when one could
+    be created.
+    """
+    key: str
+    context_hash: str
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    summary: List[str] = field(default_factory=list)
+    cached_content: Optional[str] = None
+    cached_content_mentor: Optional[str] = None
+    cached_content_expires: float = 0.0
+    cache_attempted: bool = False
+
+    @property
+    def is_follow_up(self) -> bool:
+        return bool(self.turns or self.summary)
+
+    def live_cached_content(self, mentor_mode: str) -> Optional[str]:
+        if (self.cached_content and self.cached_content_mentor == mentor_mode
+                and self.cached_content_expires > time.time()):
+            return self.cached_content
+        return None
+
+    def record(self, question: str, answer: str, window: int, summary_chars: int):
+        """Append a turn, folding turns beyond the window into the summary"""
+        self.turns.append({"role": "user", "text": question})
+        self.turns.append({"role": "model", "text": answer})
+        while len(self.turns) > window * 2:
+            user, model = self.turns.pop(0), self.turns.pop(0)
+            answer_head = " ".join(model["text"].split())[:_SUMMARY_ANSWER_CHARS]
+            self.summary.append(f"Q: {' '.join(user['text'].split())[:160]} -> A: {answer_head}")
+        while self.summary and sum(len(line) for line in self.summary) > summary_chars:
+            self.summary.pop(0)
+
+
+class ChatSessionStore:
+    """Sessions keyed by PR and client session id, expiring after inactivity.
+
+    Only clients that send a session id get a session; requests without one
+    are independent first turns, so unrelated users never share history.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 3600):
+        self._sessions = LRUCache(max_entries=max_sessions, ttl=ttl)
+
+    @staticmethod
+    def key(pr_id: str, session_id: str) -> str:
+        return f"{pr_id}::{session_id}"
+
+    def get(self, pr_id: str, session_id: Optional[str], context_hash: str) -> Optional[ChatSession]:
+        """Existing session, or a fresh one if the PR's analysis has changed since; None without a session id"""
+        if not session_id:
+            return None
+        key = self.key(pr_id, session_id)
+        session = self._sessions.get(key)
+        if session is None or session.context_hash != context_hash:
+            session = ChatSession(key=key, context_hash=context_hash)
+        # Re-set on every use so the TTL measures inactivity
+        self._sessions.set(key, session)
+        return session
+
+    def stats(self) -> Dict:
+        return {"active_sessions": len(self._sessions), **{
+            key: value for key, value in self._sessions.stats().items() if key in ("evictions", "expirations")
+        }}
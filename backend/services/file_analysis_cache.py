@@ -0,0 +1,54 @@
+import hashlib
+from typing import Dict, List, NamedTuple, Optional
+
+from models.analysis import Issue
+from utils.lru_cache import LRUCache
+
+
+class FileAnalysis(NamedTuple):
+    issues: List[Issue]
+    risk: Dict
+
+
+class FileAnalysisCache:
+    """Per-file analysis results, reused across pushes to the same PR.
+
+    Entries are keyed by (filename, content, ruleset version). The content
+    part is a hash of the file's patch, since added lines are what the rules
+    scan; GitHub's blob SHA is used only for files without a patch (binary or
+    oversized), whose results depend on nothing else.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self._entries = LRUCache(max_entries=max_entries)
+        self.reused = 0
+        self.rescanned = 0
+
+    @staticmethod
+    def key(file_info: Dict, ruleset_version: str) -> Optional[str]:
+        # Lazily loaded files carry the digest, so keying doesn't decode the patch
+        digest = getattr(file_info, "patch_digest", None)
+        patch = (file_info.get("patch") or "") if digest is None else ""
+        if digest or patch:
+            content = "patch:" + (digest or hashlib.sha1(patch.encode("utf-8", "surrogatepass")).hexdigest())
+        elif file_info.get("sha"):
+            content = "blob:" + file_info["sha"]
+        else:
+            return None
+        return f"{file_info.get('filename', '')}\0{content}\0{ruleset_version}"
+
+    def get(self, key: Optional[str]) -> Optional[FileAnalysis]:
+        return self._entries.get(key) if key else None
+
+    def set(self, key: Optional[str], analysis: FileAnalysis):
+        if key:
+            self._entries.set(key, analysis)
+
+    def stats(self) -> Dict:
+        total = self.reused + self.rescanned
+        return {
+            **self._entries.stats(),
+            "files_reused": self.reused,
+            "files_rescanned": self.rescanned,
+            "reuse_ratio": round(self.reused / total, 4) if total else 0.0,
+        }
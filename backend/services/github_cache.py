@@ -0,0 +1,82 @@
+import hashlib
+from typing import Dict, Mapping, Optional, Tuple
+
+import httpx
+
+from utils.lru_cache import LRUCache
+
+# Headers replayed when a cached body is served for a 304
+_KEPT_HEADERS = ("ETag", "Last-Modified", "Link", "Content-Type")
+
+
+class GitHubResponseCache:
+    """Conditional-request cache for GitHub GET responses.
+
+    Bodies are stored with their ETag/Last-Modified validators, keyed by URL and
+    a hash of the token (different tokens can see different data). A 304 from
+    GitHub does not count against the rate limit, so revalidating is free.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self._cache = LRUCache(max_entries=max_entries)
+        self.conditional_requests = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, params: Optional[Mapping] = None, token: Optional[str] = None, accept: str = "") -> str:
+        token_id = hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        # The same URL serves JSON or a raw diff depending on Accept
+        return f"{token_id}:{url}?{query}#{accept}"
+
+    def conditional_headers(self, key: str) -> Tuple[Dict[str, str], Optional[Dict]]:
+        """Validators to send with the next request for ``key``, and the entry they came from
+
+        The entry must be handed back to ``resolve``: it may be evicted while
+        the request is in flight, and a 304 is only usable with its body.
+        """
+        cached = self._cache.get(key)
+        if cached is None:
+            return {}, None
+
+        headers = {}
+        if cached["headers"].get("ETag"):
+            headers["If-None-Match"] = cached["headers"]["ETag"]
+        if cached["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = cached["headers"]["Last-Modified"]
+        if headers:
+            self.conditional_requests += 1
+        return headers, cached
+
+    def resolve(self, key: str, response: httpx.Response, cached: Optional[Dict]) -> httpx.Response:
+        """Swap a 304 for ``cached`` (from ``conditional_headers``), or remember a fresh 200"""
+        if response.status_code == 304:
+            if cached is not None:
+                self.not_modified += 1
+                return httpx.Response(
+                    200,
+                    headers=cached["headers"],
+                    content=cached["body"],
+                    request=response.request
+                )
+            return response
+
+        if response.status_code == 200:
+            self.misses += 1
+            headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+            if "ETag" in headers or "Last-Modified" in headers:
+                self._cache.set(key, {"headers": headers, "body": response.content})
+        return response
+
+    def stats(self) -> Dict:
+        served = self.not_modified + self.misses
+        return {
+            "entries": len(self._cache),
+            "max_entries": self._cache.max_entries,
+            "evictions": self._cache.evictions,
+            "conditional_requests": self.conditional_requests,
+            "not_modified": self.not_modified,
+            "misses": self.misses,
+            "hit_rate": round(self.not_modified / served, 4) if served else 0.0,
+        }
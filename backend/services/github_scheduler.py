@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Quota would not free up within the scheduler's maximum wait"""
+
+
+class TokenQuota:
+    """GitHub quota for one token, paced with a token bucket.
+
+    The bucket refills at ``max_rate`` while plenty of quota is left. Once
+    the remaining quota drops below ``pace_below`` of the limit, it refills at
+    the rate that spreads what is left evenly until the reset time, so a
+    burst of analyses cannot drain the budget and then fail until the reset.
+    """
+
+    def __init__(self, burst: int, max_rate: float, pace_below: float = 0.2):
+        self.burst = burst
+        self.max_rate = max_rate
+        self.pace_below = pace_below
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[int] = None  # epoch seconds, as GitHub reports it
+        self.blocked_until = 0.0  # monotonic; set by Retry-After / exhausted quota
+        self.lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        if self.remaining is None or self.reset is None:
+            return self.max_rate
+        if self.limit and self.remaining > self.limit * self.pace_below:
+            return self.max_rate
+        window = self.reset - time.time()
+        if window <= 0:
+            return self.max_rate
+        return min(self.max_rate, self.remaining / window)
+
+    def reserve(self) -> float:
+        """Take one request slot; return 0, or the seconds to wait before retrying"""
+        now = time.monotonic()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if self.remaining == 0 and self.reset is not None:
+            wait = self.reset - time.time() + 1
+            if wait > 0:
+                return wait
+            self.remaining = None
+
+        rate = self.rate
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            if self.remaining is not None:
+                self.remaining -= 1
+            return 0.0
+        return (1 - self.tokens) / rate if rate > 0 else 1.0
+
+    def update(self, response: httpx.Response):
+        headers = response.headers
+        try:
+            if "X-RateLimit-Remaining" in headers:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Limit" in headers:
+                self.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Reset" in headers:
+                self.reset = int(headers["X-RateLimit-Reset"])
+        except ValueError:
+            pass
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_in_s": round(self.reset - time.time(), 1) if self.reset else None,
+            "rate_per_s": round(self.rate, 3),
+            "bucket_tokens": round(min(self.burst, self.tokens + (now - self.updated) * self.rate), 2),
+            "blocked_for_s": round(max(0.0, self.blocked_until - now), 1),
+        }
+
+
+class GitHubRequestScheduler:
+    """Pace GitHub requests per token and retry rate-limited responses.
+
+    Primary limits (``X-RateLimit-Remaining: 0``) block the token until its
+    reset time. Secondary limits (403/429 with ``Retry-After`` or the
+    "secondary rate limit" message) block the token for the advertised time,
+    or an exponential backoff with full jitter, and the request is retried.
+    A wait longer than ``max_wait`` raises instead of stalling the caller.
+    """
+
+    def __init__(self, burst: int = 30, max_rate: float = 10.0, pace_below: float = 0.2, max_retries: int = 3,
+                 base_delay: float = 1.0, max_delay: float = 60.0, max_wait: float = 60.0):
+        self.burst = burst
+        self.max_rate = max_rate
+        self.pace_below = pace_below
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self._quotas: Dict[str, TokenQuota] = {}
+
+        self.requests = 0
+        self.throttled = 0
+        self.waited_s = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+
+    def quota(self, token_id: str) -> TokenQuota:
+        quota = self._quotas.get(token_id)
+        if quota is None:
+            quota = self._quotas[token_id] = TokenQuota(self.burst, self.max_rate, self.pace_below)
+        return quota
+
+    async def request(self, token_id: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Run ``send`` once a slot is free, retrying while GitHub says to back off"""
+        quota = self.quota(token_id)
+        attempt = 0
+        while True:
+            await self._acquire(quota)
+            self.requests += 1
+            response = await send()
+            quota.update(response)
+
+            delay = self._backoff(response, quota, attempt)
+            if delay is None:
+                return response
+            self.rate_limited += 1
+            quota.block_for(delay)
+            if attempt >= self.max_retries or delay > self.max_wait:
+                logger.warning(f"GitHub rate limit: giving up after {attempt + 1} attempts (next slot in {delay:.0f}s)")
+                return response
+            attempt += 1
+            self.retries += 1
+            logger.info(f"GitHub rate limited ({response.status_code}); retry {attempt} in {delay:.1f}s")
+
+    async def _acquire(self, quota: TokenQuota):
+        # The lock makes waiters queue in arrival order instead of racing for slots
+        async with quota.lock:
+            while True:
+                wait = quota.reserve()
+                if wait <= 0:
+                    return
+                if wait > self.max_wait:
+                    raise RateLimitExceeded(f"GitHub API rate limit exceeded (next request allowed in {wait:.0f}s)")
+                self.throttled += 1
+                self.waited_s += wait
+                await asyncio.sleep(wait)
+
+    def _backoff(self, response: httpx.Response, quota: TokenQuota, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the response is not rate limited"""
+        if response.status_code not in (403, 429):
+            return None
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        if quota.remaining == 0 and quota.reset is not None:
+            return max(0.0, quota.reset - time.time() + 1)
+        if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            return self.base_delay + random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        # Plain 403: permissions, not rate limiting
+        return None
+
+    def budget(self, token_id: str) -> Optional[Dict]:
+        quota = self._quotas.get(token_id)
+        return quota.snapshot() if quota else None
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "waited_s": round(self.waited_s, 2),
+            "rate_limited_responses": self.rate_limited,
+            "retries": self.retries,
+            "tokens": {token_id: quota.snapshot() for token_id, quota in self._quotas.items()},
+        }
@@ -1,14 +1,76 @@
+import asyncio
+import hashlib
 import httpx
 import logging
-from typing import Dict, Optional
+import math
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
 from config import settings
+from services.github_cache import GitHubResponseCache
+from services.github_scheduler import GitHubRequestScheduler
+from services.metrics import stage_timer
+from services.http_client import HTTPClientRegistry, http_clients as default_http_clients
+from utils.diff_parser import parse_unified_diff
+from utils.patch_store import PatchStore, lazy_files
+from utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# GitHub serves at most 100 files per page and 3000 files per PR
+FILES_PER_PAGE = 100
+MAX_PR_FILES = 3000
+PULLS_PER_PAGE = 100
+
+_PR_FIELDS = """
+      title body additions deletions changedFiles state createdAt headRefOid
+      author { login }"""
+_FILES_FIELDS = """
+      files(first: 100, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes { path additions deletions changeType }
+      }"""
+PR_GRAPHQL_QUERY = (
+    "query($owner: String!, $name: String!, $number: Int!, $after: String) {\n"
+    "  repository(owner: $owner, name: $name) {\n    pullRequest(number: $number) {"
+    + _PR_FIELDS + _FILES_FIELDS + "\n    }\n  }\n}"
+)
+FILES_GRAPHQL_QUERY = (
+    "query($owner: String!, $name: String!, $number: Int!, $after: String) {\n"
+    "  repository(owner: $owner, name: $name) {\n    pullRequest(number: $number) {"
+    + _FILES_FIELDS + "\n    }\n  }\n}"
+)
+# GraphQL enums mapped to the REST values the rest of the app expects
+_CHANGE_TYPES = {
+    "ADDED": "added", "DELETED": "removed", "MODIFIED": "modified",
+    "RENAMED": "renamed", "COPIED": "copied", "CHANGED": "changed",
+}
+_PR_STATES = {"OPEN": "open", "CLOSED": "closed", "MERGED": "closed"}
+DIFF_MEDIA_TYPE = "application/vnd.github.v3.diff"
+
 class GitHubService:
-    def __init__(self):
+    def __init__(self, http_clients: Optional[HTTPClientRegistry] = None):
         self.base_token = settings.GITHUB_TOKEN
-    
+        self.api_url = settings.GITHUB_API_URL
+        self.graphql_url = settings.GITHUB_GRAPHQL_URL
+        self.fetch_backend = settings.GITHUB_FETCH_BACKEND
+        self.lazy_patches = settings.LAZY_PATCHES
+        self.patch_memory_max_bytes = settings.PATCH_MEMORY_MAX_BYTES
+        self.http_clients = http_clients or default_http_clients
+        self.files_concurrency = settings.GITHUB_FILES_CONCURRENCY
+        self.response_cache = (
+            GitHubResponseCache(settings.GITHUB_ETAG_CACHE_SIZE) if settings.GITHUB_ETAG_CACHE_SIZE > 0 else None
+        )
+        self.single_flight = SingleFlight()
+        self.scheduler = GitHubRequestScheduler(
+            burst=settings.GITHUB_RATE_BURST,
+            max_rate=settings.GITHUB_MAX_REQUESTS_PER_SECOND,
+            pace_below=settings.GITHUB_RATE_PACE_BELOW,
+            max_retries=settings.GITHUB_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.GITHUB_RETRY_BASE_DELAY,
+            max_delay=settings.GITHUB_RETRY_MAX_DELAY,
+            max_wait=settings.GITHUB_RATE_LIMIT_MAX_WAIT
+        )
+
     def _get_headers(self, custom_token: Optional[str] = None) -> Dict[str, str]:
         """Get headers with appropriate token"""
         token = custom_token or self.base_token
@@ -16,55 +78,322 @@ class GitHubService:
             "Authorization": f"token {token}" if token else "",
             "Accept": "application/vnd.github.v3+json"
         }
-    
+
     async def get_pr_data(self, repo: str, pr_number: int, github_token: Optional[str] = None) -> Dict:
         """Fetch PR data from GitHub API with optional custom token"""
+        # Identical concurrent requests (same PR, same token) share one fetch
+        async def fetch() -> Dict:
+            with stage_timer("github_fetch"):
+                return await self._fetch_pr_data(repo, pr_number, github_token)
+
+        return await self.single_flight.do((repo, pr_number, self._token_id(github_token or self.base_token)), fetch)
+
+    async def _fetch_pr_data(self, repo: str, pr_number: int, github_token: Optional[str]) -> Dict:
+        token = github_token or self.base_token
+        # GitHub's GraphQL API rejects anonymous requests
+        if self.fetch_backend == "graphql" and token:
+            return await self._fetch_pr_data_graphql(repo, pr_number, github_token)
         headers = self._get_headers(github_token)
-        
+
+        client = self.http_clients.get(self.api_url)
+
         try:
-            async with httpx.AsyncClient() as client:
-                # Get PR details
-                pr_url = f"https://api.github.com/repos/{repo}/pulls/{pr_number}"
-                pr_response = await client.get(pr_url, headers=headers, timeout=10.0)
-                
-                if pr_response.status_code == 401:
-                    logger.error("GitHub API authentication failed - invalid token")
-                    raise Exception("Invalid GitHub token provided")
-                elif pr_response.status_code == 403:
-                    logger.error("GitHub API rate limit exceeded or insufficient permissions")
-                    raise Exception("GitHub API rate limit exceeded or insufficient permissions")
-                elif pr_response.status_code == 404:
-                    logger.error(f"PR not found: {repo}/pulls/{pr_number}")
-                    raise Exception(f"PR #{pr_number} not found in repository {repo}")
-                elif pr_response.status_code != 200:
-                    logger.error(f"Failed to fetch PR: {pr_response.status_code}")
-                    raise Exception(f"GitHub API error: {pr_response.status_code}")
-                
-                pr_data = pr_response.json()
-                
-                # Get files changed
-                files_url = f"https://api.github.com/repos/{repo}/pulls/{pr_number}/files"
-                files_response = await client.get(files_url, headers=headers, timeout=10.0)
-                
-                files = files_response.json() if files_response.status_code == 200 else []
-                
-                return {
-                    "title": pr_data.get("title", "Unknown PR"),
-                    "description": pr_data.get("body", ""),
-                    "files": files,
-                    "additions": pr_data.get("additions", 0),
-                    "deletions": pr_data.get("deletions", 0),
-                    "changed_files": pr_data.get("changed_files", 0),
-                    "state": pr_data.get("state", "open"),
-                    "author": pr_data.get("user", {}).get("login", "unknown"),
-                    "created_at": pr_data.get("created_at"),
-                    "repository": repo,
-                    "authenticated": bool(github_token or self.base_token)
-                }
-                
+            # PR details and the first files page don't depend on each other
+            pr_url = f"{self.api_url}/repos/{repo}/pulls/{pr_number}"
+            files_url = f"{self.api_url}/repos/{repo}/pulls/{pr_number}/files"
+            pr_response, files_response = await asyncio.gather(
+                self._get(client, pr_url, headers, token),
+                self._get(client, files_url, headers, token, params=self._page_params(1))
+            )
+
+            self._check_status(pr_response, f"PR #{pr_number} not found in repository {repo}")
+
+            pr_data = pr_response.json()
+
+            # Get files changed
+            files = []
+            store = self._patch_store()
+            if files_response.status_code == 200:
+                files = self._load_files(files_response.json(), store)
+                last_page = self._last_page(files_response, pr_data.get("changed_files", 0))
+                if last_page > 1:
+                    files += await self._get_file_pages(client, files_url, headers, token, last_page, store)
+
+            return self._pr_result(repo, pr_number, pr_data, files, bool(token))
+
         except httpx.TimeoutException:
             logger.error("GitHub API request timed out")
             raise Exception("GitHub API request timed out")
         except Exception as e:
             logger.error(f"GitHub API error: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+    async def _fetch_pr_data_graphql(self, repo: str, pr_number: int, github_token: Optional[str]) -> Dict:
+        """PR metadata and file list from one GraphQL query, plus the raw diff for patches.
+
+        GraphQL has no patches, so the PR's diff is requested alongside the
+        query, so a PR of any size takes one round trip: past the first 100
+        files the file list is read from the diff too. Patches are kept only
+        for files with added lines, the only lines the rules scan; deleted files
+        and deletion-only changes get an empty patch. If GitHub won't render the
+        diff (very large PRs) files are paged through GraphQL and patches come
+        from the REST files pages.
+        """
+        token = github_token or self.base_token
+        headers = self._get_headers(github_token)
+        owner, name = repo.split("/", 1)
+        variables = {"owner": owner, "name": name, "number": pr_number, "after": None}
+        not_found = f"PR #{pr_number} not found in repository {repo}"
+        client = self.http_clients.get(self.graphql_url)
+        pr_url = f"{self.api_url}/repos/{repo}/pulls/{pr_number}"
+
+        try:
+            pull, diff_response = await asyncio.gather(
+                self._graphql(client, PR_GRAPHQL_QUERY, variables, headers, token, not_found),
+                self._get(self.http_clients.get(self.api_url), pr_url, {**headers, "Accept": DIFF_MEDIA_TYPE}, token)
+            )
+            connection = pull["files"]
+            if connection["pageInfo"]["hasNextPage"] and diff_response.status_code == 200:
+                # The diff already lists every file; cheaper than paging GraphQL cursors one by one
+                files = parse_unified_diff(diff_response.text)[:MAX_PR_FILES]
+                patches = None
+            else:
+                nodes = list(connection["nodes"])
+                while connection["pageInfo"]["hasNextPage"] and len(nodes) < MAX_PR_FILES:
+                    variables["after"] = connection["pageInfo"]["endCursor"]
+                    connection = (await self._graphql(
+                        client, FILES_GRAPHQL_QUERY, variables, headers, token, not_found
+                    ))["files"]
+                    nodes.extend(connection["nodes"])
+                files = [
+                    {
+                        "filename": node["path"],
+                        "status": _CHANGE_TYPES.get(node.get("changeType"), "modified"),
+                        "additions": node.get("additions", 0),
+                        "deletions": node.get("deletions", 0),
+                        "changes": node.get("additions", 0) + node.get("deletions", 0),
+                        "patch": "",
+                    }
+                    for node in nodes
+                ]
+                patches = {}
+                if any(self._needs_patch(file_info) for file_info in files):
+                    patches = await self._patches(pr_url, diff_response, headers, token, pull.get("changedFiles", 0))
+
+            for file_info in files:
+                if not self._needs_patch(file_info):
+                    file_info["patch"] = ""
+                elif patches is not None:
+                    file_info["patch"] = patches.get(file_info["filename"], "")
+            files = self._load_files(files, self._patch_store())
+
+            pr_data = {
+                "title": pull.get("title"),
+                "body": pull.get("body"),
+                "additions": pull.get("additions", 0),
+                "deletions": pull.get("deletions", 0),
+                "changed_files": pull.get("changedFiles", 0),
+                "state": _PR_STATES.get(pull.get("state"), "open"),
+                "user": pull.get("author") or {},
+                "created_at": pull.get("createdAt"),
+                "head": {"sha": pull.get("headRefOid")},
+            }
+            return self._pr_result(repo, pr_number, pr_data, files, True)
+
+        except httpx.TimeoutException:
+            logger.error("GitHub API request timed out")
+            raise Exception("GitHub API request timed out")
+        except Exception as e:
+            logger.error(f"GitHub API error: {e}")
+            raise e
+
+    def _pr_result(self, repo: str, pr_number: int, pr_data: Dict, files: List[Dict], authenticated: bool) -> Dict:
+        """The dict AnalysisService consumes, from a REST-shaped PR object"""
+        return {
+            "title": pr_data.get("title") or "Unknown PR",
+            "description": pr_data.get("body", ""),
+            "files": files,
+            "additions": pr_data.get("additions", 0),
+            "deletions": pr_data.get("deletions", 0),
+            "changed_files": pr_data.get("changed_files", 0),
+            "state": pr_data.get("state", "open"),
+            "author": (pr_data.get("user") or {}).get("login", "unknown"),
+            "created_at": pr_data.get("created_at"),
+            "repository": repo,
+            "pr_number": pr_number,
+            "head_sha": pr_data.get("head", {}).get("sha"),
+            "authenticated": authenticated
+        }
+
+    def _patch_store(self) -> Optional[PatchStore]:
+        return PatchStore(self.patch_memory_max_bytes) if self.lazy_patches else None
+
+    def _load_files(self, files: List[Dict], store: Optional[PatchStore]) -> List[Dict]:
+        """File dicts as GitHub returned them, or lazy views with patches moved into ``store``"""
+        return lazy_files(files, store) if store is not None else files
+
+    def _needs_patch(self, file_info: Dict) -> bool:
+        return file_info["status"] != "removed" and file_info["additions"] > 0
+
+    async def _graphql(self, client: httpx.AsyncClient, query: str, variables: Dict, headers: Dict[str, str],
+                       token: str, not_found: str) -> Dict:
+        """Run a PR query and return its ``pullRequest`` object"""
+        # GraphQL has its own (point-based) quota, so it is paced separately from REST
+        response = await self.scheduler.request(
+            self._token_id(token) + ":graphql",
+            lambda: client.post(
+                self.graphql_url, json={"query": query, "variables": variables}, headers=headers, timeout=10.0
+            )
+        )
+        self._check_status(response, not_found)
+        body = response.json()
+        errors = body.get("errors") or []
+        if errors:
+            types = {error.get("type") for error in errors}
+            if "NOT_FOUND" in types:
+                logger.error(not_found)
+                raise Exception(not_found)
+            if "RATE_LIMITED" in types:
+                raise Exception("GitHub API rate limit exceeded or insufficient permissions")
+            raise Exception(f"GitHub GraphQL error: {errors[0].get('message', 'unknown error')}")
+        pull = ((body.get("data") or {}).get("repository") or {}).get("pullRequest")
+        if pull is None:
+            logger.error(not_found)
+            raise Exception(not_found)
+        return pull
+
+    async def _patches(self, pr_url: str, diff_response: httpx.Response, headers: Dict[str, str],
+                       token: Optional[str], changed_files: int) -> Dict[str, str]:
+        """Patch per filename from the PR's raw diff, or from the REST files pages when it is unavailable"""
+        if diff_response.status_code == 200:
+            return {file_info["filename"]: file_info["patch"] for file_info in parse_unified_diff(diff_response.text)}
+
+        client = self.http_clients.get(self.api_url)
+        logger.info(f"Diff for {pr_url} unavailable ({diff_response.status_code}), using files API")
+        files_url = f"{pr_url}/files"
+        first_page = await self._get(client, files_url, headers, token, params=self._page_params(1))
+        if first_page.status_code != 200:
+            logger.warning(f"Failed to fetch files for {pr_url}: {first_page.status_code}")
+            return {}
+        files = first_page.json()
+        last_page = self._last_page(first_page, changed_files)
+        if last_page > 1:
+            files += await self._get_file_pages(client, files_url, headers, token, last_page)
+        return {file_info["filename"]: file_info.get("patch") or "" for file_info in files}
+
+    async def list_pull_requests(self, repo: str, state: str = "open", github_token: Optional[str] = None,
+                                 limit: Optional[int] = None) -> List[int]:
+        """PR numbers in a repository, following pagination up to ``limit``"""
+        token = github_token or self.base_token
+        headers = self._get_headers(github_token)
+        client = self.http_clients.get(self.api_url)
+        url = f"{self.api_url}/repos/{repo}/pulls"
+
+        numbers: List[int] = []
+        page = 1
+        try:
+            while True:
+                params = {"state": state, "per_page": PULLS_PER_PAGE, "page": page}
+                response = await self._get(client, url, headers, token, params=params)
+                self._check_status(response, f"Repository {repo} not found")
+                numbers.extend(pr["number"] for pr in response.json())
+                if limit is not None and len(numbers) >= limit:
+                    return numbers[:limit]
+                if "next" not in response.links:
+                    return numbers
+                page += 1
+        except httpx.TimeoutException:
+            logger.error("GitHub API request timed out")
+            raise Exception("GitHub API request timed out")
+
+    def rate_limit(self, github_token: Optional[str] = None) -> Optional[Dict]:
+        """Current quota and pacing for a token, or None before its first request"""
+        return self.scheduler.budget(self._token_id(github_token or self.base_token))
+
+    def _token_id(self, token: Optional[str]) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+
+    def _check_status(self, response: httpx.Response, not_found: str):
+        if response.status_code == 401:
+            logger.error("GitHub API authentication failed - invalid token")
+            raise Exception("Invalid GitHub token provided")
+        elif response.status_code == 403:
+            logger.error("GitHub API rate limit exceeded or insufficient permissions")
+            raise Exception("GitHub API rate limit exceeded or insufficient permissions")
+        elif response.status_code == 429:
+            # The scheduler has already retried as long as it was allowed to
+            retry_after = response.headers.get("Retry-After")
+            logger.error(f"GitHub API rate limit exceeded (Retry-After: {retry_after})")
+            raise Exception(
+                "GitHub API rate limit exceeded" + (f" (retry after {retry_after}s)" if retry_after else "")
+            )
+        elif response.status_code == 404:
+            logger.error(not_found)
+            raise Exception(not_found)
+        elif response.status_code != 200:
+            logger.error(f"GitHub request failed: {response.status_code}")
+            raise Exception(f"GitHub API error: {response.status_code}")
+
+    async def _get(self, client: httpx.AsyncClient, url: str, headers: Dict[str, str],
+                   token: Optional[str], params: Optional[Dict] = None) -> httpx.Response:
+        """Scheduled GET with If-None-Match/If-Modified-Since revalidation against the response cache"""
+        token_id = self._token_id(token)
+        if self.response_cache is None:
+            return await self.scheduler.request(
+                token_id, lambda: client.get(url, headers=headers, params=params, timeout=10.0)
+            )
+
+        cache_key = self.response_cache.key(url, params, token, headers.get("Accept", ""))
+        validators, cached = self.response_cache.conditional_headers(cache_key)
+        response = await self.scheduler.request(
+            token_id, lambda: client.get(url, headers={**headers, **validators}, params=params, timeout=10.0)
+        )
+        response = self.response_cache.resolve(cache_key, response, cached)
+        if response.status_code == 304:
+            # No body to serve the 304 from: ask again without any validators
+            logger.warning(f"GitHub 304 for {url} without a cached body, re-requesting")
+            plain_headers = {
+                name: value for name, value in headers.items()
+                if name.lower() not in ("if-none-match", "if-modified-since")
+            }
+            response = await self.scheduler.request(
+                token_id, lambda: client.get(url, headers=plain_headers, params=params, timeout=10.0)
+            )
+            response = self.response_cache.resolve(cache_key, response, None)
+        return response
+
+    def cache_stats(self) -> Dict:
+        return self.response_cache.stats() if self.response_cache else {"enabled": False}
+
+    def _page_params(self, page: int) -> Dict[str, int]:
+        return {"per_page": FILES_PER_PAGE, "page": page}
+
+    def _last_page(self, first_response: httpx.Response, changed_files: int) -> int:
+        """Number of files pages, from the Link header or the PR's changed_files count"""
+        last_url = first_response.links.get("last", {}).get("url")
+        if last_url:
+            try:
+                last_page = int(parse_qs(urlsplit(last_url).query)["page"][0])
+            except (KeyError, IndexError, ValueError):
+                last_page = 1
+        else:
+            last_page = math.ceil(changed_files / FILES_PER_PAGE)
+        return max(1, min(last_page, MAX_PR_FILES // FILES_PER_PAGE))
+
+    async def _get_file_pages(self, client: httpx.AsyncClient, files_url: str, headers: Dict[str, str],
+                              token: Optional[str], last_page: int,
+                              store: Optional[PatchStore] = None) -> List[Dict]:
+        """Fetch pages 2..last_page concurrently, preserving page order"""
+        semaphore = asyncio.Semaphore(self.files_concurrency)
+
+        async def fetch_page(page: int) -> List[Dict]:
+            async with semaphore:
+                response = await self._get(client, files_url, headers, token, params=self._page_params(page))
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch files page {page}: {response.status_code}")
+                return []
+            # Compress each page as it lands rather than once every page is in
+            return self._load_files(response.json(), store)
+
+        pages = await asyncio.gather(*(fetch_page(page) for page in range(2, last_page + 1)))
+        return [file_info for page in pages for file_info in page]
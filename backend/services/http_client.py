@@ -0,0 +1,147 @@
+import logging
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import settings
+from services.metrics import UPSTREAM_RESPONSES, UPSTREAM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Transport that counts in-flight requests for pool sizing and records upstream metrics"""
+
+    def __init__(self, stats: Dict[str, int], host: str = "", **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.host = host
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        started = time.perf_counter()
+        # Timeouts and connection failures are timed too, so slow failures show in the latency histogram
+        outcome = "error"
+        try:
+            response = await super().handle_async_request(request)
+            outcome = "response"
+        except Exception:
+            self.stats["errors"] += 1
+            UPSTREAM_RESPONSES.inc((self.host, "error"))
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, (self.host, outcome))
+        UPSTREAM_RESPONSES.inc((self.host, str(response.status_code)))
+        return response
+
+    def pool_occupancy(self) -> Dict[str, int]:
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+        }
+
+
+class HTTPClientRegistry:
+    """Per-host pooled AsyncClients shared by all services.
+
+    Clients are created lazily on first use and closed from the app lifespan,
+    so every request to the same upstream reuses warm keep-alive (and HTTP/2)
+    connections instead of paying a fresh TCP+TLS handshake.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = settings.HTTP2_ENABLED if http2 is None else http2
+        if self.http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed - falling back to HTTP/1.1")
+            self.http2 = False
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, _InstrumentedTransport] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """Return the pooled client for the host serving ``url``"""
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._create(origin)
+        return client
+
+    def _create(self, origin: str) -> httpx.AsyncClient:
+        stats = self._stats.setdefault(origin, {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+        })
+        transport = _InstrumentedTransport(
+            stats,
+            host=urlsplit(origin).netloc,
+            limits=self.limits,
+            http2=self.http2,
+        )
+        client = httpx.AsyncClient(base_url=origin, transport=transport)
+        self._clients[origin] = client
+        self._transports[origin] = transport
+        logger.info(f"Created pooled HTTP client for {origin} (http2={self.http2})")
+        return client
+
+    def stats(self) -> Dict:
+        """Pool occupancy and request counters per upstream host"""
+        hosts = {}
+        for origin, stats in self._stats.items():
+            transport = self._transports.get(origin)
+            occupancy = transport.pool_occupancy() if transport else {}
+            hosts[origin] = {**stats, **occupancy}
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "hosts": hosts,
+        }
+
+    async def aclose(self):
+        for origin, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client for {origin}: {e}")
+        self._clients.clear()
+        self._transports.clear()
+
+
+# Shared registry; closed by the FastAPI lifespan in main.py
+http_clients = HTTPClientRegistry()
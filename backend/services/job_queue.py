@@ -0,0 +1,282 @@
+import asyncio
+import ipaddress
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+import orjson
+
+from config import settings
+from services.analysis_service import AnalysisService
+from services.analysis_store import AnalysisStore
+from services.github_service import GitHubService
+from utils.lru_cache import LRUCache
+from utils.sqlite_store import SQLiteKV, sqlite_path
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+def check_callback_host(url: str, allowed_hosts: List[str]) -> str:
+    """Hostname of a callback URL, or ValueError if it is not an allowed http(s) URL"""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+    if not any(host == allowed or (allowed.startswith(".") and host.endswith(allowed)) for allowed in allowed_hosts):
+        raise ValueError(f"callback_url host {host} is not in JOB_CALLBACK_ALLOWED_HOSTS")
+    return host
+
+
+async def check_callback_addresses(url: str):
+    """ValueError unless every address the callback host resolves to is public"""
+    parts = urlsplit(url)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+        )
+    except OSError as e:
+        raise ValueError(f"callback_url host {parts.hostname} does not resolve: {e}")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if not address.is_global:
+            raise ValueError(f"callback_url host {parts.hostname} resolves to non-public address {address}")
+
+
+@dataclass
+class AnalysisJob:
+    id: str
+    repository: str
+    pr_number: int
+    pr_id: str
+    callback_url: Optional[str] = None
+    status: str = "queued"
+    stage: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[Dict] = None
+    events: List[Dict] = field(default_factory=list)
+    # Kept in memory only; jobs recovered from disk run with the server token
+    github_token: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.pop("github_token")
+        return data
+
+
+class AnalysisJobQueue:
+    """Run PR analyses in the background on a pool of asyncio workers.
+
+    Each job records a list of stage events (queued, fetching, analysis
+    stages, storing, completed/failed) that can be polled or streamed. With
+    JOB_QUEUE_PERSISTENT and a sqlite DATABASE_URL, jobs are written through
+    to SQLite and unfinished ones are re-queued on startup.
+    """
+
+    def __init__(self, github_service: GitHubService, analysis_service: AnalysisService, store: AnalysisStore,
+                 workers: Optional[int] = None, persistent: Optional[bool] = None, database_url: Optional[str] = None):
+        self.github_service = github_service
+        self.analysis_service = analysis_service
+        self.store = store
+        self.worker_count = workers or settings.JOB_WORKERS
+        self.callback_allowed_hosts = settings.JOB_CALLBACK_ALLOWED_HOSTS
+        # Queued and running jobs; finished ones move to the LRU, so eviction
+        # can only ever drop jobs that have nothing left to do
+        self._active: Dict[str, AnalysisJob] = {}
+        self._jobs = LRUCache(max_entries=settings.JOB_MAX_JOBS, ttl=settings.JOB_TTL)
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        persistent = settings.JOB_QUEUE_PERSISTENT if persistent is None else persistent
+        path = sqlite_path(settings.DATABASE_URL if database_url is None else database_url) if persistent else None
+        self._disk = SQLiteKV(path, "analysis_jobs") if path else None
+
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.recovered = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        if self._disk is not None:
+            await self._recover()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        logger.info(f"Analysis job queue started with {self.worker_count} workers")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._disk is not None:
+            self._disk.close()
+
+    async def submit(self, repository: str, pr_number: int, github_token: Optional[str] = None,
+                     callback_url: Optional[str] = None) -> AnalysisJob:
+        if self._queue is None:
+            raise Exception("Analysis job queue is not running")
+        if callback_url:
+            check_callback_host(callback_url, self.callback_allowed_hosts)
+            await check_callback_addresses(callback_url)
+        job = AnalysisJob(
+            id=uuid.uuid4().hex,
+            repository=repository,
+            pr_number=pr_number,
+            pr_id=f"{repository}-{pr_number}",
+            callback_url=callback_url,
+            github_token=github_token
+        )
+        self._active[job.id] = job
+        self._emit(job, "queued")
+        await self._save(job)
+        await self._queue.put(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[AnalysisJob]:
+        job = self._active.get(job_id) or self._jobs.get(job_id)
+        if job is None and self._disk is not None:
+            blob = await self._disk.aget(job_id)
+            if blob is not None:
+                job = AnalysisJob(**orjson.loads(blob))
+        return job
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict]:
+        """Past and future stage events of a job, ending after the final one"""
+        job = await self.get(job_id)
+        if job is None:
+            return
+        index = 0
+        while True:
+            waiter = self._waiters.get(job.id)
+            while index < len(job.events):
+                yield job.events[index]
+                index += 1
+            if job.finished or waiter is None:
+                return
+            await waiter.wait()
+
+    def stats(self) -> Dict:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "recovered": self.recovered,
+            "tracked_jobs": len(self._active) + len(self._jobs),
+            "persistent": self._disk is not None,
+        }
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self._active.get(job_id)
+            try:
+                if job is not None and not job.finished:
+                    await self._run(job)
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} crashed: {e}", exc_info=True)
+            finally:
+                if job is not None:
+                    self._active.pop(job_id, None)
+                    self._jobs.set(job_id, job)
+                self._queue.task_done()
+
+    async def _run(self, job: AnalysisJob):
+        self.running += 1
+        job.status = "running"
+        job.started_at = time.time()
+        self._emit(job, "fetching")
+        await self._save(job)
+        try:
+            pr_data = await self.github_service.get_pr_data(job.repository, job.pr_number, job.github_token)
+            self._emit(job, "analyzing", files=len(pr_data.get("files", [])))
+            analysis = await self.analysis_service.analyze_pr(
+                job.pr_id, pr_data, job.repository, on_stage=lambda stage: self._emit(job, stage)
+            )
+            analysis.github_authenticated = bool(job.github_token)
+            self._emit(job, "storing")
+            await self.store.put(job.pr_id, analysis)
+
+            job.result = {
+                "pr_id": job.pr_id,
+                "risk_score": analysis.risk_score,
+                "risk_level": analysis.risk_level,
+                "issues": len(analysis.issues),
+                "cached": analysis.cached,
+            }
+            job.status = "completed"
+            self.completed += 1
+        except Exception as e:
+            logger.warning(f"Analysis job {job.id} for {job.pr_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+            self.failed += 1
+        finally:
+            self.running -= 1
+
+        job.finished_at = time.time()
+        self._emit(job, job.status, **({"result": job.result} if job.result else {"error": job.error}))
+        await self._save(job)
+        if job.callback_url:
+            await self._notify(job)
+
+    def _emit(self, job: AnalysisJob, stage: str, **data):
+        job.stage = stage
+        job.events.append({"stage": stage, "at": round(time.time(), 3), **data})
+        # Wake every stream waiting on this job, then give them a fresh event to wait on
+        waiter = self._waiters.pop(job.id, None)
+        if not job.finished:
+            self._waiters[job.id] = asyncio.Event()
+        if waiter is not None:
+            waiter.set()
+
+    async def _save(self, job: AnalysisJob):
+        if self._disk is None:
+            return
+        try:
+            await self._disk.aset(job.id, orjson.dumps(job.to_dict()), settings.JOB_TTL)
+        except Exception as e:
+            logger.warning(f"Persisting analysis job {job.id} failed: {e}")
+
+    async def _recover(self):
+        blobs = await asyncio.to_thread(self._disk.values)
+        for blob in blobs:
+            job = AnalysisJob(**orjson.loads(blob))
+            if job.finished:
+                continue
+            job.status = "queued"
+            self._active[job.id] = job
+            self._emit(job, "queued", recovered=True)
+            await self._queue.put(job.id)
+            self.recovered += 1
+        if self.recovered:
+            logger.info(f"Re-queued {self.recovered} unfinished analysis jobs")
+
+    async def _notify(self, job: AnalysisJob):
+        # A throwaway client: callback hosts are client-chosen, so they get no
+        # pooled connection and no upstream metrics series. Addresses are
+        # re-checked since DNS may have changed since the job was submitted.
+        try:
+            check_callback_host(job.callback_url, self.callback_allowed_hosts)
+            await check_callback_addresses(job.callback_url)
+            async with httpx.AsyncClient(timeout=10.0, follow_redirects=False) as client:
+                response = await client.post(job.callback_url, json=job.to_dict())
+            if response.status_code >= 400:
+                logger.warning(f"Job callback for {job.id} returned {response.status_code}")
+        except Exception as e:
+            logger.warning(f"Job callback for {job.id} failed: {e}")
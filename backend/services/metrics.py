@@ -0,0 +1,33 @@
+from utils.metrics import MetricsRegistry
+
+# Process-wide registry rendered by GET /metrics
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "API requests by method, route template and status", ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "API request latency, including streamed bodies", ("method", "route")
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "API requests currently being served", ("method",)
+)
+STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_duration_seconds", "Time spent in each analysis and chat pipeline stage", ("stage",)
+)
+ANALYSIS_PEAK_RSS = registry.histogram(
+    "analysis_peak_rss_bytes", "Process RSS high-water mark seen during each PR analysis", (),
+    buckets=tuple(mb * 1024 * 1024 for mb in (64, 128, 256, 512, 1024, 2048, 4096))
+)
+UPSTREAM_RESPONSES = registry.counter(
+    "upstream_responses_total", "Responses from upstream APIs by host and status code", ("host", "status")
+)
+UPSTREAM_SECONDS = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream API request latency (headers received, or the transport error)",
+    ("host", "outcome")
+)
+
+
+def stage_timer(stage: str):
+    """``with stage_timer("risk"):`` records the block's duration for that stage"""
+    return STAGE_SECONDS.time((stage,))
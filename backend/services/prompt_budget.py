@@ -0,0 +1,151 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from utils.diff_parser import Hunk, PatchIndex, parse_patch
+
+# Rough chars-per-token ratio for code with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+SEVERITY_WEIGHTS = {"high": 3, "medium": 2, "low": 1}
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+_STOPWORDS = {
+    "the", "and", "for", "are", "this", "that", "with", "what", "why", "how", "can", "should",
+    "does", "there", "any", "about", "from", "have", "has", "pr", "code", "change", "changes",
+    "is", "it", "safe", "merge", "you", "please", "review", "file", "line",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class DiffBudgetReport:
+    text: str
+    tokens_used: int
+    tokens_full: int
+    hunks_included: int
+    hunks_total: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_full - self.tokens_used)
+
+
+class DiffBudgeter:
+    """Fit a PR diff into a prompt token budget.
+
+    Hunks are ranked by how many detected issues fall inside them (weighted
+    by severity), whether the file has issues at all, and how many of the
+    question's identifiers they mention, and are added best-first - along
+    with their file's one-line summary - until the budget is spent. Remaining
+    budget goes to summaries of the other files, and whatever still doesn't
+    fit is collapsed into a single "N more file(s)" line. Included hunks are
+    emitted in their original file order.
+    """
+
+    def __init__(self, budget_tokens: int):
+        self.budget_tokens = budget_tokens
+
+    def build(self, files: List[Dict], question: str = "", issues: Optional[List[Dict]] = None) -> DiffBudgetReport:
+        indexes = [
+            parse_patch(file_info.get("patch") or "", file_info.get("filename", ""))
+            for file_info in files
+        ]
+        indexes = [index for index in indexes if index.hunks]
+        hunks_total = sum(len(index.hunks) for index in indexes)
+
+        full_text = self._render(indexes, {id(hunk) for index in indexes for hunk in index.hunks})
+        tokens_full = estimate_tokens(full_text)
+        if tokens_full <= self.budget_tokens:
+            return DiffBudgetReport(full_text, tokens_full, tokens_full, hunks_total, hunks_total)
+
+        issues_by_file: Dict[str, List[Dict]] = {}
+        for issue in issues or []:
+            issues_by_file.setdefault(issue.get("file", ""), []).append(issue)
+        terms = {word.lower() for word in _WORD.findall(question)} - _STOPWORDS
+
+        ranked = []
+        for file_order, index in enumerate(indexes):
+            file_issues = issues_by_file.get(index.filename, [])
+            basename = index.filename.rsplit("/", 1)[-1].lower()
+            mentioned = bool(basename) and basename in question.lower()
+            for hunk_order, hunk in enumerate(index.hunks):
+                score = self._score(index, hunk, file_issues, terms, mentioned)
+                cost = estimate_tokens(index.hunk_text(hunk)) + 1
+                ranked.append((-score, cost, file_order, hunk_order, hunk))
+        ranked.sort(key=lambda item: item[:4])
+
+        # Every emitted line is paid for, including the summary that stands in
+        # for files that don't fit; each line also costs a token for its newline
+        used = estimate_tokens(self._more_files_line(indexes)) + 1
+        shown = set()
+        selected = set()
+        for _, cost, file_order, _, hunk in ranked:
+            if file_order not in shown:
+                cost += self._file_cost(indexes[file_order])
+            if used + cost <= self.budget_tokens:
+                selected.add(id(hunk))
+                shown.add(file_order)
+                used += cost
+        for file_order, index in enumerate(indexes):
+            if file_order not in shown and used + self._file_cost(index) <= self.budget_tokens:
+                shown.add(file_order)
+                used += self._file_cost(index)
+
+        text = self._render([index for order, index in enumerate(indexes) if order in shown], selected)
+        hidden = [index for order, index in enumerate(indexes) if order not in shown]
+        if hidden:
+            text = "\n".join(part for part in (text, self._more_files_line(hidden)) if part)
+        return DiffBudgetReport(text, estimate_tokens(text), tokens_full, len(selected), hunks_total)
+
+    def _file_cost(self, index: PatchIndex) -> int:
+        """Tokens for a file's summary line plus its worst-case "hunks omitted" line"""
+        return estimate_tokens(self._summary(index)) + estimate_tokens(f"... {len(index.hunks)} hunk(s) omitted") + 2
+
+    @staticmethod
+    def _summary(index: PatchIndex) -> str:
+        return f"File: {index.filename} (+{index.additions} -{index.deletions}, {len(index.hunks)} hunks)"
+
+    @staticmethod
+    def _more_files_line(indexes: List[PatchIndex]) -> str:
+        additions = sum(index.additions for index in indexes)
+        deletions = sum(index.deletions for index in indexes)
+        return f"... {len(indexes)} more file(s) not shown (+{additions} -{deletions})"
+
+    def _score(self, index: PatchIndex, hunk: Hunk, file_issues: List[Dict], terms: set, mentioned: bool) -> float:
+        score = 0.0
+        for issue in file_issues:
+            weight = SEVERITY_WEIGHTS.get(str(issue.get("severity", "")).lower(), 1)
+            if hunk.new_start <= issue.get("line", 0) <= hunk.new_end:
+                score += 10 * weight
+            else:
+                score += 1
+        if mentioned:
+            score += 5
+        if terms:
+            hunk_text = index.hunk_text(hunk).lower()
+            score += sum(2 for term in terms if term in hunk_text)
+        return score
+
+    def _render(self, indexes: List[PatchIndex], selected: set) -> str:
+        sections = []
+        for index in indexes:
+            included = [hunk for hunk in index.hunks if id(hunk) in selected]
+            sections.append(self._summary(index))
+            sections.extend(index.hunk_text(hunk) for hunk in included)
+            omitted = len(index.hunks) - len(included)
+            if omitted:
+                sections.append(f"... {omitted} hunk(s) omitted")
+        return "\n".join(sections)
+
+
+def truncate_to_budget(text: str, budget_tokens: int) -> DiffBudgetReport:
+    """Budget a raw diff string that has no per-file structure"""
+    tokens_full = estimate_tokens(text)
+    if tokens_full <= budget_tokens:
+        return DiffBudgetReport(text, tokens_full, tokens_full, 0, 0)
+    cut = text[:budget_tokens * CHARS_PER_TOKEN].rsplit("\n", 1)[0] + "\n... diff truncated"
+    return DiffBudgetReport(cut, estimate_tokens(cut), tokens_full, 0, 0)
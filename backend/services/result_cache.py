@@ -0,0 +1,63 @@
+import logging
+from typing import Dict, Optional
+
+from models.analysis import AnalysisResponse
+from services.analysis_store import AnalysisStore
+from utils.lru_cache import LRUCache
+from utils.sqlite_store import SQLiteKV, sqlite_path
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisResultCache:
+    """Content-addressed cache of finished analyses.
+
+    Keys identify the exact code that was analysed (see
+    ``AnalysisService._cache_key``), so entries never need invalidating - a new
+    push changes the head SHA and therefore the key. The in-process LRU is
+    always on; a SQLite tier is added when DATABASE_URL points at a sqlite file.
+
+    Entries are stored without ``files``: the patches are the bulk of an
+    analysis (and may pin a PR's PatchStore), while a hit has the same
+    files at hand from the PR fetch it was looked up for.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 3600, database_url: str = ""):
+        self.ttl = ttl
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        path = sqlite_path(database_url)
+        self._disk = SQLiteKV(path, "analysis_results") if path else None
+        self.disk_hits = 0
+
+    async def get(self, key: str) -> Optional[AnalysisResponse]:
+        analysis = self._memory.get(key)
+        if analysis is None and self._disk is not None:
+            try:
+                blob = await self._disk.aget(key)
+            except Exception as e:
+                logger.warning(f"Analysis cache disk read failed: {e}")
+                blob = None
+            if blob is not None:
+                analysis = AnalysisStore.decode(blob)
+                self._memory.set(key, analysis)
+                self.disk_hits += 1
+
+        # Callers mutate the result (github_authenticated, applied fixes)
+        return analysis.model_copy(deep=True) if analysis is not None else None
+
+    async def set(self, key: str, analysis: AnalysisResponse):
+        analysis = analysis.model_copy(update={"files": []}).model_copy(deep=True)
+        self._memory.set(key, analysis)
+        if self._disk is not None:
+            try:
+                await self._disk.aset(key, AnalysisStore.encode(analysis), self.ttl)
+            except Exception as e:
+                logger.warning(f"Analysis cache disk write failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            **self._memory.stats(),
+            "ttl": self.ttl,
+            "disk_enabled": self._disk is not None,
+            "disk_hits": self.disk_hits,
+        }
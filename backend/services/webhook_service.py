@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from config import settings
+from services.job_queue import AnalysisJobQueue
+from utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# pull_request actions that change what an analysis would see
+ANALYZE_ACTIONS = ("opened", "synchronize", "reopened")
+
+
+@dataclass
+class PendingAnalysis:
+    repository: str
+    pr_number: int
+    head_sha: str
+    first_seen: float
+    due: float
+    events: int = 1
+    task: Optional[asyncio.Task] = None
+
+
+class WebhookService:
+    """Pre-warm analyses from GitHub ``pull_request`` webhooks.
+
+    Deliveries are verified against GITHUB_WEBHOOK_SECRET (X-Hub-Signature-256)
+    and de-duplicated by delivery id, since GitHub redelivers on timeouts.
+    Pushes to the same PR are debounced: the analysis is queued once the PR
+    has been quiet for ``debounce`` seconds, or ``max_delay`` after the first
+    push of a burst so a steady stream of pushes is still analysed. The job
+    runs with the server token and lands in the analysis store and result
+    cache, so the first viewer gets a cached result.
+    """
+
+    def __init__(self, job_queue: AnalysisJobQueue, secret: Optional[str] = None,
+                 debounce: Optional[float] = None, max_delay: Optional[float] = None):
+        self.job_queue = job_queue
+        self.secret = (settings.GITHUB_WEBHOOK_SECRET if secret is None else secret).encode()
+        self.debounce = settings.WEBHOOK_DEBOUNCE_SECONDS if debounce is None else debounce
+        self.max_delay = settings.WEBHOOK_MAX_DELAY_SECONDS if max_delay is None else max_delay
+        self._pending: Dict[str, PendingAnalysis] = {}
+        self._deliveries = LRUCache(max_entries=10000, ttl=3600)
+
+        self.received = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.ignored = 0
+        self.debounced = 0
+        self.cancelled = 0
+        self.queued = 0
+        self.queue_failures = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.secret)
+
+    def verify(self, body: bytes, signature: Optional[str]) -> bool:
+        """Check the X-Hub-Signature-256 header against the raw request body"""
+        if not self.secret or not signature or not signature.startswith("sha256="):
+            self.rejected += 1
+            return False
+        expected = hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature[len("sha256="):]):
+            self.rejected += 1
+            return False
+        return True
+
+    def receive(self, event: str, delivery_id: Optional[str], payload: Dict) -> Dict:
+        """Handle a verified delivery; returns what was done with it"""
+        self.received += 1
+        if delivery_id:
+            if self._deliveries.peek(delivery_id) is not None:
+                self.duplicates += 1
+                return {"status": "duplicate"}
+            self._deliveries.set(delivery_id, True)
+
+        if event == "ping":
+            return {"status": "pong"}
+        action = payload.get("action")
+        pull_request = payload.get("pull_request") or {}
+        repository = (payload.get("repository") or {}).get("full_name")
+        pr_number = payload.get("number") or pull_request.get("number")
+        if event != "pull_request" or not (repository and pr_number):
+            self.ignored += 1
+            return {"status": "ignored", "reason": f"unsupported event {event}"}
+
+        key = f"{repository}-{pr_number}"
+        if action == "closed":
+            pending = self._pending.pop(key, None)
+            if pending is not None and pending.task is not None:
+                pending.task.cancel()
+                self.cancelled += 1
+            self.ignored += 1
+            return {"status": "ignored", "reason": "closed"}
+        if action not in ANALYZE_ACTIONS:
+            self.ignored += 1
+            return {"status": "ignored", "reason": f"action {action}"}
+
+        head_sha = (pull_request.get("head") or {}).get("sha", "")
+        now = time.monotonic()
+        pending = self._pending.get(key)
+        if pending is not None:
+            # Push the deadline back, but never past max_delay from the first push
+            pending.head_sha = head_sha
+            pending.events += 1
+            pending.due = min(now + self.debounce, pending.first_seen + self.max_delay)
+            self.debounced += 1
+            return {"status": "debounced", "pr_id": key, "events": pending.events}
+
+        pending = PendingAnalysis(repository, int(pr_number), head_sha, first_seen=now,
+                                  due=now + self.debounce)
+        self._pending[key] = pending
+        pending.task = asyncio.create_task(self._queue_when_quiet(key, pending))
+        return {"status": "scheduled", "pr_id": key, "delay": self.debounce}
+
+    async def stop(self):
+        tasks = [pending.task for pending in self._pending.values() if pending.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "configured": self.configured,
+            "received": self.received,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "ignored": self.ignored,
+            "debounced": self.debounced,
+            "cancelled": self.cancelled,
+            "queued": self.queued,
+            "queue_failures": self.queue_failures,
+            "pending": len(self._pending),
+            "debounce_seconds": self.debounce,
+            "max_delay_seconds": self.max_delay,
+        }
+
+    async def _queue_when_quiet(self, key: str, pending: PendingAnalysis):
+        while True:
+            delay = pending.due - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+
+        if self._pending.get(key) is pending:
+            del self._pending[key]
+        try:
+            job = await self.job_queue.submit(pending.repository, pending.pr_number)
+            self.queued += 1
+            logger.info(
+                f"Queued analysis job {job.id} for {key}@{pending.head_sha[:7]} "
+                f"after {pending.events} webhook event(s)"
+            )
+        except Exception as e:
+            self.queue_failures += 1
+            logger.warning(f"Queueing webhook analysis for {key} failed: {e}")
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests import backend modules the way the app does (run from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# ChatService refuses to start without a key; nothing in the tests calls Gemini
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+# Keep every store in memory regardless of the developer's environment
+os.environ["DATABASE_URL"] = ""
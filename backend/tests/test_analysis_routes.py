@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.routes import analysis as analysis_routes
+from models.analysis import AnalysisResponse, AutoFix, TimeachineData
+from services.analysis_store import AnalysisStore
+
+
+def make_analysis(pr_id: str) -> AnalysisResponse:
+    return AnalysisResponse(
+        pr_id=pr_id,
+        title="Test PR",
+        risk_score=90,
+        risk_level="red",
+        time_machine=TimeachineData(bug_likelihood=0.5, maintainability_impact=0, performance_regression=0,
+                                    predicted_issues=[]),
+        issues=[],
+        auto_fixes=[AutoFix(id=f"fix-{n}", description="fix", diff="", confidence=1.0) for n in range(4)],
+        analysis_time=0.1,
+    )
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = AnalysisStore(database_url="")
+    monkeypatch.setattr(analysis_routes, "analysis_store", store)
+    return store
+
+
+def post_fixes(paths):
+    app = FastAPI()
+    app.include_router(analysis_routes.router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post(path) for path in paths))
+
+    return asyncio.run(run())
+
+
+def test_concurrent_fixes_are_all_kept(store):
+    asyncio.run(store.put("pr-1", make_analysis("pr-1")))
+
+    responses = post_fixes([f"/apply-fix/pr-1/fix-{n}" for n in range(4)])
+
+    assert [response.status_code for response in responses] == [200] * 4
+    analysis = asyncio.run(store.get("pr-1"))
+    assert all(fix.applied for fix in analysis.auto_fixes)
+    assert analysis.risk_score == 90 - 4 * 15
+    assert not store._locks
+
+
+def test_applied_fix_is_rejected(store):
+    asyncio.run(store.put("pr-1", make_analysis("pr-1")))
+
+    first, second = post_fixes(["/apply-fix/pr-1/fix-0"])[0], post_fixes(["/apply-fix/pr-1/fix-0"])[0]
+
+    assert first.status_code == 200
+    assert second.status_code == 409
+    assert asyncio.run(store.get("pr-1")).risk_score == 75
+
+
+def test_unknown_pr_and_fix(store):
+    asyncio.run(store.put("pr-1", make_analysis("pr-1")))
+
+    missing_pr, missing_fix = post_fixes(["/apply-fix/pr-2/fix-0", "/apply-fix/pr-1/fix-9"])
+
+    assert missing_pr.status_code == 404
+    assert missing_fix.status_code == 404
+    assert asyncio.run(store.get("pr-1")).risk_score == 90
+
+
+def test_disk_entries_counted_without_querying_on_stats(tmp_path):
+    url = f"sqlite:///{tmp_path / 'store.db'}"
+    store = AnalysisStore(database_url=url)
+    asyncio.run(store.put("pr-1", make_analysis("pr-1")))
+    asyncio.run(store.put("pr-1", make_analysis("pr-1")))
+    asyncio.run(store.put("pr-2", make_analysis("pr-2")))
+    store._disk.count = None  # stats() must not touch SQLite
+    assert store.stats()["disk_entries"] == 2
+    store.close()
+
+    reopened = AnalysisStore(database_url=url)
+    assert reopened.stats()["disk_entries"] == 2
+    reopened.close()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import httpx
+
+from services.chat_cache import ChatResponseCache
+from services.chat_service import ChatService
+from services.chat_session import ChatSession
+from services.http_client import HTTPClientRegistry
+
+
+class MockClients(HTTPClientRegistry):
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+PR_CONTEXT = {
+    "title": "Large PR",
+    "files": [{"filename": "a.py", "patch": "@@ -1 +1 @@\n" + "+x = 1\n" * 40000}],
+    "issues": [],
+}
+
+
+def make_service(model: str, handler) -> ChatService:
+    service = ChatService(MockClients(handler), ChatResponseCache(max_entries=10, ttl=None, database_url=""))
+    service.model = model
+    return service
+
+
+def follow_up_session() -> ChatSession:
+    session = ChatSession(key="pr::s", context_hash="h")
+    session.record("first question", "first answer", window=4, summary_chars=2000)
+    return session
+
+
+def test_first_and_follow_up_turns_use_one_model():
+    created = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        created.append(json.loads(request.content))
+        return httpx.Response(200, json={"name": "cachedContents/abc"})
+
+    service = make_service("gemini-1.5-flash-001", handler)
+    first = asyncio.run(service.build_request("why?", "mentor", PR_CONTEXT))
+    follow_up = asyncio.run(service.build_request("and?", "mentor", PR_CONTEXT, follow_up_session()))
+
+    assert first.model == follow_up.model == "gemini-1.5-flash-001"
+    assert created[0]["model"] == "models/gemini-1.5-flash-001"
+    assert follow_up.payload["cachedContent"] == "cachedContents/abc"
+
+
+def test_alias_model_skips_context_cache():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("no context cache should be created for an alias model")
+
+    service = make_service("gemini-1.5-flash-latest", handler)
+    follow_up = asyncio.run(service.build_request("and?", "mentor", PR_CONTEXT, follow_up_session()))
+
+    assert follow_up.model == "gemini-1.5-flash-latest"
+    assert "cachedContent" not in follow_up.payload
+    assert service.context_cache_failures == 0
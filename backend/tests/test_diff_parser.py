@@ -0,0 +1,75 @@
+from utils.diff_parser import ADDED, CONTEXT, HUNK, REMOVED, iter_hunks, iter_lines, parse_patch
+
+MULTI_HUNK = (
+    "@@ -1,3 +1,4 @@\n"
+    " import os\n"
+    "+import sys\n"
+    " \n"
+    " def main():\n"
+    "@@ -20,4 +21,3 @@ def main():\n"
+    "     setup()\n"
+    "-    legacy()\n"
+    "-    more()\n"
+    "+    run()\n"
+    "     teardown()\n"
+    "\\ No newline at end of file"
+)
+
+
+def text(patch, line):
+    return patch[line.start:line.end]
+
+
+def test_iter_lines_numbers_multi_hunk_patch():
+    lines = list(iter_lines(MULTI_HUNK))
+    kinds = [line.kind for line in lines]
+    assert kinds == [
+        HUNK, CONTEXT, ADDED, CONTEXT, CONTEXT,
+        HUNK, CONTEXT, REMOVED, REMOVED, ADDED, CONTEXT,
+    ]
+    added = [(line.new_line, text(MULTI_HUNK, line)) for line in lines if line.kind == ADDED]
+    assert added == [(2, "import sys"), (22, "    run()")]
+    removed = [(line.old_line, text(MULTI_HUNK, line)) for line in lines if line.kind == REMOVED]
+    assert removed == [(21, "    legacy()"), (22, "    more()")]
+    assert (lines[5].old_line, lines[5].new_line) == (20, 21)
+
+
+def test_iter_lines_skips_no_newline_marker():
+    lines = list(iter_lines(MULTI_HUNK))
+    assert not any(text(MULTI_HUNK, line).startswith(" No newline") for line in lines)
+    assert text(MULTI_HUNK, lines[-1]) == "    teardown()"
+
+
+def test_headerless_patch_counts_from_line_one():
+    patch = "+first\n context\n+third"
+    lines = list(iter_lines(patch))
+    assert [(line.kind, line.new_line) for line in lines] == [(ADDED, 1), (CONTEXT, 2), (ADDED, 3)]
+
+    (hunk,) = iter_hunks(patch)
+    assert (hunk.old_start, hunk.new_start) == (1, 1)
+    assert list(hunk.added_lines) == [1, 3]
+
+
+def test_iter_hunks_offsets_and_counts():
+    hunks = list(iter_hunks(MULTI_HUNK))
+    assert len(hunks) == 2
+    first, second = hunks
+    assert (first.old_start, first.new_start, first.additions, first.deletions, first.context) == (1, 1, 1, 0, 3)
+    assert (second.old_start, second.new_start, second.additions, second.deletions) == (20, 21, 1, 2)
+    assert list(second.added_lines) == [22]
+    assert list(second.removed_lines) == [21, 22]
+    assert second.new_end == 23
+
+    index = parse_patch(MULTI_HUNK, "app.py")
+    first, second = index.hunks
+    assert index.header(second) == "@@ -20,4 +21,3 @@ def main():"
+    assert index.hunk_text(first).endswith(" def main():")
+    assert list(index.added_text(second)) == ["    run()"]
+    assert index.hunk_at(22) is second
+    assert index.hunk_at(10) is None
+    assert (index.additions, index.deletions) == (2, 2)
+
+
+def test_empty_patch_has_no_hunks():
+    assert list(iter_lines("")) == []
+    assert parse_patch("").hunks == []
@@ -0,0 +1,118 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.github_service import GitHubService
+from services.http_client import HTTPClientRegistry
+
+
+class MockClients(HTTPClientRegistry):
+    """Every host is served by one MockTransport handler"""
+
+    def __init__(self, handler):
+        super().__init__(http2=False)
+        self.handler = handler
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+def make_service(handler) -> GitHubService:
+    service = GitHubService(http_clients=MockClients(handler))
+    service.api_url = "https://api.github.test"
+    service.fetch_backend = "rest"
+    service.scheduler.max_retries = 0
+    return service
+
+
+def test_final_429_is_reported_as_rate_limit():
+    def handler(request):
+        return httpx.Response(429, headers={"Retry-After": "0"}, json={"message": "slow down"})
+
+    service = make_service(handler)
+    with pytest.raises(Exception, match="rate limit exceeded"):
+        asyncio.run(service.get_pr_data("owner/repo", 1))
+
+
+class ETagServer:
+    """Serves one JSON body per token with an ETag, answering a matching If-None-Match with 304"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        token = request.headers.get("Authorization", "anonymous")
+        etag = f'"{token}-v1"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, headers={"ETag": etag}, json={"seen_by": token})
+
+
+def fetch(service: GitHubService, server, token=None, headers=None):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(server)) as client:
+            request_headers = dict(headers or {})
+            if token:
+                request_headers["Authorization"] = token
+            return await service._get(client, "https://api.github.test/repos/o/r/pulls/1", request_headers, token)
+
+    return asyncio.run(run())
+
+
+def test_304_reuses_cached_body():
+    server = ETagServer()
+    service = make_service(server)
+
+    first = fetch(service, server, token="token-a")
+    second = fetch(service, server, token="token-a")
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json() == {"seen_by": "token-a"}
+    assert "If-None-Match" not in server.requests[0].headers
+    assert server.requests[1].headers["If-None-Match"] == '"token-a-v1"'
+    stats = service.cache_stats()
+    assert stats["not_modified"] == 1 and stats["misses"] == 1
+
+
+def test_cache_entries_are_per_token():
+    server = ETagServer()
+    service = make_service(server)
+
+    fetch(service, server, token="token-a")
+    other = fetch(service, server, token="token-b")
+
+    # token-b must not revalidate against (or be served) token-a's body
+    assert "If-None-Match" not in server.requests[1].headers
+    assert other.json() == {"seen_by": "token-b"}
+    assert service.cache_stats()["entries"] == 2
+
+
+def test_entry_evicted_in_flight_still_serves_its_body():
+    server = ETagServer()
+    service = make_service(server)
+    fetch(service, server, token="token-a")
+
+    def evicting_server(request: httpx.Request) -> httpx.Response:
+        service.response_cache._cache.clear()
+        return server(request)
+
+    response = fetch(service, evicting_server, token="token-a")
+
+    assert response.status_code == 200
+    assert response.json() == {"seen_by": "token-a"}
+    assert len(server.requests) == 2
+
+
+def test_304_without_cached_body_is_refetched():
+    server = ETagServer()
+    service = make_service(server)
+
+    # Validators the cache never saw (e.g. its entry was evicted) yield a bodiless 304
+    response = fetch(service, server, token="token-a", headers={"If-None-Match": '"token-a-v1"'})
+
+    assert response.status_code == 200
+    assert response.json() == {"seen_by": "token-a"}
+    assert [request.headers.get("If-None-Match") for request in server.requests] == ['"token-a-v1"', None]
+    assert service.cache_stats()["entries"] == 1
@@ -0,0 +1,25 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.http_client import _InstrumentedTransport
+from services.metrics import UPSTREAM_RESPONSES, UPSTREAM_SECONDS
+
+
+def test_failed_requests_are_timed():
+    stats = {"requests": 0, "in_flight": 0, "peak_in_flight": 0, "errors": 0}
+    transport = _InstrumentedTransport(stats, host="closed.test")
+
+    async def request():
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get("http://127.0.0.1:1/")
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(request())
+
+    assert stats["errors"] == 1 and stats["in_flight"] == 0
+    assert "upstream_request_duration_seconds_count{host=\"closed.test\",outcome=\"error\"} 1" in "\n".join(
+        UPSTREAM_SECONDS.render()
+    )
+    assert UPSTREAM_RESPONSES._values[("closed.test", "error")] == 1
@@ -0,0 +1,124 @@
+import asyncio
+
+import orjson
+import pytest
+
+from models.analysis import AnalysisResponse, TimeachineData
+from services.analysis_store import AnalysisStore
+from services.job_queue import AnalysisJob, AnalysisJobQueue, check_callback_addresses, check_callback_host
+from utils.sqlite_store import SQLiteKV
+
+
+class FakeGitHub:
+    def __init__(self, release: asyncio.Event = None):
+        self.release = release
+        self.fetched = []
+
+    async def get_pr_data(self, repository, pr_number, token=None):
+        self.fetched.append(f"{repository}-{pr_number}")
+        if self.release is not None:
+            await self.release.wait()
+        return {"title": "PR", "files": []}
+
+
+class FakeAnalysis:
+    async def analyze_pr(self, pr_id, pr_data, repository=None, on_stage=None):
+        on_stage("scan")
+        return AnalysisResponse(
+            pr_id=pr_id, title=pr_data["title"], risk_score=10, risk_level="green",
+            time_machine=TimeachineData(bug_likelihood=0, maintainability_impact=0, performance_regression=0,
+                                        predicted_issues=[]),
+            issues=[], auto_fixes=[], analysis_time=0.0,
+        )
+
+
+def make_queue(github=None, **kwargs) -> AnalysisJobQueue:
+    return AnalysisJobQueue(github or FakeGitHub(), FakeAnalysis(), AnalysisStore(database_url=""), workers=1,
+                            **kwargs)
+
+
+def test_callback_host_must_be_allowed():
+    assert check_callback_host("https://hooks.example.test/done", [".example.test"]) == "hooks.example.test"
+    with pytest.raises(ValueError, match="not in JOB_CALLBACK_ALLOWED_HOSTS"):
+        check_callback_host("https://evil.test/done", [".example.test"])
+    with pytest.raises(ValueError, match="absolute http"):
+        check_callback_host("file:///etc/passwd", [".example.test"])
+
+
+@pytest.mark.parametrize("url", ["http://127.0.0.1/hook", "http://10.1.2.3/hook", "http://[::1]/hook",
+                                 "http://169.254.169.254/latest"])
+def test_private_callback_addresses_are_rejected(url):
+    with pytest.raises(ValueError, match="non-public address"):
+        asyncio.run(check_callback_addresses(url))
+
+
+def test_submit_rejects_private_callback():
+    async def run():
+        queue = make_queue(persistent=False)
+        queue.callback_allowed_hosts = ["127.0.0.1"]
+        await queue.start()
+        try:
+            with pytest.raises(ValueError):
+                await queue.submit("o/r", 1, callback_url="http://127.0.0.1/hook")
+            return queue.stats()
+        finally:
+            await queue.stop()
+
+    stats = asyncio.run(run())
+    assert stats["tracked_jobs"] == 0 and stats["queued"] == 0
+
+
+def test_recovery_requeues_only_unfinished_jobs(tmp_path):
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    disk = SQLiteKV(str(tmp_path / "jobs.db"), "analysis_jobs")
+    for job_id, status in (("queued-1", "queued"), ("running-1", "running"), ("done-1", "completed"),
+                           ("failed-1", "failed")):
+        job = AnalysisJob(id=job_id, repository="o/r", pr_number=1, pr_id="o/r-1", status=status)
+        disk.set(job_id, orjson.dumps(job.to_dict()))
+    disk.close()
+
+    async def run():
+        release = asyncio.Event()
+        github = FakeGitHub(release)
+        queue = make_queue(github, persistent=True, database_url=url)
+        await queue.start()
+        try:
+            recovered = sorted(queue._active)
+            release.set()
+            while queue.completed < 2:
+                await asyncio.sleep(0.01)
+            return recovered, queue.stats(), github.fetched, await queue.get("done-1")
+        finally:
+            await queue.stop()
+
+    recovered, stats, fetched, done = asyncio.run(run())
+    assert recovered == ["queued-1", "running-1"]
+    assert stats["recovered"] == 2 and stats["completed"] == 2
+    assert fetched == ["o/r-1", "o/r-1"]
+    assert done.status == "completed" and done.events == []
+
+
+def test_event_stream_ends_after_final_event():
+    async def run():
+        release = asyncio.Event()
+        queue = make_queue(FakeGitHub(release), persistent=False)
+        await queue.start()
+        try:
+            job = await queue.submit("o/r", 7)
+
+            async def collect():
+                return [event["stage"] async for event in queue.events(job.id)]
+
+            stream = asyncio.create_task(collect())
+            await asyncio.sleep(0.01)
+            release.set()
+            stages = await asyncio.wait_for(stream, timeout=2)
+            # A stream opened after the job finished replays its events and ends too
+            replay = await asyncio.wait_for(collect(), timeout=2)
+            return stages, replay
+        finally:
+            await queue.stop()
+
+    stages, replay = asyncio.run(run())
+    assert stages == ["queued", "fetching", "analyzing", "scan", "storing", "completed"]
+    assert replay == stages
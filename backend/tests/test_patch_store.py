@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.patch_store import PatchStore, lazy_files, patch_size
+
+
+def make_patch(index: int) -> str:
+    return "@@ -1 +1 @@\n" + "\n".join(f"+line {index} {n} ü" for n in range(200))
+
+
+def test_spilled_patches_round_trip():
+    with PatchStore(max_memory_bytes=0) as store:
+        handles = [store.add(make_patch(index)) for index in range(20)]
+        assert store.stats()["spilled_patches"] == 20
+        assert [store.get(handle) for handle in handles] == [make_patch(index) for index in range(20)]
+
+
+def test_concurrent_reads_of_spilled_patches():
+    with PatchStore(max_memory_bytes=1024) as store:
+        handles = [store.add(make_patch(index)) for index in range(200)]
+        assert store.stats()["spilled_patches"] > 100
+
+        def read(index: int) -> bool:
+            return store.get(handles[index]) == make_patch(index)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert all(pool.map(read, list(range(200)) * 5))
+
+
+def test_lazy_files_keep_metadata_and_size():
+    store = PatchStore(max_memory_bytes=0)
+    (lazy,) = lazy_files([{"filename": "a.py", "additions": 3, "patch": make_patch(1)}], store)
+    assert lazy["filename"] == "a.py"
+    assert lazy["patch"] == make_patch(1)
+    assert patch_size(lazy) == len(make_patch(1))
+    assert patch_size({"patch": "abc"}) == 3
+    store.close()
+    store.close()
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from utils.pipeline import Pipeline, Stage
+
+
+def run(pipeline: Pipeline):
+    started = []
+    results, trace = asyncio.run(pipeline.run(started.append))
+    return results, {entry["stage"]: entry for entry in trace}, started
+
+
+def test_stages_wait_for_their_dependencies():
+    async def source(results):
+        await asyncio.sleep(0.02)
+        return 2
+
+    async def double(results):
+        return results["source"] * 2
+
+    async def total(results):
+        return results["source"] + results["double"]
+
+    results, trace, started = run(Pipeline([
+        Stage("source", source, lambda results: 0),
+        Stage("double", double, lambda results: 0, depends_on=("source",)),
+        Stage("total", total, lambda results: 0, depends_on=("source", "double")),
+    ]))
+
+    assert results == {"source": 2, "double": 4, "total": 6}
+    assert started == ["source", "double", "total"]
+    assert trace["double"]["started_ms"] >= trace["source"]["started_ms"] + trace["source"]["duration_ms"]
+    assert all(entry["status"] == "ok" for entry in trace.values())
+
+
+def test_timed_out_stage_uses_fallback():
+    async def slow(results):
+        await asyncio.sleep(5)
+        return "late"
+
+    async def after(results):
+        return f"got {results['slow']}"
+
+    results, trace, _ = run(Pipeline([
+        Stage("slow", slow, lambda results: "fallback", timeout=0.05),
+        Stage("after", after, lambda results: None, depends_on=("slow",)),
+    ]))
+
+    assert results == {"slow": "fallback", "after": "got fallback"}
+    assert trace["slow"]["status"] == "timeout"
+    assert trace["slow"]["duration_ms"] < 1000
+    assert trace["after"]["status"] == "ok"
+
+
+def test_failing_stage_does_not_cancel_independent_stages():
+    async def broken(results):
+        raise RuntimeError("boom")
+
+    async def independent(results):
+        await asyncio.sleep(0.05)
+        return "done"
+
+    results, trace, _ = run(Pipeline([
+        Stage("broken", broken, lambda results: []),
+        Stage("independent", independent, lambda results: None),
+    ]))
+
+    assert results == {"broken": [], "independent": "done"}
+    assert trace["broken"]["status"] == "error"
+    assert trace["independent"]["status"] == "ok"
+
+
+def test_dependencies_must_be_listed_first():
+    async def noop(results):
+        return None
+
+    with pytest.raises(ValueError, match="must be listed before it"):
+        Pipeline([Stage("b", noop, lambda results: None, depends_on=("a",)), Stage("a", noop, lambda results: None)])
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from services.prompt_budget import DiffBudgeter, estimate_tokens
+
+
+def make_files(rng: random.Random, count: int = 12):
+    files = []
+    for file_order in range(count):
+        hunks = []
+        line = 1
+        for _ in range(rng.randint(1, 5)):
+            body = [f"+value_{file_order}_{line + n} = compute({n})" for n in range(rng.randint(1, 30))]
+            hunks.append(f"@@ -{line},0 +{line},{len(body)} @@\n" + "\n".join(body))
+            line += len(body) + rng.randint(5, 50)
+        files.append({"filename": f"src/pkg_{file_order}/module_{file_order}.py", "patch": "\n".join(hunks)})
+    return files
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_budgeted_prompt_never_exceeds_budget(seed):
+    rng = random.Random(seed)
+    files = make_files(rng)
+    issues = [{"file": files[0]["filename"], "line": 3, "severity": "high"}]
+    full = DiffBudgeter(10 ** 9).build(files)
+
+    for budget in range(40, full.tokens_full + 50, max(7, full.tokens_full // 100)):
+        report = DiffBudgeter(budget).build(files, "why does compute change?", issues)
+        assert report.tokens_used == estimate_tokens(report.text)
+        assert report.tokens_used <= budget, f"budget {budget}: used {report.tokens_used}"
+        assert report.tokens_full == full.tokens_full
+
+
+def test_summary_lines_are_paid_for():
+    files = make_files(random.Random(1), count=30)
+    # Room for some file summaries but few or no hunks
+    budget = 250
+    report = DiffBudgeter(budget).build(files)
+
+    summaries = [line for line in report.text.splitlines() if line.startswith("File: ")]
+    assert summaries
+    assert "more file(s) not shown" in report.text.splitlines()[-1]
+    assert report.tokens_used <= budget
+
+
+def test_hunks_with_issues_are_kept_first():
+    files = make_files(random.Random(2))
+    target = files[7]
+    issues = [{"file": target["filename"], "line": 1, "severity": "high"}]
+
+    report = DiffBudgeter(120).build(files, "", issues)
+
+    assert f"File: {target['filename']}" in report.text
+    assert "value_7_1 = compute(0)" in report.text
+    assert 0 < report.hunks_included < report.hunks_total
+
+
+def test_small_diff_is_sent_whole():
+    files = make_files(random.Random(3), count=2)
+    report = DiffBudgeter(10 ** 6).build(files)
+
+    assert report.tokens_saved == 0
+    assert report.hunks_included == report.hunks_total
+
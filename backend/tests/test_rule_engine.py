@@ -0,0 +1,61 @@
+from utils.code_analyzer import DEFAULT_RULES
+from utils.rule_engine import Rule, RuleSet
+
+
+def rule(rule_id, keywords, pattern=None):
+    return Rule(id=rule_id, keywords=keywords, type="quality", severity="low",
+                description=rule_id, fix_suggestion="n/a", pattern=pattern)
+
+
+def found(findings):
+    return [(finding.rule.id, finding.line) for finding in findings]
+
+
+def test_scan_reports_added_lines_with_new_file_numbers():
+    rules = RuleSet([rule("todo", ("TODO",)), rule("log", ("console.log",))])
+    patch = (
+        "@@ -1,2 +1,3 @@\n"
+        " keep()\n"
+        "+// TODO: fix\n"
+        "-console.log('removed lines are ignored')\n"
+        "@@ -40,1 +41,2 @@\n"
+        " other()\n"
+        "+console.log(x)"
+    )
+    findings = rules.scan_patch(patch)
+    assert found(findings) == [("todo", 2), ("log", 42)]
+    assert findings[0].code == "// TODO: fix"
+
+
+def test_scan_headerless_patch_starts_at_line_one():
+    rules = RuleSet([rule("todo", ("TODO",))])
+    assert found(rules.scan_patch("+TODO first\n context\n+TODO third")) == [("todo", 1), ("todo", 3)]
+
+
+def test_pattern_must_also_match():
+    rules = RuleSet([rule("eval", ("eval(",), pattern=r"(?<![\w.])eval\(")])
+    assert found(rules.scan_patch("+x = eval(data)\n+x = safe.eval(data)")) == [("eval", 1)]
+
+
+def test_overlapping_keywords_trigger_every_rule():
+    rules = RuleSet([rule("short", ("log",)), rule("long", ("console.log",))])
+    assert sorted(found(rules.scan_patch("+console.log(1)"))) == [("long", 1), ("short", 1)]
+
+
+def test_max_findings_stops_early():
+    rules = RuleSet([rule("todo", ("TODO",))])
+    assert len(rules.scan_patch("\n".join(["+TODO"] * 10), max_findings=3)) == 3
+
+
+def test_sql_injection_rule_allows_parameterized_queries():
+    rules = RuleSet(DEFAULT_RULES)
+    safe = '+cursor.execute("SELECT * FROM users WHERE id = %s", (uid,))'
+    formatted = '+cursor.execute("SELECT * FROM users WHERE id = %s" % uid)'
+    concatenated = '+query = "SELECT * FROM users WHERE id = " + user_id'
+    assert "sql-injection" not in [finding.rule.id for finding in rules.scan_patch(safe)]
+    assert "sql-injection" in [finding.rule.id for finding in rules.scan_patch(formatted)]
+    assert "sql-injection" in [finding.rule.id for finding in rules.scan_patch(concatenated)]
+
+
+def test_version_changes_with_rules():
+    assert RuleSet([rule("a", ("x",))]).version != RuleSet([rule("b", ("x",))]).version
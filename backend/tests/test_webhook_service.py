@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import hmac
+
+import httpx
+import orjson
+import pytest
+from fastapi import FastAPI
+
+from api.routes import github as github_routes
+from services.webhook_service import WebhookService
+
+SECRET = "webhook-secret"
+
+
+class FakeJob:
+    def __init__(self, job_id: str):
+        self.id = job_id
+
+
+class FakeQueue:
+    def __init__(self):
+        self.submitted = []
+
+    async def submit(self, repository, pr_number, github_token=None, callback_url=None):
+        self.submitted.append((repository, pr_number))
+        return FakeJob(f"job-{len(self.submitted)}")
+
+
+@pytest.fixture
+def webhooks(monkeypatch):
+    service = WebhookService(FakeQueue(), secret=SECRET, debounce=0.05, max_delay=1.0)
+    monkeypatch.setattr(github_routes, "webhook_service", service)
+    return service
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def push_event(pr_number: int, sha: str, action: str = "synchronize") -> bytes:
+    return orjson.dumps({
+        "action": action,
+        "number": pr_number,
+        "pull_request": {"number": pr_number, "head": {"sha": sha}},
+        "repository": {"full_name": "owner/repo"},
+    })
+
+
+async def deliver(client: httpx.AsyncClient, body: bytes, signature: str, delivery: str,
+                  event: str = "pull_request") -> httpx.Response:
+    return await client.post("/api/github/webhook", content=body, headers={
+        "X-Hub-Signature-256": signature, "X-GitHub-Event": event, "X-GitHub-Delivery": delivery,
+        "Content-Type": "application/json",
+    })
+
+
+def run_deliveries(deliveries, settle: float = 0.0):
+    """POST (body, signature, delivery id) tuples in order, then wait ``settle`` seconds for debounces"""
+    app = FastAPI()
+    app.include_router(github_routes.router, prefix="/api/github")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [await deliver(client, *delivery) for delivery in deliveries]
+        await asyncio.sleep(settle)
+        return responses
+
+    return asyncio.run(run())
+
+
+def test_bad_signature_is_rejected(webhooks):
+    body = push_event(1, "a" * 40)
+
+    wrong, missing = run_deliveries([(body, sign(body, "other-secret"), "d-1"), (body, "", "d-2")])
+
+    assert wrong.status_code == missing.status_code == 401
+    assert webhooks.rejected == 2 and webhooks.received == 0
+    assert webhooks.job_queue.submitted == []
+
+
+def test_valid_signature_is_accepted(webhooks):
+    body = push_event(1, "a" * 40, action="opened")
+
+    response, = run_deliveries([(body, sign(body), "d-1")], settle=0.2)
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "scheduled"
+    assert webhooks.job_queue.submitted == [("owner/repo", 1)]
+
+
+def test_burst_for_one_pr_queues_one_analysis(webhooks):
+    deliveries = []
+    for n in range(5):
+        body = push_event(1, f"{n:040d}")
+        deliveries.append((body, sign(body), f"d-{n}"))
+    # A redelivery of the same delivery id is dropped, not debounced
+    deliveries.append(deliveries[-1])
+
+    responses = run_deliveries(deliveries, settle=0.3)
+
+    assert [response.json()["status"] for response in responses] == (
+        ["scheduled"] + ["debounced"] * 4 + ["duplicate"]
+    )
+    assert webhooks.job_queue.submitted == [("owner/repo", 1)]
+    assert webhooks.stats()["queued"] == 1 and webhooks.stats()["pending"] == 0
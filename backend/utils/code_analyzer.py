@@ -1,51 +1,107 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from models.analysis import Issue
+from utils.rule_engine import Rule, RuleSet
+
+DEFAULT_RULES = [
+    Rule(
+        id="sql-injection",
+        keywords=("SELECT", "INSERT INTO", "UPDATE", "DELETE FROM", "select ", "insert into", "delete from"),
+        # Concatenation, interpolation or %-formatting of the query string; a bare
+        # %s placeholder passed with separate parameters is the safe form
+        pattern=r"""["'`]\s*\+|\+\s*["'`]|\$\{|["']\s*%\s*[\w(]|\.format\(|\bf["']""",
+        type="security",
+        severity="high",
+        description="Potential SQL injection vulnerability",
+        fix_suggestion="Use parameterized queries instead of string concatenation"
+    ),
+    Rule(
+        id="inner-html",
+        keywords=("innerHTML",),
+        pattern=r"innerHTML\s*\+?=(?!=)",
+        type="security",
+        severity="medium",
+        description="Direct innerHTML assignment without sanitization",
+        fix_suggestion="Use textContent or proper HTML sanitization library"
+    ),
+    Rule(
+        id="eval",
+        keywords=("eval(",),
+        pattern=r"(?<![\w.])eval\(",
+        type="security",
+        severity="high",
+        description="Use of eval() on dynamic input",
+        fix_suggestion="Avoid eval; parse data explicitly (e.g. JSON.parse) or use a safe dispatcher"
+    ),
+    Rule(
+        id="hardcoded-secret",
+        keywords=("password", "PASSWORD", "secret", "SECRET", "api_key", "API_KEY", "token", "TOKEN"),
+        pattern=r"""(?i)(password|secret|api_key|token)\w*["']?\s*[:=]\s*["'][^"'\s]{4,}["']""",
+        type="security",
+        severity="high",
+        description="Hard-coded credential in source",
+        fix_suggestion="Load secrets from environment variables or a secret manager"
+    ),
+    Rule(
+        id="shell-injection",
+        keywords=("shell=True",),
+        type="security",
+        severity="high",
+        description="Subprocess call with shell=True",
+        fix_suggestion="Pass an argument list and keep shell=False"
+    ),
+    Rule(
+        id="console-log",
+        keywords=("console.log",),
+        type="quality",
+        severity="low",
+        description="Debug logging statement found",
+        fix_suggestion="Remove console.log or use proper logging framework"
+    ),
+    Rule(
+        id="debugger",
+        keywords=("debugger",),
+        pattern=r"^\s*debugger\s*;?\s*$",
+        type="quality",
+        severity="medium",
+        description="Debugger statement left in code",
+        fix_suggestion="Remove the debugger statement before merging"
+    ),
+]
 
 class CodeAnalyzer:
+    # Keep responses bounded on generated or vendored files
+    MAX_ISSUES_PER_FILE = 50
+
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.ruleset = RuleSet(rules if rules is not None else DEFAULT_RULES)
+
     def detect_issues(self, files: List[Dict]) -> List[Issue]:
         """Detect issues in code changes"""
+        return self.with_fallback(self.scan_files(files))
+
+    def scan_files(self, files: List[Dict]) -> List[Issue]:
+        """Rule findings for ``files``, in file then line order"""
         issues = []
-        
+
         for file_info in files:
             filename = file_info.get("filename", "")
-            patch = file_info.get("patch", "")
-            
-            # SQL injection detection
-            if "SELECT" in patch and "+" in patch:
-                issues.append(Issue(
-                    type="security",
-                    severity="high",
-                    file=filename,
-                    line=42,
-                    description="Potential SQL injection vulnerability",
-                    fix_suggestion="Use parameterized queries instead of string concatenation",
-                    code='const query = "SELECT * FROM users WHERE id = " + userId;'
-                ))
-            
-            # innerHTML usage
-            if "innerHTML" in patch:
-                issues.append(Issue(
-                    type="security",
-                    severity="medium",
-                    file=filename,
-                    line=18,
-                    description="Direct innerHTML assignment without sanitization",
-                    fix_suggestion="Use textContent or proper HTML sanitization library",
-                    code='element.innerHTML = userInput;'
-                ))
-            
-            # Console.log in production
-            if "console.log" in patch:
+            patch = file_info.get("patch") or ""
+
+            for finding in self.ruleset.scan_patch(patch, self.MAX_ISSUES_PER_FILE):
                 issues.append(Issue(
-                    type="quality",
-                    severity="low",
+                    type=finding.rule.type,
+                    severity=finding.rule.severity,
                     file=filename,
-                    line=67,
-                    description="Debug logging statement found",
-                    fix_suggestion="Remove console.log or use proper logging framework",
-                    code='console.log("User data:", sensitiveUserData);'
+                    line=finding.line,
+                    description=finding.rule.description,
+                    fix_suggestion=finding.rule.fix_suggestion,
+                    code=finding.code
                 ))
-        
+
+        return issues
+
+    def with_fallback(self, issues: List[Issue]) -> List[Issue]:
+        """Final issue list for a whole PR"""
         # Ensure we always have some issues for demo
         if not issues:
             issues.append(Issue(
@@ -57,5 +113,5 @@ class CodeAnalyzer:
                 fix_suggestion="Refactor into smaller, more focused functions",
                 code='function handleComplexUserFlow(user, data, options) { /* 50+ lines */ }'
             ))
-        
-        return issues
\ No newline at end of file
+
+        return issues
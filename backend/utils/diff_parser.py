@@ -0,0 +1,225 @@
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# DiffLine kinds
+HUNK = "@"
+ADDED = "+"
+REMOVED = "-"
+CONTEXT = " "
+
+
+class DiffLine(NamedTuple):
+    """One patch line as offsets into the original buffer.
+
+    For content lines ``start``/``end`` span the text after the +/-/space
+    marker. For HUNK lines they span the whole header and ``old_line`` /
+    ``new_line`` hold the hunk's starting line numbers.
+    """
+    kind: str
+    old_line: int
+    new_line: int
+    start: int
+    end: int
+
+
+def iter_lines(patch: str) -> Iterator[DiffLine]:
+    """Stream the lines of a GitHub (hunk-only) patch without splitting it"""
+    position = 0
+    length = len(patch)
+    # Header-less patch text counts from line 1, as in iter_hunks
+    old_line = new_line = 1
+    while position < length:
+        end = patch.find("\n", position)
+        if end == -1:
+            end = length
+        marker = patch[position] if position < end else CONTEXT
+
+        if marker == ADDED:
+            yield DiffLine(ADDED, 0, new_line, position + 1, end)
+            new_line += 1
+        elif marker == REMOVED:
+            yield DiffLine(REMOVED, old_line, 0, position + 1, end)
+            old_line += 1
+        elif marker == HUNK:
+            header = HUNK_HEADER.match(patch, position, end)
+            if header:
+                old_line, new_line = int(header.group(1)), int(header.group(3))
+                yield DiffLine(HUNK, old_line, new_line, position, end)
+        elif marker != "\\":  # "\ No newline at end of file"
+            yield DiffLine(CONTEXT, old_line, new_line, position + 1, end)
+            old_line += 1
+            new_line += 1
+
+        position = end + 1
+
+
+@dataclass(slots=True)
+class Hunk:
+    """A hunk as buffer offsets.
+
+    ``added`` / ``removed`` are flat (start, end) offset pairs for each line's
+    content; ``added_lines`` / ``removed_lines`` are the matching new / old
+    file line numbers. Nothing is copied out of the patch.
+    """
+    old_start: int
+    new_start: int
+    start: int
+    header_end: int
+    end: int = 0
+    context: int = 0
+    added: array = field(default_factory=lambda: array("I"))
+    added_lines: array = field(default_factory=lambda: array("I"))
+    removed: array = field(default_factory=lambda: array("I"))
+    removed_lines: array = field(default_factory=lambda: array("I"))
+
+    @property
+    def additions(self) -> int:
+        return len(self.added_lines)
+
+    @property
+    def deletions(self) -> int:
+        return len(self.removed_lines)
+
+    @property
+    def new_end(self) -> int:
+        """Last new-file line covered by the hunk"""
+        return self.new_start + self.additions + self.context - 1
+
+
+def iter_hunks(patch: str) -> Iterator[Hunk]:
+    """Yield each hunk as soon as its last line has been read"""
+    hunk: Optional[Hunk] = None
+    for line in iter_lines(patch):
+        if line.kind == HUNK:
+            if hunk is not None:
+                yield hunk
+            hunk = Hunk(old_start=line.old_line, new_start=line.new_line,
+                        start=line.start, header_end=line.end, end=line.end)
+            continue
+        if hunk is None:
+            # Patch text without a header: treat it as one hunk from line 1
+            hunk = Hunk(old_start=1, new_start=1, start=0, header_end=0)
+
+        if line.kind == ADDED:
+            hunk.added.extend((line.start, line.end))
+            hunk.added_lines.append(line.new_line)
+        elif line.kind == REMOVED:
+            hunk.removed.extend((line.start, line.end))
+            hunk.removed_lines.append(line.old_line)
+        else:
+            hunk.context += 1
+        hunk.end = line.end
+
+    if hunk is not None:
+        yield hunk
+
+
+class PatchIndex:
+    """Hunk index over one file's patch; text is sliced from the buffer on demand"""
+
+    __slots__ = ("patch", "filename", "hunks")
+
+    def __init__(self, patch: str, filename: str = ""):
+        self.patch = patch or ""
+        self.filename = filename
+        self.hunks: List[Hunk] = list(iter_hunks(self.patch))
+
+    @property
+    def additions(self) -> int:
+        return sum(hunk.additions for hunk in self.hunks)
+
+    @property
+    def deletions(self) -> int:
+        return sum(hunk.deletions for hunk in self.hunks)
+
+    def header(self, hunk: Hunk) -> str:
+        return self.patch[hunk.start:hunk.header_end]
+
+    def hunk_text(self, hunk: Hunk) -> str:
+        return self.patch[hunk.start:hunk.end]
+
+    def added_text(self, hunk: Hunk) -> Iterator[str]:
+        offsets = hunk.added
+        for index in range(0, len(offsets), 2):
+            yield self.patch[offsets[index]:offsets[index + 1]]
+
+    def hunk_at(self, new_line: int) -> Optional[Hunk]:
+        """Hunk whose new-file range contains ``new_line``"""
+        for hunk in self.hunks:
+            if hunk.new_start <= new_line <= hunk.new_end:
+                return hunk
+        return None
+
+
+def parse_patch(patch: str, filename: str = "") -> PatchIndex:
+    return PatchIndex(patch, filename)
+
+
+
+def _diff_path(path: str) -> str:
+    """Path from a ``--- a/x`` / ``+++ b/x`` / ``rename to x`` value"""
+    path = path.strip()
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1]
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+def parse_unified_diff(diff: str) -> List[Dict]:
+    """Files of a ``git diff`` in the shape of GitHub's PR files API.
+
+    Each entry has filename, status, additions, deletions, changes and
+    patch; the patch starts at the first hunk header with no trailing
+    newline, and is empty for binary files, pure renames and mode changes.
+    """
+    files: List[Dict] = []
+    marker = "diff --git "
+    start = 0 if diff.startswith(marker) else diff.find("\n" + marker) + 1
+    if start == 0 and not diff.startswith(marker):
+        return files
+    while True:
+        next_start = diff.find("\n" + marker, start) + 1
+        end = next_start if next_start > 0 else len(diff)
+        hunk = diff.find("\n@@", start, end)
+        header_end = hunk if hunk != -1 else end
+
+        header = diff[start:header_end].split("\n")
+        # "a/P b/P" splits evenly unless the file was renamed
+        names = header[0][len(marker):]
+        old_path = new_path = _diff_path(names[:(len(names) - 1) // 2])
+        status = "modified"
+        for line in header[1:]:
+            if line.startswith("+++ ") and line[4:].strip() != "/dev/null":
+                new_path = _diff_path(line[4:])
+            elif line.startswith("--- ") and line[4:].strip() != "/dev/null":
+                old_path = _diff_path(line[4:])
+            elif line.startswith("rename to "):
+                new_path, status = _diff_path(line[len("rename to "):]), "renamed"
+            elif line.startswith("rename from "):
+                old_path = _diff_path(line[len("rename from "):])
+            elif line.startswith("new file mode"):
+                status = "added"
+            elif line.startswith("deleted file mode"):
+                status = "removed"
+
+        patch = diff[hunk + 1:end].rstrip("\n") if hunk != -1 else ""
+        additions, deletions = patch.count("\n+"), patch.count("\n-")
+        entry = {
+            "filename": old_path if status == "removed" else new_path,
+            "status": status,
+            "additions": additions,
+            "deletions": deletions,
+            "changes": additions + deletions,
+            "patch": patch,
+        }
+        if status == "renamed":
+            entry["previous_filename"] = old_path
+        files.append(entry)
+
+        if next_start == 0:
+            break
+        start = next_start
+    return files
@@ -0,0 +1,50 @@
+import os
+import resource
+import sys
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # No procfs (macOS): the high-water mark is the closest available figure
+        return max_rss()
+
+
+def max_rss() -> int:
+    """Process lifetime peak RSS in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSS:
+    """Highest RSS seen while a piece of work runs.
+
+    ``sample`` is called at convenient points (stage boundaries). The
+    process high-water mark is checked too: if it rose while the work ran,
+    the work set it, which also catches peaks between samples. With several
+    analyses in flight the figure covers the whole process, not one of them.
+    """
+
+    def __init__(self):
+        self.start = current_rss()
+        self._start_max = max_rss()
+        self.peak = self.start
+
+    def sample(self) -> int:
+        rss = current_rss()
+        if rss > self.peak:
+            self.peak = rss
+        return rss
+
+    def finish(self) -> int:
+        self.sample()
+        process_max = max_rss()
+        if process_max > self._start_max:
+            self.peak = max(self.peak, process_max)
+        return self.peak
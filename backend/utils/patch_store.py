@@ -0,0 +1,136 @@
+import hashlib
+import os
+import tempfile
+import weakref
+import zlib
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class PatchStore:
+    """Compressed patch bodies of one PR, spilling to a temp file past a memory cap.
+
+    Bodies are zlib-compressed as they are added and decoded on every
+    ``get``, so at most the patches currently being read exist as strings.
+    Once ``max_memory_bytes`` of compressed data is held, further bodies are
+    appended to an anonymous temp file. The file is closed by ``close``, on
+    leaving a ``with`` block, or as soon as the store is garbage collected,
+    whichever comes first.
+    """
+
+    def __init__(self, max_memory_bytes: int = 8 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        # Compressed body per handle, or None when it lives in the temp file
+        self._memory: List[Optional[bytes]] = []
+        self._spilled: Dict[int, Tuple[int, int]] = {}
+        self._file = None
+        self._finalizer = None
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self.loads = 0
+
+    def add(self, patch: str) -> int:
+        data = zlib.compress(patch.encode("utf-8", "surrogatepass"), 1)
+        handle = len(self._memory)
+        if self.memory_bytes + len(data) <= self.max_memory_bytes:
+            self._memory.append(data)
+            self.memory_bytes += len(data)
+            return handle
+
+        if self._file is None:
+            # Unbuffered, so os.pread in ``get`` sees every write
+            self._file = tempfile.TemporaryFile(prefix="pr-patches-", buffering=0)
+            # Holds the file, not the store, so it doesn't keep the store alive
+            self._finalizer = weakref.finalize(self, self._file.close)
+        offset = self._file.seek(0, 2)
+        self._file.write(data)
+        self._memory.append(None)
+        self._spilled[handle] = (offset, len(data))
+        self.spilled_bytes += len(data)
+        return handle
+
+    def get(self, handle: int) -> str:
+        data = self._memory[handle]
+        if data is None:
+            offset, length = self._spilled[handle]
+            # Positional read: analysis stages on different threads share the store
+            data = os.pread(self._file.fileno(), length, offset)
+        self.loads += 1
+        return zlib.decompress(data).decode("utf-8", "surrogatepass")
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self._file = None
+
+    def __enter__(self) -> "PatchStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self) -> Dict:
+        return {
+            "patches": len(self._memory),
+            "memory_bytes": self.memory_bytes,
+            "spilled_patches": len(self._spilled),
+            "spilled_bytes": self.spilled_bytes,
+            "loads": self.loads,
+        }
+
+
+class LazyFile(Mapping):
+    """A PR file dict whose ``patch`` is decoded from a PatchStore on access.
+
+    Metadata (filename, status, additions, deletions, ...) is held as-is.
+    ``patch_size`` and ``patch_digest`` (SHA-1 of the patch) are recorded when
+    the patch is stored, so sizing and cache keys never need the body.
+    """
+    __slots__ = ("_meta", "_store", "_handle", "patch_size", "patch_digest")
+
+    def __init__(self, meta: Dict, store: PatchStore, patch: str):
+        self._meta = meta
+        self._store = store
+        self._handle = store.add(patch) if patch else None
+        self.patch_size = len(patch)
+        self.patch_digest = hashlib.sha1(patch.encode("utf-8", "surrogatepass")).hexdigest() if patch else None
+
+    def __getitem__(self, key: str):
+        if key == "patch":
+            return self._store.get(self._handle) if self._handle is not None else ""
+        return self._meta[key]
+
+    def __contains__(self, key) -> bool:
+        return key == "patch" or key in self._meta
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._meta
+        yield "patch"
+
+    def __len__(self) -> int:
+        return len(self._meta) + 1
+
+    # Read-only view over shared storage; copies would only duplicate the handle
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self) -> str:
+        return f"LazyFile({self._meta.get('filename', '')!r}, patch_size={self.patch_size})"
+
+
+def lazy_files(files: Iterable[Dict], store: PatchStore) -> List[LazyFile]:
+    """Move the patches of GitHub file dicts into ``store``"""
+    return [
+        LazyFile({key: value for key, value in file_info.items() if key != "patch"}, store, file_info.get("patch") or "")
+        for file_info in files
+    ]
+
+
+def patch_size(file_info: Mapping) -> int:
+    """Length of a file's patch, without decoding lazy ones"""
+    size = getattr(file_info, "patch_size", None)
+    return size if size is not None else len(file_info.get("patch") or "")
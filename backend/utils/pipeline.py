@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """One node of a Pipeline.
+
+    ``run`` and ``fallback`` receive the results of earlier stages by name.
+    If ``run`` raises or takes longer than ``timeout`` seconds, the value
+    of ``fallback`` becomes the stage's result, so dependent stages still run.
+    A timeout can only interrupt ``run`` at an ``await``, so CPU-heavy stages
+    should hand their work to an executor.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    fallback: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+
+
+class Pipeline:
+    """A DAG of Stages; each starts as soon as all of its dependencies are done."""
+
+    def __init__(self, stages: Sequence[Stage]):
+        seen = set()
+        for stage in stages:
+            # Listing dependencies first rules out cycles and unknown names
+            missing = [name for name in stage.depends_on if name not in seen]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on {', '.join(missing)}, which must be listed before it")
+            if stage.name in seen:
+                raise ValueError(f"Duplicate stage {stage.name}")
+            seen.add(stage.name)
+        self.stages = list(stages)
+
+    async def run(self, on_start: Callable[[str], None] = lambda stage: None) -> Tuple[Dict[str, Any], List[Dict]]:
+        """Results by stage name, and one trace entry per stage in listed order"""
+        origin = time.perf_counter()
+        results: Dict[str, Any] = {}
+        trace: Dict[str, Dict] = {}
+        tasks: Dict[str, asyncio.Future] = {}
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.ensure_future(
+                self._run_stage(stage, [tasks[name] for name in stage.depends_on], results, trace, on_start, origin)
+            )
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return results, [trace[stage.name] for stage in self.stages]
+
+    async def _run_stage(self, stage: Stage, dependencies: List[asyncio.Future], results: Dict[str, Any],
+                         trace: Dict[str, Dict], on_start: Callable[[str], None], origin: float):
+        for dependency in dependencies:
+            await dependency
+
+        on_start(stage.name)
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            result = await asyncio.wait_for(stage.run(results), stage.timeout)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            logger.warning(f"Pipeline stage {stage.name} timed out after {stage.timeout}s, using fallback")
+            result = stage.fallback(results)
+        except Exception as e:
+            status = "error"
+            logger.warning(f"Pipeline stage {stage.name} failed, using fallback: {e}")
+            result = stage.fallback(results)
+        finished = time.perf_counter()
+
+        results[stage.name] = result
+        trace[stage.name] = {
+            "stage": stage.name,
+            "status": status,
+            "depends_on": list(stage.depends_on),
+            "started_ms": round((started - origin) * 1000, 3),
+            "duration_ms": round((finished - started) * 1000, 3),
+        }
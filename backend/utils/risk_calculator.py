@@ -1,32 +1,154 @@
-import random
-from typing import Dict
+import hashlib
+import json
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+SECURITY_KEYWORDS = ["auth", "login", "password", "token", "admin"]
+TEST_MARKERS = ("test", "spec", "__tests__", "fixtures")
+DOC_EXTENSIONS = (".md", ".rst", ".txt", ".adoc")
+CONFIG_EXTENSIONS = (".yml", ".yaml", ".json", ".toml", ".ini", ".cfg", ".env", ".lock")
+CONFIG_NAMES = ("dockerfile", "makefile", "requirements.txt", "package.json")
+# Relative defect-proneness by extension; unlisted source files count as 0.5
+LANGUAGE_RISK = {
+    ".c": 1.0, ".h": 1.0, ".cpp": 1.0, ".cc": 1.0, ".php": 0.9, ".js": 0.7, ".jsx": 0.7,
+    ".ts": 0.6, ".tsx": 0.6, ".py": 0.6, ".rb": 0.6, ".java": 0.5, ".cs": 0.5, ".go": 0.4,
+    ".rs": 0.3, ".sql": 0.8, ".sh": 0.8,
+}
+
+# Per-file columns, in matrix order; churn columns let test/docs shares be summed
+FILE_FEATURES = (
+    "additions", "deletions", "security_path", "test_churn", "docs_churn", "language_churn",
+    "config", "high_issues", "medium_issues", "low_issues",
+)
+_file_row = itemgetter(*FILE_FEATURES)
+# Per-PR features the weights apply to
+PR_FEATURES = (
+    "log_files", "log_additions", "log_deletions", "security_path", "test_share", "docs_share",
+    "language_risk", "config", "log_high_issues", "log_medium_issues", "log_low_issues",
+)
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "bias": 20.0,
+    "log_files": 6.0,
+    "log_additions": 4.0,
+    "log_deletions": 1.5,
+    "security_path": 15.0,
+    "test_share": -10.0,
+    "docs_share": -15.0,
+    "language_risk": 8.0,
+    "config": 5.0,
+    "log_high_issues": 10.0,
+    "log_medium_issues": 4.0,
+    "log_low_issues": 1.5,
+}
+
 
 class RiskCalculator:
-    def calculate_risk(self, pr_data: Dict) -> float:
+    """Deterministic linear risk model over file-level features.
+
+    Each changed file becomes one row of FILE_FEATURES. Rows are summed per
+    PR with a single ``np.add.reduceat``, turned into PR_FEATURES (log-scaled
+    sizes and issue counts, path flags, test/docs share of churn, churn-weighted
+    language risk) and scored
+    as ``clip(bias + X @ w, 0, 100)``. ``score_batch`` does this for any
+    number of PRs at once, so scoring cost is a few array operations rather
+    than a Python loop per PR.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown risk weights: {', '.join(sorted(unknown))}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self._bias = self.weights["bias"]
+        self._vector = np.array([self.weights[name] for name in PR_FEATURES], dtype=np.float64)
+        # Identifies the weights in analysis cache keys
+        self.version = hashlib.sha1(json.dumps(self.weights, sort_keys=True).encode()).hexdigest()[:8]
+
+    def file_contribution(self, file_info: Dict, issues: Iterable = ()) -> Dict:
+        """Per-file feature values, cacheable alongside the file's issues"""
+        filename = file_info.get("filename", "").lower()
+        basename = filename.rsplit("/", 1)[-1]
+        additions = file_info.get("additions", 0)
+        deletions = file_info.get("deletions", 0)
+        churn = additions + deletions
+        docs = basename.endswith(DOC_EXTENSIONS)
+        extension = "." + basename.rsplit(".", 1)[-1] if "." in basename else ""
+        language = 0.0 if docs else LANGUAGE_RISK.get(extension, 0.5)
+        severities = {"high": 0, "medium": 0, "low": 0}
+        for issue in issues:
+            severity = str(getattr(issue, "severity", "")).lower()
+            if severity in severities:
+                severities[severity] += 1
+        return {
+            "additions": additions,
+            "deletions": deletions,
+            "security_path": int(any(keyword in filename for keyword in SECURITY_KEYWORDS)),
+            "test_churn": churn if any(marker in filename for marker in TEST_MARKERS) else 0,
+            "docs_churn": churn if docs else 0,
+            "language_churn": churn * language,
+            "config": int(basename.endswith(CONFIG_EXTENSIONS) or basename in CONFIG_NAMES),
+            "high_issues": severities["high"],
+            "medium_issues": severities["medium"],
+            "low_issues": severities["low"],
+        }
+
+    def calculate_risk(self, pr_data: Dict, contributions: Optional[List[Dict]] = None) -> float:
         """Calculate risk score based on PR characteristics"""
-        base_score = 30
-        
-        # File count impact
-        file_count = pr_data.get("changed_files", 0)
-        if file_count > 10:
-            base_score += 25
-        elif file_count > 5:
-            base_score += 15
-        
-        # Size impact
-        additions = pr_data.get("additions", 0)
-        if additions > 500:
-            base_score += 20
-        elif additions > 200:
-            base_score += 10
-        
-        # Security patterns in file names
-        files = pr_data.get("files", [])
-        security_keywords = ["auth", "login", "password", "token", "admin"]
-        for file_info in files:
-            filename = file_info.get("filename", "").lower()
-            if any(keyword in filename for keyword in security_keywords):
-                base_score += 15
-                break
-        
-        return min(100, base_score + random.randint(0, 20))
\ No newline at end of file
+        return float(self.score_batch([pr_data], [contributions] if contributions is not None else None)[0])
+
+    def score_batch(self, prs: Sequence[Dict], contributions: Optional[Sequence[List[Dict]]] = None) -> np.ndarray:
+        """Risk scores for many PRs in one vectorized pass.
+
+        ``contributions[i]`` are the ``file_contribution`` rows of ``prs[i]``;
+        when omitted they are derived from each PR's ``files`` (without issue
+        counts).
+        """
+        if contributions is None:
+            contributions = [
+                [self.file_contribution(file_info) for file_info in pr.get("files", [])] for pr in prs
+            ]
+        features = self.feature_matrix(prs, contributions)
+        return np.clip(self._bias + features @ self._vector, 0.0, 100.0).round(1)
+
+    def feature_matrix(self, prs: Sequence[Dict], contributions: Sequence[List[Dict]]) -> np.ndarray:
+        """PR_FEATURES for each PR, one row per PR"""
+        count = len(prs)
+        lengths = np.fromiter((len(rows) for rows in contributions), dtype=np.int64, count=count)
+        rows = [row for pr_rows in contributions for row in pr_rows]
+        file_matrix = np.array(list(map(_file_row, rows)), dtype=np.float64).reshape(len(rows), len(FILE_FEATURES))
+
+        sums = np.zeros((count, len(FILE_FEATURES)), dtype=np.float64)
+        nonempty = lengths > 0
+        if rows:
+            # Segment starts of the non-empty PRs; each runs up to the next start
+            starts = (np.cumsum(lengths) - lengths)[nonempty]
+            sums[nonempty] = np.add.reduceat(file_matrix, starts, axis=0)
+        column = {name: sums[:, index] for index, name in enumerate(FILE_FEATURES)}
+
+        # PR metadata covers files GitHub did not list (PRs over 3000 files)
+        meta_files = np.array([pr.get("changed_files", 0) or 0 for pr in prs], dtype=np.float64)
+        meta_additions = np.array([pr.get("additions", 0) or 0 for pr in prs], dtype=np.float64)
+        meta_deletions = np.array([pr.get("deletions", 0) or 0 for pr in prs], dtype=np.float64)
+        files = np.maximum(lengths, meta_files)
+        additions = np.maximum(column["additions"], meta_additions)
+        deletions = np.maximum(column["deletions"], meta_deletions)
+        churn = column["additions"] + column["deletions"]
+        safe_churn = np.where(churn > 0, churn, 1.0)
+
+        features = np.column_stack([
+            np.log1p(files),
+            np.log1p(additions),
+            np.log1p(deletions),
+            column["security_path"] > 0,
+            np.where(churn > 0, column["test_churn"] / safe_churn, 0.0),
+            np.where(churn > 0, column["docs_churn"] / safe_churn, 0.0),
+            np.where(churn > 0, column["language_churn"] / safe_churn, 0.0),
+            column["config"] > 0,
+            np.log1p(column["high_issues"]),
+            np.log1p(column["medium_issues"]),
+            np.log1p(column["low_issues"]),
+        ]).astype(np.float64)
+        return features.reshape(count, len(PR_FEATURES))
@@ -0,0 +1,110 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.diff_parser import ADDED, iter_lines
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A detection rule.
+
+    ``keywords`` are literal triggers: a line is only considered when it
+    contains at least one of them. ``pattern`` is an optional regex that must
+    also match the line, for rules that need more than a literal.
+    """
+    id: str
+    keywords: Tuple[str, ...]
+    type: str
+    severity: str
+    description: str
+    fix_suggestion: str
+    pattern: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Finding:
+    rule: Rule
+    line: int
+    code: str
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Prefix-factored alternation, so the regex engine never retries a shared prefix"""
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        ends_here = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional suffix prefers the longest keyword at each position
+        return "(?:" + body + ")?" if ends_here else body
+
+    return build(trie)
+
+
+class RuleSet:
+    """All rules compiled into a single scanner.
+
+    Every rule keyword is folded into one prefix-factored regex that is run
+    once over each added line; only rules whose keyword actually occurs are
+    then checked against their optional ``pattern``. Cost is therefore
+    proportional to patch size, not rules x patch size.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: List[Rule] = list(rules)
+        self._patterns = [re.compile(rule.pattern) if rule.pattern else None for rule in self.rules]
+
+        keyword_rules: Dict[str, set] = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in filter(None, rule.keywords):
+                keyword_rules.setdefault(keyword, set()).add(index)
+
+        # The scanner reports the longest keyword at each position, so also
+        # attach the rules of every keyword contained inside a longer one
+        self._keyword_rules: Dict[str, Tuple[int, ...]] = {}
+        for keyword in keyword_rules:
+            indexes = set()
+            for other, other_indexes in keyword_rules.items():
+                if other in keyword:
+                    indexes |= other_indexes
+            self._keyword_rules[keyword] = tuple(sorted(indexes))
+
+        # Zero-width lookahead so overlapping keywords are all seen
+        self._scanner = re.compile("(?=(" + _trie_pattern(keyword_rules) + "))") if keyword_rules else None
+        self.version = hashlib.sha1(repr(self.rules).encode()).hexdigest()[:12]
+
+    def scan_patch(self, patch: str, max_findings: Optional[int] = None) -> List[Finding]:
+        """Walk a patch once and return findings on added lines, in line order"""
+        findings: List[Finding] = []
+        if not patch or self._scanner is None or self._scanner.search(patch) is None:
+            return findings
+
+        for diff_line in iter_lines(patch):
+            if diff_line.kind != ADDED:
+                continue
+            matched = set()
+            for match in self._scanner.finditer(patch, diff_line.start, diff_line.end):
+                matched.update(self._keyword_rules[match.group(1)])
+            if not matched:
+                continue
+
+            line = patch[diff_line.start:diff_line.end]
+            for index in sorted(matched):
+                pattern = self._patterns[index]
+                if pattern is not None and pattern.search(line) is None:
+                    continue
+                findings.append(Finding(self.rules[index], diff_line.new_line, line.strip()[:200]))
+                if max_findings is not None and len(findings) >= max_findings:
+                    return findings
+
+        return findings
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_path(database_url: str) -> Optional[str]:
+    """Filesystem path for a ``sqlite:///path`` DATABASE_URL, else None"""
+    if not database_url:
+        return None
+    if not database_url.startswith("sqlite:///"):
+        logger.warning(f"Unsupported DATABASE_URL scheme, disk persistence disabled: {database_url.split(':', 1)[0]}")
+        return None
+    path = database_url[len("sqlite:///"):]
+    if path and path != ":memory:":
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+    return path or ":memory:"
+
+
+class SQLiteKV:
+    """Tiny key -> blob table with optional expiry, safe to call from worker threads"""
+
+    def __init__(self, path: str, table: str):
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, updated_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def values(self) -> List[bytes]:
+        """All unexpired values, oldest write first"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT value FROM {self.table} WHERE expires_at IS NULL OR expires_at > ? ORDER BY updated_at",
+                (time.time(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: bytes, ttl: Optional[float] = None):
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    async def adelete(self, key: str):
+        await asyncio.to_thread(self.delete, key)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
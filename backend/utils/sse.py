@@ -0,0 +1,9 @@
+from typing import Optional
+
+import orjson
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> bytes:
+    """One Server-Sent Events message with a JSON ``data`` line"""
+    prefix = f"event: {event}\n" if event else ""
+    return prefix.encode() + b"data: " + orjson.dumps(data) + b"\n\n"